@@ -5,7 +5,6 @@
 """
 ###3
 import subprocess
-import time
 import json
 import requests
 from typing import Dict, List, Any
@@ -71,7 +70,7 @@ class AlgorithmTester:
             print("⚠️ 无法重置模拟环境，请确保服务器正在运行")
             return None
         
-        time.sleep(1)
+        # 重置是同步操作，响应返回时服务器已就绪，无需等待
         
         # 运行算法（子进程）
         try:
@@ -170,7 +169,6 @@ class AlgorithmTester:
                 if result:
                     traffic_results.append(result)
                     self._print_result(result)
-                time.sleep(2)  # 等待系统稳定
             
             results[traffic] = traffic_results
         
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+HTTP backend benchmark
+分别以 flask 和 stdlib 后端启动模拟服务器，用多个保持连接的客户端线程压测，比较吞吐量和延迟
+
+    python -m elevator_saga.benchmarks.http_backends --duration 5 --clients 4 --endpoint state
+"""
+import argparse
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# 压测的请求：(方法, 路径, 请求体)
+ENDPOINTS: Dict[str, Tuple[str, str, Optional[Dict[str, Any]]]] = {
+    "state": ("GET", "/api/state", None),
+    "step": ("POST", "/api/step", {"ticks": 1}),
+    "command": ("POST", "/api/elevators/0/go_to_floor", {"floor": 1}),
+    "traffic_info": ("GET", "/api/traffic/info", None),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+def start_server(backend: str, port: int, timeout: float = 15.0, extra_args: Sequence[str] = ()) -> subprocess.Popen:
+    """在子进程中启动服务器，等待端口可用"""
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "elevator_saga.server.simulator",
+            "--backend",
+            backend,
+            "--port",
+            str(port),
+            *extra_args,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{backend} server exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"{backend} server did not start within {timeout}s")
+
+
+def _client_worker(port: int, endpoint: str, stop_at: float, latencies: List[float], errors: List[int]) -> None:
+    method, path, payload = ENDPOINTS[endpoint]
+    body = json.dumps(payload).encode("utf-8") if payload is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    local: List[float] = []
+    error_count = 0
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                error_count += 1
+        except (OSError, http.client.HTTPException):
+            error_count += 1
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        local.append(time.perf_counter() - start)
+    connection.close()
+    latencies.extend(local)
+    errors.append(error_count)
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_load(port: int, endpoint: str, clients: int, duration: float, warmup: float = 0.5) -> Dict[str, Any]:
+    """以指定并发数压测一个端点，返回吞吐量和延迟统计"""
+    if warmup > 0:
+        _client_worker(port, endpoint, time.perf_counter() + warmup, [], [])
+    latencies: List[float] = []
+    errors: List[int] = []
+    stop_at = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_client_worker, args=(port, endpoint, stop_at, latencies, errors))
+        for _ in range(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1e3,
+    }
+
+
+def benchmark_backend(backend: str, endpoint: str, clients: int, duration: float) -> Dict[str, Any]:
+    """启动一个后端并压测，结束后关闭服务器"""
+    port = free_port()
+    process = start_server(backend, port)
+    try:
+        result = run_load(port, endpoint, clients, duration)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return {"backend": backend, "endpoint": endpoint, "clients": clients, **result}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare HTTP backends of the simulation server")
+    parser.add_argument("--backends", default="flask,stdlib", help="Comma-separated backends to compare")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="state", help="Endpoint to load")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent keep-alive client connections")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of load per backend")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    results = [
+        benchmark_backend(backend.strip(), args.endpoint, args.clients, args.duration)
+        for backend in args.backends.split(",")
+    ]
+    print(f"{'backend':<10}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for r in results:
+        print(
+            f"{r['backend']:<10}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10.0f}"
+            f"{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['max_ms']:>10.2f}"
+        )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"endpoint": args.endpoint, "duration": args.duration, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for the simulation API
+启动M个模拟客户端进程（每个客户端一个会话）压测 /api/*，统计吞吐量、延迟分位数、错误率和服务端CPU
+
+两种客户端：
+- controller：无输出地运行 ElevatorBusExampleController，请求序列与真实控制器一致
+- trace：回放录制的请求序列（--record-trace 从一次控制器运行中录制），客户端开销最小
+
+    python -m elevator_saga.benchmarks.load_test --clients 8 --duration 10 --json load.json
+    python -m elevator_saga.benchmarks.load_test --record-trace bus.trace.json --duration 5
+    python -m elevator_saga.benchmarks.load_test --mode trace --trace bus.trace.json --clients 16
+    python -m elevator_saga.benchmarks.load_test --json new.json --baseline load.json
+
+不指定 --server-url 时在子进程中启动本地服务器（--backend / --workers）。
+输出JSON包含运行配置、代码版本和机器信息，便于跨提交比较。
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional, Tuple
+
+from elevator_saga.benchmarks.http_backends import free_port, percentile, start_server
+from elevator_saga.client.api_client import ElevatorAPIClient
+from elevator_saga.core.models import SESSION_HEADER
+from elevator_saga.server.perf import PERF_PATH, route_label
+
+# 录制的请求：(方法, 路径, 请求体)
+TraceRequest = Tuple[str, str, Optional[Dict[str, Any]]]
+
+TRACE_FORMAT_VERSION = 1
+
+
+class _RecordingAPIClient(ElevatorAPIClient):
+    """在每个HTTP请求外计时的API客户端，可选地录制请求序列"""
+
+    def __init__(self, base_url: str, session_id: str, record: bool = False):
+        super().__init__(base_url, session_id)
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.trace: Optional[List[TraceRequest]] = [] if record else None
+
+    def _timed(self, method: str, endpoint: str, data: Optional[Dict[str, Any]], send: Any) -> Dict[str, Any]:
+        label = f"{method} {route_label(endpoint)}"
+        if self.trace is not None:
+            self.trace.append((method, endpoint, data))
+        start = time.perf_counter()
+        try:
+            response: Dict[str, Any] = send()
+        except Exception:
+            self.errors[label] = self.errors.get(label, 0) + 1
+            raise
+        self.latencies.setdefault(label, []).append(time.perf_counter() - start)
+        return response
+
+    def _send_get_request(self, endpoint: str) -> Dict[str, Any]:
+        return self._timed("GET", endpoint, None, lambda: super(_RecordingAPIClient, self)._send_get_request(endpoint))
+
+    def _send_post_request(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        return self._timed(
+            "POST", endpoint, data, lambda: super(_RecordingAPIClient, self)._send_post_request(endpoint, data)
+        )
+
+
+def _run_headless_controller(base_url: str, session_id: str, stop_at: float, record: bool) -> _RecordingAPIClient:
+    """在当前进程中无输出地运行示例控制器直到 stop_at，返回记录了延迟的API客户端"""
+    from elevator_saga.client_examples.bus_example import ElevatorBusExampleController
+    from elevator_saga.utils.debug import set_debug_mode
+
+    set_debug_mode(False)
+    client = _RecordingAPIClient(base_url, session_id, record)
+    controller = ElevatorBusExampleController()
+    controller.server_url = base_url
+    controller.session_id = session_id
+    controller.api_client = client
+
+    def stop() -> None:
+        controller.is_running = False
+
+    timer = threading.Timer(max(0.0, stop_at - time.time()), stop)
+    timer.daemon = True
+    timer.start()
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        # 流量文件用完时控制器会自行结束，重新启动直到时间用完
+        while time.time() < stop_at:
+            try:
+                controller.start()
+            except Exception:
+                # 错误已由客户端计数；出错的会话从头开始
+                client.reset()
+    timer.cancel()
+    return client
+
+
+def _controller_client(args: Tuple[str, str, float, float]) -> Dict[str, Any]:
+    """controller 模式的客户端进程"""
+    base_url, session_id, start_at, stop_at = args
+    while time.time() < start_at:
+        time.sleep(0.001)
+    started = time.time()
+    client = _run_headless_controller(base_url, session_id, stop_at, record=False)
+    return {"latencies": client.latencies, "errors": client.errors, "elapsed": time.time() - started}
+
+
+def _trace_client(args: Tuple[str, str, float, float, List[TraceRequest]]) -> Dict[str, Any]:
+    """trace 模式的客户端进程：保持连接，循环回放 reset + 录制的请求"""
+    base_url, session_id, start_at, stop_at, trace = args
+    url = urllib.parse.urlsplit(base_url)
+    encoded = [
+        (method, path, json.dumps(body).encode("utf-8") if body is not None else None, f"{method} {route_label(path)}")
+        for method, path, body in [("POST", "/api/reset", {}), *trace]
+    ]
+    headers = {"Content-Type": "application/json", SESSION_HEADER: session_id}
+    connection = http.client.HTTPConnection(url.hostname or "127.0.0.1", url.port or 80, timeout=60)
+    latencies: Dict[str, List[float]] = {label: [] for _, _, _, label in encoded}
+    errors: Dict[str, int] = {}
+    while time.time() < start_at:
+        time.sleep(0.001)
+    started = time.time()
+    while time.time() < stop_at:
+        for method, path, body, label in encoded:
+            start = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors[label] = errors.get(label, 0) + 1
+                connection.close()
+                connection = http.client.HTTPConnection(url.hostname or "127.0.0.1", url.port or 80, timeout=60)
+                continue
+            if response.status >= 400:
+                errors[label] = errors.get(label, 0) + 1
+            else:
+                latencies[label].append(time.perf_counter() - start)
+            if time.time() >= stop_at:
+                break
+    connection.close()
+    return {"latencies": latencies, "errors": errors, "elapsed": time.time() - started}
+
+
+def record_trace(base_url: str, path: str, duration: float, session_id: str = "load-test-record") -> int:
+    """运行一次示例控制器并把它发出的请求序列写入文件，返回请求数"""
+    client = _run_headless_controller(base_url, session_id, time.time() + duration, record=True)
+    assert client.trace is not None
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": TRACE_FORMAT_VERSION, "requests": client.trace}, f)
+    return len(client.trace)
+
+
+def load_trace(path: str) -> List[TraceRequest]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != TRACE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported trace version: {data.get('version')}")
+    return [(method, request_path, body) for method, request_path, body in data["requests"]]
+
+
+def _fetch_perf(base_url: str) -> Optional[Dict[str, Any]]:
+    """读取服务端 /api/perf；服务器不支持时返回None"""
+    url = urllib.parse.urlsplit(base_url)
+    connection = http.client.HTTPConnection(url.hostname or "127.0.0.1", url.port or 80, timeout=10)
+    try:
+        connection.request("GET", PERF_PATH)
+        response = connection.getresponse()
+        body = response.read()
+        if response.status != 200:
+            return None
+        data: Dict[str, Any] = json.loads(body)
+        return data
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        connection.close()
+
+
+def _latency_summary(sorted_latencies: List[float]) -> Dict[str, float]:
+    count = len(sorted_latencies)
+    return {
+        "mean_ms": sum(sorted_latencies) / count * 1e3 if count else 0.0,
+        "p50_ms": percentile(sorted_latencies, 50) * 1e3,
+        "p90_ms": percentile(sorted_latencies, 90) * 1e3,
+        "p99_ms": percentile(sorted_latencies, 99) * 1e3,
+        "max_ms": (sorted_latencies[-1] if count else 0.0) * 1e3,
+    }
+
+
+def aggregate(client_results: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+    """合并各客户端的延迟样本和错误计数"""
+    routes: Dict[str, Tuple[List[float], int]] = {}
+    for result in client_results:
+        for label, samples in result["latencies"].items():
+            routes.setdefault(label, ([], 0))[0].extend(samples)
+        for label, n in result["errors"].items():
+            samples, errors = routes.setdefault(label, ([], 0))
+            routes[label] = (samples, errors + n)
+    all_latencies = sorted(latency for samples, _ in routes.values() for latency in samples)
+    requests = len(all_latencies)
+    errors = sum(n for _, n in routes.values())
+    steps = sum(len(samples) for label, (samples, _) in routes.items() if label == "POST /api/step")
+    route_summaries = {}
+    for label, (samples, route_errors) in sorted(routes.items()):
+        samples.sort()
+        route_summaries[label] = {
+            "requests": len(samples),
+            "errors": route_errors,
+            "rps": len(samples) / duration,
+            **_latency_summary(samples),
+        }
+    return {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": errors / (requests + errors) if requests + errors else 0.0,
+        "rps": requests / duration,
+        "steps_per_s": steps / duration,
+        "latency": _latency_summary(all_latencies),
+        "routes": route_summaries,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def run_load_test(
+    base_url: str,
+    mode: str,
+    clients: int,
+    duration: float,
+    trace: Optional[List[TraceRequest]] = None,
+    session_prefix: str = "load",
+) -> Dict[str, Any]:
+    """对已启动的服务器运行一次压测，返回聚合结果和服务端CPU"""
+    if mode == "trace" and not trace:
+        raise ValueError("trace mode needs a non-empty trace")
+    start_at = time.time() + 1.0
+    stop_at = start_at + duration
+    perf_before = _fetch_perf(base_url)
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        if mode == "trace":
+            assert trace is not None
+            jobs = [(base_url, f"{session_prefix}-{index}", start_at, stop_at, trace) for index in range(clients)]
+            client_results: List[Dict[str, Any]] = pool.map(_trace_client, jobs)
+        else:
+            controller_jobs = [(base_url, f"{session_prefix}-{index}", start_at, stop_at) for index in range(clients)]
+            client_results = pool.map(_controller_client, controller_jobs)
+    perf_after = _fetch_perf(base_url)
+    result = aggregate(client_results, duration)
+    if perf_before is not None and perf_after is not None and perf_before.get("pid") == perf_after.get("pid"):
+        cpu_seconds = perf_after["process_cpu_seconds"] - perf_before["process_cpu_seconds"]
+        elapsed = max(r["elapsed"] for r in client_results)
+        result["server"] = {
+            "pid": perf_after["pid"],
+            "cpu_seconds": cpu_seconds,
+            "cpu_utilization": cpu_seconds / elapsed if elapsed > 0 else 0.0,
+            "cpu_ms_per_request": cpu_seconds / result["requests"] * 1e3 if result["requests"] else 0.0,
+        }
+    else:
+        result["server"] = None
+    return result
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """与基线结果逐项比较，返回文本行"""
+    lines = [f"{'metric':<24}{'baseline':>12}{'current':>12}{'change':>10}"]
+    pairs = [
+        ("rps", current["results"]["rps"], baseline["results"]["rps"]),
+        ("steps_per_s", current["results"]["steps_per_s"], baseline["results"]["steps_per_s"]),
+        ("error_rate", current["results"]["error_rate"], baseline["results"]["error_rate"]),
+    ]
+    for key in ("p50_ms", "p90_ms", "p99_ms"):
+        pairs.append((f"latency {key}", current["results"]["latency"][key], baseline["results"]["latency"][key]))
+    if current["results"]["server"] and baseline["results"]["server"]:
+        pairs.append(
+            (
+                "server cpu ms/request",
+                current["results"]["server"]["cpu_ms_per_request"],
+                baseline["results"]["server"]["cpu_ms_per_request"],
+            )
+        )
+    for name, value, base in pairs:
+        change = f"{(value - base) / base * 100:+.1f}%" if base else "n/a"
+        lines.append(f"{name:<24}{base:>12.3f}{value:>12.3f}{change:>10}")
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the simulation API with concurrent clients")
+    parser.add_argument("--mode", choices=["controller", "trace"], default="controller", help="Client type")
+    parser.add_argument("--trace", help="Trace file to replay in trace mode")
+    parser.add_argument("--record-trace", help="Record one headless controller run to this file and exit")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent clients (one process and session each)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--server-url", help="Existing server to load; by default a local server is started")
+    parser.add_argument("--backend", choices=["flask", "stdlib"], default="stdlib", help="Backend of the local server")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes of the local server")
+    parser.add_argument("--json", dest="json_path", help="Write the full report to this JSON file")
+    parser.add_argument("--baseline", help="Report from an earlier run to compare against")
+    args = parser.parse_args()
+
+    process: Optional[subprocess.Popen] = None
+    base_url = args.server_url
+    if base_url is None:
+        port = free_port()
+        process = start_server(
+            args.backend, port, extra_args=["--workers", str(args.workers)] if args.workers > 1 else []
+        )
+        base_url = f"http://127.0.0.1:{port}"
+    try:
+        if args.record_trace:
+            count = record_trace(base_url, args.record_trace, args.duration)
+            print(f"Recorded {count} requests to {args.record_trace}")
+            return
+        trace = load_trace(args.trace) if args.mode == "trace" and args.trace else None
+        if args.mode == "trace" and trace is None:
+            parser.error("--mode trace requires --trace")
+        results = run_load_test(base_url, args.mode, args.clients, args.duration, trace)
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    report = {
+        "config": {
+            "mode": args.mode,
+            "trace": os.path.basename(args.trace) if args.trace else None,
+            "clients": args.clients,
+            "duration": args.duration,
+            "server_url": args.server_url,
+            "backend": None if args.server_url else args.backend,
+            "workers": None if args.server_url else args.workers,
+        },
+        "environment": {
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    print(f"{'route':<40}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+    for label, route in results["routes"].items():
+        print(
+            f"{label:<40}{route['requests']:>10}{route['errors']:>8}{route['rps']:>10.0f}"
+            f"{route['p50_ms']:>10.2f}{route['p90_ms']:>10.2f}{route['p99_ms']:>10.2f}"
+        )
+    latency = results["latency"]
+    print(
+        f"{'total':<40}{results['requests']:>10}{results['errors']:>8}{results['rps']:>10.0f}"
+        f"{latency['p50_ms']:>10.2f}{latency['p90_ms']:>10.2f}{latency['p99_ms']:>10.2f}"
+    )
+    print(f"steps/s: {results['steps_per_s']:.0f}  error rate: {results['error_rate'] * 100:.2f}%")
+    if results["server"] is not None:
+        server = results["server"]
+        print(
+            f"server cpu: {server['cpu_seconds']:.2f} s ({server['cpu_utilization'] * 100:.0f}% of one core, "
+            f"{server['cpu_ms_per_request']:.3f} ms/request)"
+        )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            print("\n".join(compare(report, json.load(f))))
+
+
+if __name__ == "__main__":
+    main()
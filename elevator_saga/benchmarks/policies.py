@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Fixed dispatch policies for simulator benchmarks
+直接操作 ElevatorSimulation 的确定性调度策略，不经过HTTP，用于模拟器基准测试
+
+策略只依赖事件和模拟器状态，相同的流量总是产生相同的命令序列，
+因此不同提交之间的基准结果可以直接比较。
+"""
+from typing import Dict, List, Optional, Set, Type
+
+from elevator_saga.core.models import Direction, EventType, SimulationEvent
+from elevator_saga.server.simulator import ElevatorSimulation
+
+
+class BenchmarkPolicy:
+    """基准测试策略基类"""
+
+    name = "base"
+
+    def on_init(self, sim: ElevatorSimulation) -> None:
+        """流量加载后、第一个tick之前调用"""
+        pass
+
+    def on_events(self, sim: ElevatorSimulation, events: List[SimulationEvent]) -> None:
+        """每次步进后调用，events 为这次步进产生的事件"""
+        pass
+
+
+class BusPolicy(BenchmarkPolicy):
+    """
+    公交式调度：与 ElevatorBusExampleController 相同，
+    电梯在底层和顶层之间逐层往返，每层都停
+    """
+
+    name = "bus"
+
+    def on_init(self, sim: ElevatorSimulation) -> None:
+        floors = len(sim.floors)
+        for elevator in sim.elevators:
+            sim.elevator_go_to_floor(elevator.id, (elevator.id * (floors - 1)) // len(sim.elevators), immediate=True)
+
+    def on_events(self, sim: ElevatorSimulation, events: List[SimulationEvent]) -> None:
+        top = len(sim.floors) - 1
+        for event in events:
+            if event.type == EventType.IDLE:
+                sim.elevator_go_to_floor(event.data["elevator"], 1)
+            elif event.type == EventType.STOPPED_AT_FLOOR:
+                elevator = sim.elevators[event.data["elevator"]]
+                floor = elevator.current_floor
+                if elevator.last_tick_direction == Direction.UP:
+                    sim.elevator_go_to_floor(elevator.id, floor - 1 if floor == top else floor + 1)
+                elif elevator.last_tick_direction == Direction.DOWN:
+                    sim.elevator_go_to_floor(elevator.id, floor + 1 if floor == 0 else floor - 1)
+
+
+class NearestCallPolicy(BenchmarkPolicy):
+    """
+    就近调度：载客时前往最近的乘客目的地，空载时前往最近的、尚未被其他电梯认领的有人等待的楼层
+    """
+
+    name = "nearest"
+
+    def __init__(self) -> None:
+        # 电梯id -> 认领的呼叫楼层
+        self.claimed: Dict[int, int] = {}
+
+    def on_init(self, sim: ElevatorSimulation) -> None:
+        self.claimed = {}
+
+    def _choose_target(self, sim: ElevatorSimulation, elevator_id: int) -> Optional[int]:
+        elevator = sim.elevators[elevator_id]
+        current = elevator.current_floor
+        self.claimed.pop(elevator_id, None)
+        if elevator.passengers:
+            destinations = {sim.passengers[pid].destination for pid in elevator.passengers}
+            return min(destinations, key=lambda floor: (abs(floor - current), floor))
+        taken: Set[int] = set(self.claimed.values())
+        best: Optional[int] = None
+        for floor_state in sim.floors:
+            if floor_state.has_waiting_passengers and floor_state.floor not in taken:
+                if best is None or abs(floor_state.floor - current) < abs(best - current):
+                    best = floor_state.floor
+        if best is None:
+            return None
+        self.claimed[elevator_id] = best
+        if best != current:
+            return best
+        # 已在呼叫楼层：朝等待乘客的方向出发，出发时按方向上客
+        if sim.floors[current].up_queue and current < len(sim.floors) - 1:
+            return current + 1
+        return current - 1 if current > 0 else current + 1
+
+    def on_events(self, sim: ElevatorSimulation, events: List[SimulationEvent]) -> None:
+        for event in events:
+            if event.type in (EventType.IDLE, EventType.STOPPED_AT_FLOOR):
+                target = self._choose_target(sim, event.data["elevator"])
+                if target is not None:
+                    sim.elevator_go_to_floor(event.data["elevator"], target)
+
+
+POLICIES: Dict[str, Type[BenchmarkPolicy]] = {policy.name: policy for policy in (BusPolicy, NearestCallPolicy)}
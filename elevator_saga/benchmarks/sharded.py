@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Sharded server scaling benchmark
+对不同worker数的分片服务器，用多个客户端进程（每个进程一个会话）持续步进，测量总tick吞吐量
+
+    python -m elevator_saga.benchmarks.sharded --workers 1,2,4,8 --sessions 16 --duration 5
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import time
+from typing import Any, Dict, List, Tuple
+
+from elevator_saga.benchmarks.http_backends import free_port, start_server
+
+_STEP_BODY = json.dumps({"ticks": 1}).encode("utf-8")
+
+
+def _session_worker(args: Tuple[int, str, float, float]) -> int:
+    """单个会话：持续步进，到达流量最大tick时重置；返回在计时窗口内完成的tick数"""
+    port, session_id, start_at, stop_at = args
+    headers = {"Content-Type": "application/json", "X-Session-Id": session_id}
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+
+    def post(path: str, body: bytes) -> Dict[str, Any]:
+        connection.request("POST", path, body=body, headers=headers)
+        data: Dict[str, Any] = json.loads(connection.getresponse().read())
+        return data
+
+    max_tick = int(post("/api/reset", b"{}")["traffic"]["max_tick"])
+    while time.time() < start_at:
+        time.sleep(0.001)
+    ticks = 0
+    while time.time() < stop_at:
+        tick = post("/api/step", _STEP_BODY)["tick"]
+        ticks += 1
+        if tick >= max_tick:
+            post("/api/reset", b"{}")
+    connection.close()
+    return ticks
+
+
+def run_scaling(workers: int, sessions: int, duration: float) -> Dict[str, Any]:
+    """启动指定worker数的服务器并测量总tick吞吐量"""
+    port = free_port()
+    extra_args = ["--workers", str(workers)] if workers > 1 else []
+    process = start_server("stdlib", port, extra_args=extra_args)
+    try:
+        start_at = time.time() + 1.0
+        jobs = [(port, f"bench-{index}", start_at, start_at + duration) for index in range(sessions)]
+        with multiprocessing.get_context("spawn").Pool(sessions) as pool:
+            ticks: List[int] = pool.map(_session_worker, jobs)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    total = sum(ticks)
+    return {"workers": workers, "sessions": sessions, "ticks": total, "ticks_per_s": total / duration}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure aggregate tick throughput of the sharded server")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts to compare")
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent sessions (one client process each)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of load per configuration")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    results = [run_scaling(int(w), args.sessions, args.duration) for w in args.workers.split(",")]
+    baseline = results[0]["ticks_per_s"] or 1.0
+    print(f"{'workers':>8}{'sessions':>10}{'ticks/s':>12}{'speedup':>10}")
+    for r in results:
+        print(f"{r['workers']:>8}{r['sessions']:>10}{r['ticks_per_s']:>12.0f}{r['ticks_per_s'] / baseline:>9.2f}x")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"duration": args.duration, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+ElevatorSimulation microbenchmark
+不经过HTTP，直接在进程内驱动 ElevatorSimulation，按建筑规模测量：
+
+- step：每秒tick数、每秒事件数（只计模拟器时间，不含策略）
+- get_state：构造状态响应（含指标计算）和JSON序列化各自的耗时
+- _calculate_metrics：单独的指标计算耗时
+- 每个乘客占用的内存（tracemalloc，单独运行一次以免影响计时）
+
+规模包括 BUILDING_SCALES 中 small/medium/large 的上限配置，以及 50/100/200 层的合成高层建筑。
+xlarge/mega 为全天办公流量（office_day）的高层压力规模，单次运行需要数秒到数十秒，只在 --cases 指定时运行。
+流量由固定种子生成，调度使用 benchmarks.policies 中的固定策略，结果可以跨提交比较：
+
+    python -m elevator_saga.benchmarks.simulator --json baseline.json
+    python -m elevator_saga.benchmarks.simulator --cases large,tower100 --policies nearest --compare baseline.json
+    python -m elevator_saga.benchmarks.simulator --cases xlarge,mega --repeats 1 --no-memory
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from elevator_saga.benchmarks.policies import POLICIES, BenchmarkPolicy
+from elevator_saga.server.simulator import ElevatorSimulation, encode_json
+from elevator_saga.traffic.generators import BUILDING_SCALES, generate_office_day_traffic
+
+# 结果格式版本，比较时只比较相同版本的结果
+RESULT_FORMAT_VERSION = 1
+
+
+@dataclass
+class BenchmarkCase:
+    """一个基准规模：建筑参数和乘客数"""
+
+    name: str
+    floors: int
+    elevators: int
+    capacity: int
+    passengers: int
+    duration: int
+
+
+def _scale_case(scale: str) -> BenchmarkCase:
+    """BUILDING_SCALES 中某个规模的上限配置"""
+    config: Dict[str, Any] = BUILDING_SCALES[scale]
+    return BenchmarkCase(
+        name=scale,
+        floors=config["floors"][1],
+        elevators=config["elevators"][1],
+        capacity=config["capacity"][1],
+        passengers=config["max_people"][1],
+        duration=config["duration_range"][1],
+    )
+
+
+CASES: Dict[str, BenchmarkCase] = {
+    **{scale: _scale_case(scale) for scale in ("small", "medium", "large")},
+    "tower50": BenchmarkCase("tower50", floors=50, elevators=8, capacity=20, passengers=1500, duration=3000),
+    "tower100": BenchmarkCase("tower100", floors=100, elevators=12, capacity=20, passengers=3000, duration=4000),
+    "tower200": BenchmarkCase("tower200", floors=200, elevators=16, capacity=25, passengers=6000, duration=6000),
+}
+
+# 使用全天办公流量的高层压力规模，耗时较长，不在默认运行的规模中
+STRESS_CASES: Tuple[str, ...] = ("xlarge", "mega")
+DEFAULT_CASES: List[str] = list(CASES)
+CASES.update({scale: _scale_case(scale) for scale in STRESS_CASES})
+
+
+def synthetic_traffic(case: BenchmarkCase, seed: int) -> List[Dict[str, Any]]:
+    """
+    生成确定性的混合流量：40%从大厅上行，20%下行回大厅，40%楼层间随机；
+    到达时间均匀分布在前80%的时长内
+    """
+    rng = random.Random(seed)
+    last_tick = max(1, int(case.duration * 0.8))
+    top = case.floors - 1
+    traffic = []
+    for passenger_id in range(1, case.passengers + 1):
+        roll = rng.random()
+        if roll < 0.4:
+            origin, destination = 0, rng.randint(1, top)
+        elif roll < 0.6:
+            origin, destination = rng.randint(1, top), 0
+        else:
+            origin = rng.randint(0, top)
+            destination = rng.randint(0, top - 1)
+            if destination >= origin:
+                destination += 1
+        traffic.append(
+            {"id": passenger_id, "origin": origin, "destination": destination, "tick": rng.randrange(last_tick)}
+        )
+    traffic.sort(key=lambda entry: (entry["tick"], entry["id"]))
+    return traffic
+
+
+def build_payload(case: BenchmarkCase, seed: int) -> Dict[str, Any]:
+    """构造与流量文件格式相同的内存数据"""
+    return {
+        "building": {
+            "floors": case.floors,
+            "elevators": case.elevators,
+            "elevator_capacity": case.capacity,
+            "scenario": "benchmark",
+            "scale": case.name,
+            "duration": case.duration,
+        },
+        "traffic": (
+            generate_office_day_traffic(case.floors, case.duration, case.passengers, seed)
+            if case.name in STRESS_CASES
+            else synthetic_traffic(case, seed)
+        ),
+    }
+
+
+def _run(payload: Dict[str, Any], policy: BenchmarkPolicy) -> Tuple[ElevatorSimulation, int, int, int]:
+    """完整运行一次，返回 (模拟器, step耗时ns, tick数, 事件数)"""
+    sim = ElevatorSimulation.from_traffic_data(payload)
+    policy.on_init(sim)
+    clock = time.perf_counter_ns
+    step_ns = 0
+    events = 0
+    while sim.tick < sim.max_duration_ticks:
+        start = clock()
+        tick_events = sim.step(1)
+        step_ns += clock() - start
+        events += len(tick_events)
+        policy.on_events(sim, tick_events)
+    return sim, step_ns, sim.tick, events
+
+
+def _time_repeated(func: Any, repeats: int) -> float:
+    """重复调用取最小耗时（毫秒）"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        func()
+        best = min(best, time.perf_counter_ns() - start)
+    return best / 1e6
+
+
+def measure_memory(payload: Dict[str, Any], policy_name: str) -> Dict[str, float]:
+    """在 tracemalloc 下完整运行一次，返回运行结束时模拟器占用的内存"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        sim, _, _, _ = _run(payload, POLICIES[policy_name]())
+        current, peak = tracemalloc.get_traced_memory()
+        passengers = len(sim.passengers) or 1
+        retained = current - baseline
+        del sim
+    finally:
+        tracemalloc.stop()
+    return {
+        "retained_bytes": retained,
+        "peak_bytes": peak - baseline,
+        "bytes_per_passenger": retained / passengers,
+    }
+
+
+def run_case(
+    case: BenchmarkCase, policy_name: str, seed: int, repeats: int = 3, state_repeats: int = 20, memory: bool = True
+) -> Dict[str, Any]:
+    """对一个规模和策略运行基准，step 取 repeats 次中最快的一次"""
+    payload = build_payload(case, seed)
+    best_step_ns = 0
+    sim: Optional[ElevatorSimulation] = None
+    ticks = events = 0
+    for _ in range(repeats):
+        gc.collect()
+        sim, step_ns, ticks, events = _run(payload, POLICIES[policy_name]())
+        if best_step_ns == 0 or step_ns < best_step_ns:
+            best_step_ns = step_ns
+    assert sim is not None
+    # 运行结束时的状态最大（所有乘客和事件都在），作为状态接口的最坏情况
+    state = sim.get_state()
+    metrics = sim._calculate_metrics()
+    result: Dict[str, Any] = {
+        "case": asdict(case),
+        "policy": policy_name,
+        "seed": seed,
+        "ticks": ticks,
+        "events": events,
+        "passengers": len(sim.passengers),
+        "completed_passengers": metrics.completed_passengers,
+        "average_arrival_wait_time": metrics.average_arrival_wait_time,
+        "step": {
+            "total_ms": best_step_ns / 1e6,
+            "ticks_per_s": ticks / (best_step_ns / 1e9) if best_step_ns else 0.0,
+            "events_per_s": events / (best_step_ns / 1e9) if best_step_ns else 0.0,
+            "us_per_tick": best_step_ns / ticks / 1e3 if ticks else 0.0,
+        },
+        "get_state": {
+            "build_ms": _time_repeated(sim.get_state, state_repeats),
+            "serialize_ms": _time_repeated(lambda: encode_json(state), state_repeats),
+            "payload_bytes": len(encode_json(state)),
+        },
+        "calculate_metrics": {"ms": _time_repeated(sim._calculate_metrics, state_repeats)},
+    }
+    if memory:
+        result["memory"] = measure_memory(payload, policy_name)
+    return result
+
+
+def _environment() -> Dict[str, Any]:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()}
+
+
+# 比较时关注的指标：(路径, 数值越大越好)
+COMPARED_METRICS: Tuple[Tuple[str, bool], ...] = (
+    ("step.ticks_per_s", True),
+    ("step.events_per_s", True),
+    ("get_state.build_ms", False),
+    ("get_state.serialize_ms", False),
+    ("calculate_metrics.ms", False),
+    ("memory.bytes_per_passenger", False),
+)
+
+
+def _lookup(result: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = result
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return float(value)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> Tuple[List[str], int]:
+    """
+    与基线逐项比较，返回 (文本行, 退化项数)
+
+    变化超过 threshold（比例）且方向变差的指标记为退化。
+    """
+    if baseline.get("version") != current.get("version"):
+        raise ValueError(f"Baseline format version {baseline.get('version')} != {current.get('version')}")
+    baseline_results = {(r["case"]["name"], r["policy"]): r for r in baseline["results"]}
+    lines = [f"{'case':<12}{'policy':<10}{'metric':<28}{'baseline':>14}{'current':>14}{'change':>10}"]
+    regressions = 0
+    for result in current["results"]:
+        key = (result["case"]["name"], result["policy"])
+        base = baseline_results.get(key)
+        if base is None:
+            lines.append(f"{key[0]:<12}{key[1]:<10}(not in baseline)")
+            continue
+        if base["case"] != result["case"] or base["seed"] != result["seed"]:
+            lines.append(f"{key[0]:<12}{key[1]:<10}(case or seed differs from baseline, skipped)")
+            continue
+        for path, higher_is_better in COMPARED_METRICS:
+            value, base_value = _lookup(result, path), _lookup(base, path)
+            if value is None or base_value is None:
+                continue
+            change = (value - base_value) / base_value if base_value else 0.0
+            worse = change < -threshold if higher_is_better else change > threshold
+            regressions += worse
+            lines.append(
+                f"{key[0]:<12}{key[1]:<10}{path:<28}{base_value:>14.3f}{value:>14.3f}{change * 100:>+9.1f}%"
+                f"{'  REGRESSION' if worse else ''}"
+            )
+    return lines, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ElevatorSimulation across building scales")
+    parser.add_argument(
+        "--cases",
+        default=",".join(DEFAULT_CASES),
+        help=f"Comma-separated cases ({', '.join(CASES)}; {', '.join(STRESS_CASES)} only when listed)",
+    )
+    parser.add_argument(
+        "--policies", default=",".join(POLICIES), help=f"Comma-separated policies ({', '.join(POLICIES)})"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Traffic seed")
+    parser.add_argument("--repeats", type=int, default=3, help="Full runs per case; the fastest is reported")
+    parser.add_argument("--state-repeats", type=int, default=20, help="Repeats for get_state and metrics timings")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    cases = [CASES[name.strip()] for name in args.cases.split(",")]
+    policies = [name.strip() for name in args.policies.split(",")]
+    for policy in policies:
+        if policy not in POLICIES:
+            parser.error(f"Unknown policy: {policy}")
+
+    results = []
+    print(
+        f"{'case':<12}{'policy':<10}{'ticks/s':>10}{'events/s':>12}{'state ms':>10}{'json ms':>10}{'metrics ms':>12}{'B/pass':>10}"
+    )
+    for case in cases:
+        for policy in policies:
+            r = run_case(case, policy, args.seed, args.repeats, args.state_repeats, not args.no_memory)
+            results.append(r)
+            memory = r.get("memory", {}).get("bytes_per_passenger", 0.0)
+            print(
+                f"{case.name:<12}{policy:<10}{r['step']['ticks_per_s']:>10.0f}{r['step']['events_per_s']:>12.0f}"
+                f"{r['get_state']['build_ms']:>10.2f}{r['get_state']['serialize_ms']:>10.2f}"
+                f"{r['calculate_metrics']['ms']:>12.3f}{memory:>10.0f}"
+            )
+    report = {"version": RESULT_FORMAT_VERSION, "environment": _environment(), "results": results}
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            lines, regressions = compare(report, json.load(f), args.threshold)
+        print("\n".join(lines))
+        if regressions:
+            print(f"{regressions} metric(s) regressed by more than {args.threshold * 100:.0f}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Time-window sharded evaluation
+把一次长时间运行（如全天流量）切成时间窗口，在多个进程中并行运行 benchmarks.policies 中的策略，
+再把各窗口的结果拼接成整次运行的近似指标
+
+每个窗口只计入到达tick落在 (score_start, score_end] 内的乘客，每个乘客恰好属于一个窗口。
+窗口的模拟范围比计分范围更宽：
+
+- 预热（warmup）：从 score_start - warmup 开始模拟一个空建筑（"drained" 热启动），
+  预热期间到达的乘客让队列和电梯位置接近串行运行在 score_start 时的状态，但不计分
+- 检查点（"checkpoint" 热启动）：从串行运行在 score_start 保存的状态（乘客、电梯、策略）继续，不需要预热；
+  检查点由同一策略生成时，窗口内的模拟与串行运行完全相同
+- 收尾（tail）：计分结束后再模拟 tail 个tick（后续乘客照常到达），让计分乘客完成行程；
+  收尾结束时仍未完成的计分乘客与串行运行结束时一样按当前tick强制完成，记为 unsettled
+
+    python -m elevator_saga.benchmarks.windowed office_day.elvt --policy nearest --window 3600 --workers 8
+    python -m elevator_saga.benchmarks.windowed office_day.elvt --write-checkpoints ckpt --window 3600
+    python -m elevator_saga.benchmarks.windowed office_day.elvt --warm-start checkpoint --checkpoint-dir ckpt --verify
+"""
+import argparse
+import json
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from elevator_saga.benchmarks.policies import POLICIES, BenchmarkPolicy
+from elevator_saga.core.models import PassengerInfo, PerformanceMetrics
+from elevator_saga.server.simulator import ElevatorSimulation, calculate_passenger_metrics
+from elevator_saga.traffic.source import ArrayTrafficSource, open_traffic_source
+
+PathLike = Union[str, Path]
+
+WARM_STARTS = ("drained", "checkpoint")
+
+# 默认窗口长度、预热和收尾（tick）
+DEFAULT_WINDOW = 3600
+DEFAULT_WARMUP = 900
+DEFAULT_TAIL = 900
+
+
+@dataclass
+class TimeWindow:
+    """一个窗口：模拟 (start, end]，计分到达tick在 (score_start, score_end] 内的乘客"""
+
+    index: int
+    start: int
+    score_start: int
+    score_end: int
+    end: int
+
+
+@dataclass
+class WindowResult:
+    """一个窗口的计分乘客和诊断信息"""
+
+    window: TimeWindow
+    passengers: List[PassengerInfo]
+    # 热启动后、计分开始时建筑中尚未完成的乘客数
+    backlog_at_start: int
+    # 收尾结束时仍未完成、被强制完成的计分乘客数
+    unsettled: int
+    seconds: float
+
+
+@dataclass
+class WindowedEvaluation:
+    """拼接后的整次运行指标"""
+
+    metrics: PerformanceMetrics
+    windows: List[WindowResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def unsettled(self) -> int:
+        return sum(result.unsettled for result in self.windows)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "metrics": self.metrics.to_dict(),
+            "seconds": self.seconds,
+            "unsettled": self.unsettled,
+            "windows": [
+                {
+                    **asdict(result.window),
+                    "passengers": len(result.passengers),
+                    "backlog_at_start": result.backlog_at_start,
+                    "unsettled": result.unsettled,
+                    "seconds": result.seconds,
+                }
+                for result in self.windows
+            ],
+        }
+
+
+def plan_windows(duration: int, window: int, warmup: int = 0, tail: int = 0) -> List[TimeWindow]:
+    """把 (0, duration] 切成长 window 的计分窗口，模拟范围向前扩展 warmup、向后扩展 tail（不超出整次运行）"""
+    if window <= 0:
+        raise ValueError("window must be positive")
+    return [
+        TimeWindow(
+            index,
+            max(0, score_start - warmup),
+            score_start,
+            min(duration, score_start + window),
+            min(duration, score_start + window + tail),
+        )
+        for index, score_start in enumerate(range(0, duration, window))
+    ]
+
+
+def arrival_cursor(ticks: np.ndarray, tick: int) -> int:
+    """模拟推进到 tick 时已经到达的乘客数（第 tick 个tick处理到达tick <= tick 的乘客，tick 0 时尚无到达）"""
+    return int(np.searchsorted(ticks, tick, side="right")) if tick > 0 else 0
+
+
+@lru_cache(maxsize=2)
+def _load_traffic(path: str) -> ArrayTrafficSource:
+    """每个进程只解析一次流量文件"""
+    return open_traffic_source(path)
+
+
+def _run_until(sim: ElevatorSimulation, policy: BenchmarkPolicy, end: int) -> None:
+    while sim.tick < end:
+        events = sim.step(1)
+        policy.on_events(sim, events)
+        # 事件只交给策略，不需要保留；长时间运行时事件列表会占用大量内存
+        sim.state.events.clear()
+
+
+def _checkpoint_path(checkpoint_dir: PathLike, tick: int) -> Path:
+    return Path(checkpoint_dir) / f"checkpoint_{tick}.pkl"
+
+
+def _unfinished(passengers: Dict[int, PassengerInfo]) -> int:
+    return sum(passenger.dropoff_tick == 0 for passenger in passengers.values())
+
+
+def run_window(
+    path: PathLike,
+    policy_name: str,
+    window: TimeWindow,
+    warm_start: str = "drained",
+    checkpoint_dir: Optional[PathLike] = None,
+) -> WindowResult:
+    """运行一个窗口，返回计分乘客（未完成的按收尾结束时的tick强制完成）"""
+    started = time.perf_counter()
+    full = _load_traffic(str(path))
+    building = dict(full.building)
+    if warm_start == "checkpoint":
+        if checkpoint_dir is None:
+            raise ValueError("checkpoint warm start requires a checkpoint directory")
+        with open(_checkpoint_path(checkpoint_dir, window.score_start), "rb") as f:
+            checkpoint = pickle.load(f)
+        start = window.score_start
+    elif warm_start == "drained":
+        checkpoint = None
+        start = window.start
+    else:
+        raise ValueError(f"unknown warm start {warm_start!r}, expected one of {WARM_STARTS}")
+
+    lo, hi = arrival_cursor(full.ticks, start), arrival_cursor(full.ticks, window.end)
+    source = ArrayTrafficSource(
+        building, full.ticks[lo:hi], full.origins[lo:hi], full.destinations[lo:hi], first_id=lo + 1
+    )
+    sim = ElevatorSimulation(None)
+    sim.load_traffic_source(source)
+    if checkpoint is not None:
+        sim.state = checkpoint["state"]
+        policy: BenchmarkPolicy = checkpoint["policy"]
+    else:
+        sim.state.tick = start
+        policy = POLICIES[policy_name]()
+        policy.on_init(sim)
+
+    _run_until(sim, policy, window.score_start)
+    backlog = _unfinished(sim.passengers)
+    _run_until(sim, policy, window.end)
+
+    score_lo, score_hi = arrival_cursor(full.ticks, window.score_start), arrival_cursor(full.ticks, window.score_end)
+    scored = [sim.passengers[passenger_id] for passenger_id in range(score_lo + 1, score_hi + 1)]
+    unsettled = 0
+    for passenger in scored:
+        if passenger.dropoff_tick == 0:
+            unsettled += 1
+            passenger.dropoff_tick = sim.tick
+            if passenger.pickup_tick == 0:
+                passenger.pickup_tick = sim.tick
+    return WindowResult(window, scored, backlog, unsettled, time.perf_counter() - started)
+
+
+def _run_window_task(task: Tuple[str, str, TimeWindow, str, Optional[str]]) -> WindowResult:
+    return run_window(*task)
+
+
+def stitch_windows(results: List[WindowResult]) -> PerformanceMetrics:
+    """把各窗口的计分乘客合在一起，按与模拟器相同的方式计算指标"""
+    return calculate_passenger_metrics([passenger for result in results for passenger in result.passengers])
+
+
+def evaluate_windowed(
+    path: PathLike,
+    policy_name: str = "nearest",
+    window: int = DEFAULT_WINDOW,
+    warmup: int = DEFAULT_WARMUP,
+    tail: int = DEFAULT_TAIL,
+    warm_start: str = "drained",
+    checkpoint_dir: Optional[PathLike] = None,
+    workers: Optional[int] = None,
+) -> WindowedEvaluation:
+    """并行运行所有窗口并拼接指标；workers 为1时在当前进程中顺序运行"""
+    started = time.perf_counter()
+    duration = int(_load_traffic(str(path)).building["duration"])
+    windows = plan_windows(duration, window, 0 if warm_start == "checkpoint" else warmup, tail)
+    tasks = [
+        (str(path), policy_name, item, warm_start, None if checkpoint_dir is None else str(checkpoint_dir))
+        for item in windows
+    ]
+    if workers == 1 or len(tasks) <= 1:
+        results = [_run_window_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run_window_task, tasks))
+    return WindowedEvaluation(stitch_windows(results), results, time.perf_counter() - started)
+
+
+def run_serial(
+    path: PathLike,
+    policy_name: str = "nearest",
+    checkpoint_dir: Optional[PathLike] = None,
+    checkpoint_every: int = DEFAULT_WINDOW,
+) -> Tuple[PerformanceMetrics, float]:
+    """
+    完整串行运行一次，返回 (指标, 秒数)
+
+    checkpoint_dir 不为 None 时，每 checkpoint_every 个tick保存一次检查点（模拟器状态和策略，pickle格式，
+    只应加载自己生成的文件），供 warm_start="checkpoint" 使用
+    """
+    started = time.perf_counter()
+    source = _load_traffic(str(path))
+    sim = ElevatorSimulation(None)
+    sim.load_traffic_source(
+        ArrayTrafficSource(dict(source.building), source.ticks, source.origins, source.destinations)
+    )
+    policy = POLICIES[policy_name]()
+    policy.on_init(sim)
+    if checkpoint_dir is not None:
+        Path(checkpoint_dir).mkdir(parents=True, exist_ok=True)
+    for tick in range(0, sim.max_duration_ticks, checkpoint_every):
+        _run_until(sim, policy, tick)
+        if checkpoint_dir is not None:
+            with open(_checkpoint_path(checkpoint_dir, tick), "wb") as f:
+                pickle.dump({"state": sim.state, "policy": policy}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    _run_until(sim, policy, sim.max_duration_ticks)
+    return sim._calculate_metrics(), time.perf_counter() - started
+
+
+def relative_errors(approx: PerformanceMetrics, exact: PerformanceMetrics) -> Dict[str, float]:
+    """各项等待时间指标相对串行结果的误差"""
+    errors = {}
+    for name in (
+        "average_floor_wait_time",
+        "p95_floor_wait_time",
+        "average_arrival_wait_time",
+        "p95_arrival_wait_time",
+    ):
+        reference = getattr(exact, name)
+        errors[name] = (getattr(approx, name) - reference) / reference if reference else 0.0
+    return errors
+
+
+def main() -> None:
+    """命令行接口：分时段并行评估一个流量文件，可选与串行运行对比"""
+    parser = argparse.ArgumentParser(description="Evaluate a long traffic file in parallel time windows")
+    parser.add_argument("traffic", help="Traffic file (.json or .elvt)")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="nearest")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Scored window length in ticks")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="Warm-up ticks before each window")
+    parser.add_argument("--tail", type=int, default=DEFAULT_TAIL, help="Ticks simulated after each window")
+    parser.add_argument("--warm-start", choices=WARM_STARTS, default="drained")
+    parser.add_argument("--checkpoint-dir", default=None, help="Checkpoints written by --write-checkpoints")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument(
+        "--write-checkpoints", metavar="DIR", default=None, help="Run serially and save a checkpoint every window"
+    )
+    parser.add_argument("--verify", action="store_true", help="Also run serially and report relative errors")
+    parser.add_argument("--json", default=None, help="Write the result to this JSON file")
+    args = parser.parse_args()
+
+    if args.write_checkpoints:
+        metrics, seconds = run_serial(args.traffic, args.policy, args.write_checkpoints, args.window)
+        print(f"Serial run: {seconds:.1f}s, checkpoints in {args.write_checkpoints}")
+        print(metrics)
+        return
+    if args.warm_start == "checkpoint" and not args.checkpoint_dir:
+        parser.error("--warm-start checkpoint requires --checkpoint-dir")
+
+    evaluation = evaluate_windowed(
+        args.traffic,
+        args.policy,
+        args.window,
+        args.warmup,
+        args.tail,
+        args.warm_start,
+        args.checkpoint_dir,
+        args.workers,
+    )
+    print(f"{'window':>7}{'ticks':>16}{'passengers':>12}{'backlog':>9}{'unsettled':>11}{'seconds':>9}")
+    for result in evaluation.windows:
+        w = result.window
+        print(
+            f"{w.index:>7}{f'{w.score_start}-{w.score_end}':>16}{len(result.passengers):>12}"
+            f"{result.backlog_at_start:>9}{result.unsettled:>11}{result.seconds:>9.1f}"
+        )
+    print(f"Windowed ({args.warm_start}): {evaluation.seconds:.1f}s")
+    print(evaluation.metrics)
+    if evaluation.unsettled:
+        print(
+            f"{evaluation.unsettled} scored passengers did not finish within the tail; increase --tail", file=sys.stderr
+        )
+
+    report = evaluation.to_dict()
+    if args.verify:
+        metrics, seconds = run_serial(args.traffic, args.policy)
+        errors = relative_errors(evaluation.metrics, metrics)
+        print(f"Serial: {seconds:.1f}s")
+        print(metrics)
+        for name, error in errors.items():
+            print(f"  {name}: {error:+.2%}")
+        report["serial"] = {"metrics": metrics.to_dict(), "seconds": seconds, "relative_errors": errors}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
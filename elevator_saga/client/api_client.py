@@ -4,12 +4,16 @@ Unified API Client for Elevator Saga
 使用统一数据模型的客户端API封装
 """
 import json
+import time
 import urllib.error
 import urllib.request
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional
 
+from elevator_saga.client.profiler import LoopProfiler
 from elevator_saga.core.models import (
+    SESSION_HEADER,
     ElevatorState,
+    EventType,
     FloorState,
     GoToFloorCommand,
     PassengerInfo,
@@ -21,16 +25,99 @@ from elevator_saga.core.models import (
 from elevator_saga.utils.debug import debug_log
 
 
+def parse_state_response(response_data: Dict[str, Any]) -> SimulationState:
+    """将 /api/state 的响应数据转换为SimulationState"""
+    # 直接使用服务端返回的真实数据创建SimulationState
+    elevators = [ElevatorState.from_dict(e) for e in response_data.get("elevators", [])]
+    floors = [FloorState.from_dict(f) for f in response_data.get("floors", [])]
+
+    # 使用服务端返回的passengers和metrics数据
+    passengers_data = response_data.get("passengers", {})
+    if isinstance(passengers_data, dict) and "completed" in passengers_data:
+        # 如果是PassengerSummary格式，则创建空的passengers字典
+        passengers: Dict[int, PassengerInfo] = {}
+    else:
+        # 如果是真实的passengers数据，则转换
+        passengers = {int(k): PassengerInfo.from_dict(v) for k, v in passengers_data.items() if isinstance(v, dict)}
+
+    # 使用服务端返回的metrics数据
+    metrics_data = response_data.get("metrics", {})
+    if metrics_data:
+        # 直接从字典创建PerformanceMetrics对象
+        metrics = PerformanceMetrics.from_dict(metrics_data)
+    else:
+        metrics = PerformanceMetrics()
+
+    return SimulationState(
+        tick=response_data.get("tick", 0),
+        elevators=elevators,
+        floors=floors,
+        passengers=passengers,
+        metrics=metrics,
+        events=[],
+    )
+
+
+def parse_step_response(response_data: Dict[str, Any]) -> StepResponse:
+    """将 /api/step 的响应数据转换为StepResponse"""
+    # 使用服务端返回的真实数据
+    events_data = response_data.get("events", [])
+    events = []
+    for event_data in events_data:
+        # 手动转换type字段从字符串到EventType枚举
+        event_dict = event_data.copy()
+        if "type" in event_dict and isinstance(event_dict["type"], str):
+            # 尝试将字符串转换为EventType枚举
+            try:
+                event_dict["type"] = EventType(event_dict["type"])
+            except ValueError:
+                debug_log("Unknown event type: %s", event_dict["type"])
+                continue
+        events.append(SimulationEvent.from_dict(event_dict))
+
+    return StepResponse(
+        success=True,
+        tick=response_data.get("tick", 0),
+        events=events,
+    )
+
+
+def step_request_payload(ticks: int, until_events: Optional[Iterable[EventType]] = None) -> Dict[str, Any]:
+    """构造 /api/step 的请求体"""
+    payload: Dict[str, Any] = {"ticks": ticks}
+    if until_events is not None:
+        payload["until_events"] = sorted(event_type.value for event_type in until_events)
+    return payload
+
+
+def reset_request_payload(traffic: Any = None, building: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """构造 /api/reset 的请求体，NumPy数组转换为列表"""
+    payload: Dict[str, Any] = {}
+    if isinstance(traffic, dict):
+        traffic = {key: value.tolist() if hasattr(value, "tolist") else value for key, value in traffic.items()}
+    if traffic is not None:
+        payload["traffic"] = traffic
+    if building is not None:
+        payload["building"] = building
+    return payload
+
+
 class ElevatorAPIClient:
     """统一的电梯API客户端"""
 
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, session_id: Optional[str] = None):
         self.base_url = base_url.rstrip("/")
+        # 会话id通过请求头发送，服务端为每个会话维护独立的模拟器
+        self.session_id = session_id
+        self._headers: Dict[str, str] = {SESSION_HEADER: session_id} if session_id else {}
         # 缓存相关字段
         self._cached_state: Optional[SimulationState] = None
         self._cached_tick: int = -1
         self._tick_processed: bool = False  # 标记当前tick是否已处理完成
-        debug_log(f"API Client initialized for {self.base_url}")
+        self._cached_traffic_info: Optional[Dict[str, Any]] = None
+        # 可选的分阶段计时器，由控制器在开启profile时设置
+        self.profiler: Optional[LoopProfiler] = None
+        debug_log("API Client initialized for %s", self.base_url)
 
     def get_state(self, force_reload: bool = False) -> SimulationState:
         """获取模拟状态
@@ -43,39 +130,15 @@ class ElevatorAPIClient:
             return self._cached_state
 
         # debug_log(f"Fetching new state (force_reload={force_reload}, tick_processed={self._tick_processed})")
+        start_ns = time.perf_counter_ns() if self.profiler is not None else 0
         response_data = self._send_get_request("/api/state")
         if "error" not in response_data:
-            # 直接使用服务端返回的真实数据创建SimulationState
-            elevators = [ElevatorState.from_dict(e) for e in response_data.get("elevators", [])]
-            floors = [FloorState.from_dict(f) for f in response_data.get("floors", [])]
-
-            # 使用服务端返回的passengers和metrics数据
-            passengers_data = response_data.get("passengers", {})
-            if isinstance(passengers_data, dict) and "completed" in passengers_data:
-                # 如果是PassengerSummary格式，则创建空的passengers字典
-                passengers: Dict[int, PassengerInfo] = {}
-            else:
-                # 如果是真实的passengers数据，则转换
-                passengers = {
-                    int(k): PassengerInfo.from_dict(v) for k, v in passengers_data.items() if isinstance(v, dict)
-                }
-
-            # 使用服务端返回的metrics数据
-            metrics_data = response_data.get("metrics", {})
-            if metrics_data:
-                # 直接从字典创建PerformanceMetrics对象
-                metrics = PerformanceMetrics.from_dict(metrics_data)
-            else:
-                metrics = PerformanceMetrics()
-
-            simulation_state = SimulationState(
-                tick=response_data.get("tick", 0),
-                elevators=elevators,
-                floors=floors,
-                passengers=passengers,
-                metrics=metrics,
-                events=[],
-            )
+            parse_start_ns = time.perf_counter_ns() if self.profiler is not None else 0
+            simulation_state = parse_state_response(response_data)
+            if self.profiler is not None:
+                end_ns = time.perf_counter_ns()
+                self.profiler.record("parse", end_ns - parse_start_ns)
+                self.profiler.record("get_state", end_ns - start_ns)
 
             # 更新缓存
             self._cached_state = simulation_state
@@ -90,35 +153,24 @@ class ElevatorAPIClient:
         """标记当前tick处理完成，使缓存在下次get_state时失效"""
         self._tick_processed = True
 
-    def step(self, ticks: int = 1) -> StepResponse:
-        """执行步进"""
-        response_data = self._send_post_request("/api/step", {"ticks": ticks})
+    def step(self, ticks: int = 1, until_events: Optional[Iterable[EventType]] = None) -> StepResponse:
+        """执行步进
+
+        Args:
+            ticks: 推进的tick数；指定until_events时为最多推进的tick数
+            until_events: 服务端推进到第一个包含这些类型事件的tick为止
+        """
+        start_ns = time.perf_counter_ns() if self.profiler is not None else 0
+        response_data = self._send_post_request("/api/step", step_request_payload(ticks, until_events))
 
         if "error" not in response_data:
-            # 使用服务端返回的真实数据
-            events_data = response_data.get("events", [])
-            events = []
-            for event_data in events_data:
-                # 手动转换type字段从字符串到EventType枚举
-                event_dict = event_data.copy()
-                if "type" in event_dict and isinstance(event_dict["type"], str):
-                    # 尝试将字符串转换为EventType枚举
-                    try:
-                        from elevator_saga.core.models import EventType
-
-                        event_dict["type"] = EventType(event_dict["type"])
-                    except ValueError:
-                        debug_log(f"Unknown event type: {event_dict['type']}")
-                        continue
-                events.append(SimulationEvent.from_dict(event_dict))
-
-            step_response = StepResponse(
-                success=True,
-                tick=response_data.get("tick", 0),
-                events=events,
-            )
-
-            # debug_log(f"Step response: tick={step_response.tick}, events={len(events)}")
+            parse_start_ns = time.perf_counter_ns() if self.profiler is not None else 0
+            step_response = parse_step_response(response_data)
+            if self.profiler is not None:
+                end_ns = time.perf_counter_ns()
+                self.profiler.record("parse", end_ns - parse_start_ns)
+                self.profiler.record("step", end_ns - start_ns)
+            # debug_log(f"Step response: tick={step_response.tick}, events={len(step_response.events)}")
             return step_response
         else:
             raise RuntimeError(f"Step failed: {response_data.get('error')}")
@@ -127,10 +179,16 @@ class ElevatorAPIClient:
         """发送电梯命令"""
         endpoint = self._get_elevator_endpoint(command)
         debug_log(
-            f"Sending elevator command: {command.command_type} to elevator {command.elevator_id} To:F{command.floor}"
+            "Sending elevator command: %s to elevator %d To:F%d",
+            command.command_type,
+            command.elevator_id,
+            command.floor,
         )
 
+        start_ns = time.perf_counter_ns() if self.profiler is not None else 0
         response_data = self._send_post_request(endpoint, command.parameters)
+        if self.profiler is not None:
+            self.profiler.record("command", time.perf_counter_ns() - start_ns)
 
         if response_data.get("success"):
             return bool(response_data["success"])
@@ -145,7 +203,7 @@ class ElevatorAPIClient:
             response = self.send_elevator_command(command)
             return response
         except Exception as e:
-            debug_log(f"Go to floor failed: {e}")
+            debug_log("Go to floor failed: %s", e)
             return False
 
     def _get_elevator_endpoint(self, command: GoToFloorCommand) -> str:
@@ -161,27 +219,31 @@ class ElevatorAPIClient:
         # debug_log(f"GET {url}")
 
         try:
-            with urllib.request.urlopen(url, timeout=60) as response:
-                data: Dict[str, Any] = json.loads(response.read().decode("utf-8"))
+            start_ns = time.perf_counter_ns() if self.profiler is not None else 0
+            with urllib.request.urlopen(urllib.request.Request(url, headers=self._headers), timeout=60) as response:
+                body = response.read()
                 # debug_log(f"GET {url} -> {response.status}")
-                return data
+            return self._decode_body(body, start_ns)
         except urllib.error.URLError as e:
             raise RuntimeError(f"GET {url} failed: {e}")
 
-    def reset(self) -> bool:
-        """重置模拟"""
+    def reset(self, traffic: Any = None, building: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        重置模拟
+
+        traffic 为流量目录中的文件名时切换到该文件；为列式数组、条目列表或生成器参数时
+        与 building 一起在服务器内存中创建新的模拟（见 traffic.source.inline_traffic_source）
+        """
         try:
-            response_data = self._send_post_request("/api/reset", {})
+            response_data = self._send_post_request("/api/reset", reset_request_payload(traffic, building))
             success = bool(response_data.get("success", False))
             if success:
-                # 清空缓存，因为状态已重置
-                self._cached_state = None
-                self._cached_tick = -1
-                self._tick_processed = False
-                debug_log("Cache cleared after reset")
+                # 响应中已包含重置后的初始状态，直接更新缓存
+                self._apply_round_response(response_data)
+                debug_log("Cache updated after reset")
             return success
         except Exception as e:
-            debug_log(f"Reset failed: {e}")
+            debug_log("Reset failed: %s", e)
             return False
 
     def next_traffic_round(self, full_reset: bool = False) -> bool:
@@ -190,27 +252,44 @@ class ElevatorAPIClient:
             response_data = self._send_post_request("/api/traffic/next", {"full_reset": full_reset})
             success = bool(response_data.get("success", False))
             if success:
-                # 清空缓存，因为流量文件已切换，状态会改变
-                self._cached_state = None
-                self._cached_tick = -1
-                self._tick_processed = False
-                debug_log("Cache cleared after traffic round switch")
+                # 响应中已包含新流量的初始状态和最大tick，直接更新缓存
+                self._apply_round_response(response_data)
+                debug_log("Cache updated after traffic round switch")
             return success
         except Exception as e:
-            debug_log(f"Next traffic round failed: {e}")
+            debug_log("Next traffic round failed: %s", e)
             return False
 
-    def get_traffic_info(self) -> Optional[Dict[str, Any]]:
-        """获取当前流量文件信息"""
+    def _apply_round_response(self, response_data: Dict[str, Any]) -> None:
+        """使用重置/切换流量响应中的初始状态和流量信息更新缓存"""
+        state_data = response_data.get("state")
+        if state_data:
+            self._cached_state = parse_state_response(state_data)
+            self._cached_tick = self._cached_state.tick
+        else:
+            self._cached_state = None
+            self._cached_tick = -1
+        self._tick_processed = False
+        self._cached_traffic_info = response_data.get("traffic")
+
+    def get_traffic_info(self, force_reload: bool = False) -> Optional[Dict[str, Any]]:
+        """获取当前流量文件信息
+
+        Args:
+            force_reload: 是否强制重新请求，忽略重置/切换流量时缓存的信息
+        """
+        if not force_reload and self._cached_traffic_info is not None:
+            return self._cached_traffic_info
         try:
             response_data = self._send_get_request("/api/traffic/info")
             if "error" not in response_data:
+                self._cached_traffic_info = response_data
                 return response_data
             else:
-                debug_log(f"Get traffic info failed: {response_data.get('error')}")
+                debug_log("Get traffic info failed: %s", response_data.get("error"))
                 return None
         except Exception as e:
-            debug_log(f"Get traffic info failed: {e}")
+            debug_log("Get traffic info failed: %s", e)
             return None
 
     def _send_post_request(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -220,12 +299,26 @@ class ElevatorAPIClient:
 
         # debug_log(f"POST {url} with data: {data}")
 
-        req = urllib.request.Request(url, data=request_body, headers={"Content-Type": "application/json"})
+        req = urllib.request.Request(
+            url, data=request_body, headers={"Content-Type": "application/json", **self._headers}
+        )
 
         try:
+            start_ns = time.perf_counter_ns() if self.profiler is not None else 0
             with urllib.request.urlopen(req, timeout=600) as response:
-                response_data: Dict[str, Any] = json.loads(response.read().decode("utf-8"))
+                body = response.read()
                 # debug_log(f"POST {url} -> {response.status}")
-                return response_data
+            return self._decode_body(body, start_ns)
         except urllib.error.URLError as e:
             raise RuntimeError(f"POST {url} failed: {e}")
+
+    def _decode_body(self, body: bytes, start_ns: int) -> Dict[str, Any]:
+        """解析JSON响应体；开启profile时分别记录网络往返和解码耗时"""
+        if self.profiler is None:
+            data: Dict[str, Any] = json.loads(body.decode("utf-8"))
+            return data
+        decode_start_ns = time.perf_counter_ns()
+        self.profiler.record("http", decode_start_ns - start_ns)
+        data = json.loads(body.decode("utf-8"))
+        self.profiler.record("decode", time.perf_counter_ns() - decode_start_ns)
+        return data
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Asyncio API Client for Elevator Saga
+基于asyncio streams的异步客户端，复用HTTP/1.1长连接，支持并发发送命令
+"""
+import asyncio
+import json
+import time
+import urllib.parse
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from elevator_saga.client.api_client import (
+    parse_state_response,
+    parse_step_response,
+    reset_request_payload,
+    step_request_payload,
+)
+from elevator_saga.client.profiler import LoopProfiler
+from elevator_saga.core.models import SESSION_HEADER, EventType, GoToFloorCommand, SimulationState, StepResponse
+from elevator_saga.utils.debug import debug_log
+
+_Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncElevatorAPIClient:
+    """异步电梯API客户端
+
+    与 ElevatorAPIClient 提供相同的接口（协程版本）。连接在请求之间保持并复用，
+    同一事件循环中的多个客户端/控制器可以共享一个线程并发运行。
+    """
+
+    def __init__(
+        self, base_url: str, max_connections: int = 8, timeout: float = 600.0, session_id: Optional[str] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.session_id = session_id
+        self._session_header = f"{SESSION_HEADER}: {session_id}\r\n" if session_id else ""
+        parsed = urllib.parse.urlsplit(self.base_url)
+        if parsed.scheme not in ("", "http"):
+            raise ValueError(f"Unsupported URL scheme: {parsed.scheme}")
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 80
+        self._path_prefix = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self.max_connections = max_connections
+        # 空闲的keep-alive连接池
+        self._idle_connections: List[_Connection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # 最近一次重置/切换流量响应中带回的初始状态和流量信息
+        self.round_state: Optional[SimulationState] = None
+        self.round_traffic_info: Optional[Dict[str, Any]] = None
+        # 可选的分阶段计时器，由控制器在开启profile时设置
+        self.profiler: Optional[LoopProfiler] = None
+        debug_log("Async API Client initialized for %s", self.base_url)
+
+    async def get_state(self) -> SimulationState:
+        """获取模拟状态"""
+        response_data = await self._request("GET", "/api/state")
+        if "error" not in response_data:
+            return parse_state_response(response_data)
+        raise RuntimeError(f"Failed to get state: {response_data.get('error')}")
+
+    async def step(self, ticks: int = 1, until_events: Optional[Iterable[EventType]] = None) -> StepResponse:
+        """执行步进，参数含义同 ElevatorAPIClient.step"""
+        response_data = await self._request("POST", "/api/step", step_request_payload(ticks, until_events))
+        if "error" not in response_data:
+            return parse_step_response(response_data)
+        raise RuntimeError(f"Step failed: {response_data.get('error')}")
+
+    async def send_elevator_command(self, command: GoToFloorCommand) -> bool:
+        """发送电梯命令"""
+        endpoint = f"/api/elevators/{command.elevator_id}/{command.command_type}"
+        debug_log(
+            "Sending elevator command: %s to elevator %d To:F%d",
+            command.command_type,
+            command.elevator_id,
+            command.floor,
+        )
+        response_data = await self._request("POST", endpoint, command.parameters)
+        if response_data.get("success"):
+            return bool(response_data["success"])
+        raise RuntimeError(f"Command failed: {response_data.get('error_message')}")
+
+    async def go_to_floor(self, elevator_id: int, floor: int, immediate: bool = False) -> bool:
+        """电梯前往指定楼层"""
+        command = GoToFloorCommand(elevator_id=elevator_id, floor=floor, immediate=immediate)
+        try:
+            return await self.send_elevator_command(command)
+        except Exception as e:
+            debug_log("Go to floor failed: %s", e)
+            return False
+
+    async def send_commands(self, commands: List[GoToFloorCommand]) -> List[bool]:
+        """并发发送一批命令
+
+        不同电梯的命令并发发送；同一电梯的命令按原顺序依次发送，
+        保证服务端看到的目标楼层与同步客户端一致。返回值与commands一一对应。
+        """
+        results: List[bool] = [False] * len(commands)
+        chains: Dict[int, List[int]] = {}
+        for index, command in enumerate(commands):
+            chains.setdefault(command.elevator_id, []).append(index)
+
+        async def run_chain(indices: List[int]) -> None:
+            for index in indices:
+                command = commands[index]
+                results[index] = await self.go_to_floor(command.elevator_id, command.floor, command.immediate)
+
+        await asyncio.gather(*(run_chain(indices) for indices in chains.values()))
+        return results
+
+    async def reset(self, traffic: Any = None, building: Optional[Dict[str, Any]] = None) -> bool:
+        """重置模拟，参数与 ElevatorAPIClient.reset 相同"""
+        try:
+            response_data = await self._request("POST", "/api/reset", reset_request_payload(traffic, building))
+            success = bool(response_data.get("success", False))
+            if success:
+                self._apply_round_response(response_data)
+            return success
+        except Exception as e:
+            debug_log("Reset failed: %s", e)
+            return False
+
+    async def next_traffic_round(self, full_reset: bool = False) -> bool:
+        """切换到下一个流量文件"""
+        try:
+            response_data = await self._request("POST", "/api/traffic/next", {"full_reset": full_reset})
+            success = bool(response_data.get("success", False))
+            if success:
+                self._apply_round_response(response_data)
+            return success
+        except Exception as e:
+            debug_log("Next traffic round failed: %s", e)
+            return False
+
+    def _apply_round_response(self, response_data: Dict[str, Any]) -> None:
+        """保存重置/切换流量响应中的初始状态和流量信息"""
+        state_data = response_data.get("state")
+        self.round_state = parse_state_response(state_data) if state_data else None
+        self.round_traffic_info = response_data.get("traffic")
+
+    async def get_traffic_info(self) -> Optional[Dict[str, Any]]:
+        """获取当前流量文件信息"""
+        try:
+            response_data = await self._request("GET", "/api/traffic/info")
+            if "error" not in response_data:
+                return response_data
+            debug_log("Get traffic info failed: %s", response_data.get("error"))
+            return None
+        except Exception as e:
+            debug_log("Get traffic info failed: %s", e)
+            return None
+
+    async def close(self) -> None:
+        """关闭所有空闲连接"""
+        connections, self._idle_connections = self._idle_connections, []
+        for _, writer in connections:
+            writer.close()
+        for _, writer in connections:
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def __aenter__(self) -> "AsyncElevatorAPIClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def _request(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """发送请求并解析JSON响应，连接被服务端关闭时在新连接上重试一次"""
+        url = f"{self.base_url}{endpoint}"
+        body = json.dumps(data).encode("utf-8") if data is not None else b""
+        head = (
+            f"{method} {self._path_prefix}{endpoint} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Connection: keep-alive\r\n"
+            "Accept: application/json\r\n"
+            "Content-Type: application/json\r\n"
+            f"{self._session_header}"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode("latin-1")
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        async with self._semaphore:
+            for attempt in range(2):
+                reused = bool(self._idle_connections)
+                try:
+                    reader, writer = self._idle_connections.pop() if reused else await self._open_connection()
+                except OSError as e:
+                    raise RuntimeError(f"{method} {url} failed: {e}")
+                start_ns = time.perf_counter_ns() if self.profiler is not None else 0
+                try:
+                    writer.write(head + body)
+                    await writer.drain()
+                    status, keep_alive, payload = await asyncio.wait_for(self._read_response(reader), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, OSError) as e:
+                    writer.close()
+                    if reused and attempt == 0:
+                        # 复用的长连接可能已被服务端关闭，换新连接重试
+                        continue
+                    raise RuntimeError(f"{method} {url} failed: {e}")
+
+                if keep_alive:
+                    self._idle_connections.append((reader, writer))
+                else:
+                    writer.close()
+                if status >= 400:
+                    raise RuntimeError(f"{method} {url} failed: HTTP {status} {payload[:200]!r}")
+                if self.profiler is None:
+                    response_data: Dict[str, Any] = json.loads(payload.decode("utf-8"))
+                    return response_data
+                decode_start_ns = time.perf_counter_ns()
+                self.profiler.record("http", decode_start_ns - start_ns)
+                response_data = json.loads(payload.decode("utf-8"))
+                self.profiler.record("decode", time.perf_counter_ns() - decode_start_ns)
+                return response_data
+        raise RuntimeError(f"{method} {url} failed: connection closed")
+
+    async def _open_connection(self) -> _Connection:
+        return await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, bool, bytes]:
+        """读取一个HTTP响应，返回(状态码, 连接是否可复用, 响应体)"""
+        header_block = await reader.readuntil(b"\r\n\r\n")
+        lines = header_block.decode("latin-1").split("\r\n")
+        version, status_text = lines[0].split(" ", 2)[:2]
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks: List[bytes] = []
+            while True:
+                size_line = await reader.readuntil(b"\r\n")
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+                if size == 0:
+                    await reader.readuntil(b"\r\n")
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            payload = b"".join(chunks)
+        elif "content-length" in headers:
+            payload = await reader.readexactly(int(headers["content-length"]))
+        else:
+            # 没有长度信息，只能读到连接关闭
+            payload = await reader.read()
+            keep_alive = False
+        return int(status_text), keep_alive, payload
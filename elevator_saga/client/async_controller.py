@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Async Elevator Controller Base Class
+异步电梯调度控制器基类 - 多个控制器可以在同一个事件循环中并发运行
+"""
+import asyncio
+import time
+from pprint import pprint
+from typing import Any, Awaitable, List, Optional, TypeVar
+
+from elevator_saga.client.api_client import ElevatorAPIClient
+from elevator_saga.client.async_api_client import AsyncElevatorAPIClient
+from elevator_saga.client.base_controller import ElevatorController
+from elevator_saga.core.models import GoToFloorCommand, SimulationState
+from elevator_saga.utils.debug import debug_log
+
+T = TypeVar("T")
+
+
+class _SnapshotAPIClient(ElevatorAPIClient):
+    """
+    供代理对象使用的同步视图
+
+    get_state 返回当前tick的状态快照，go_to_floor 只把命令放入缓冲区，
+    由异步控制器在回调结束后统一并发发送
+    """
+
+    def __init__(self, base_url: str):
+        super().__init__(base_url)
+        self.pending_commands: List[GoToFloorCommand] = []
+
+    def set_state(self, state: SimulationState) -> None:
+        """更新当前tick的状态快照"""
+        self._cached_state = state
+        self._cached_tick = state.tick
+
+    def get_state(self, force_reload: bool = False) -> SimulationState:
+        if self._cached_state is None:
+            raise RuntimeError("State snapshot is not available yet")
+        return self._cached_state
+
+    def go_to_floor(self, elevator_id: int, floor: int, immediate: bool = False) -> bool:
+        self.pending_commands.append(GoToFloorCommand(elevator_id=elevator_id, floor=floor, immediate=immediate))
+        return True
+
+    def take_pending_commands(self) -> List[GoToFloorCommand]:
+        """取出并清空缓冲的命令"""
+        commands, self.pending_commands = self.pending_commands, []
+        return commands
+
+
+class AsyncElevatorController(ElevatorController):
+    """
+    异步电梯调度控制器基类
+
+    回调接口与 ElevatorController 完全相同，用户算法无需修改即可切换。
+    区别在于主循环使用 await 等待 step/state 请求，回调中发出的命令在每个tick结束时并发发送：
+
+        async def main():
+            await asyncio.gather(MyController(url1).run(), MyController(url2).run())
+    """
+
+    def __init__(
+        self,
+        server_url: str = "http://127.0.0.1:8000",
+        debug: bool = False,
+        profile: bool = False,
+        max_connections: int = 8,
+        session_id: Optional[str] = None,
+    ):
+        """
+        初始化控制器
+
+        Args:
+            server_url: 服务器URL
+            debug: 是否启用debug模式
+            profile: 是否统计主循环各阶段耗时
+            max_connections: 与服务器之间的最大并发连接数
+            session_id: 服务端会话id
+        """
+        super().__init__(server_url, debug, profile, session_id)
+        self.async_client = AsyncElevatorAPIClient(server_url, max_connections=max_connections, session_id=session_id)
+        self.async_client.profiler = self.profiler
+        # 代理对象通过快照视图读取状态、缓冲命令
+        self.api_client: _SnapshotAPIClient = _SnapshotAPIClient(server_url)
+
+    def start(self) -> None:
+        """
+        启动控制器（阻塞直到模拟结束）
+        """
+        asyncio.run(self.run())
+
+    async def run(self) -> None:
+        """
+        在当前事件循环中运行控制器
+        """
+        self.on_start()
+        self.is_running = True
+        self._until_events = self.resolve_handled_events() if self.step_until_event else None
+
+        try:
+            await self._run_event_driven_simulation_async()
+        except asyncio.CancelledError:
+            print("\n算法运行被取消")
+            raise
+        except Exception as e:
+            print(f"算法运行出错: {e}")
+            raise
+        finally:
+            self.is_running = False
+            await self.async_client.close()
+            if self.profiler is not None:
+                print(self.profiler.summary(f"{self.__class__.__name__} loop profile"))
+            self.on_stop()
+
+    async def _run_event_driven_simulation_async(self) -> None:
+        """运行事件驱动的模拟"""
+        # 获取初始状态并初始化，默认从0开始
+        state = await self._take_round_state()
+        if state.tick > 0:
+            print("模拟器可能已经开始了一次模拟，执行重置...")
+            await self.async_client.reset()
+            return await self._run_event_driven_simulation_async()
+        self._apply_state(state, init=True)
+
+        # 获取当前流量文件的最大tick数
+        await self._update_traffic_info_async()
+        if self.current_traffic_max_tick == 0:
+            print("模拟器接收到的最大tick时间为0，可能所有的测试案例已用完，请求重置...")
+            if not await self.async_client.next_traffic_round(full_reset=True):
+                print("没有可用的流量文件，停止模拟")
+                return
+            return await self._run_event_driven_simulation_async()
+
+        self._internal_init(self.elevators, self.floors)
+        await self._flush_commands()
+        while self.is_running:
+            # 检查是否达到最大tick数
+            if self.current_tick >= self.current_traffic_max_tick:
+                break
+
+            tick_start_ns = time.perf_counter_ns() if self.profiler is not None else 0
+            # 执行一个tick的模拟（步进直到事件模式下可能推进多个tick）
+            step_response = await self._timed("step", self.async_client.step(*self._next_step_args()))
+            self.current_tick = step_response.tick
+            events = step_response.events
+
+            # 获取当前状态，本tick内所有回调看到同一个快照
+            state = await self._timed("get_state", self.async_client.get_state())
+            self._apply_state(state)
+
+            self._call_hook(
+                "callback.on_event_execute_start",
+                self.on_event_execute_start,
+                self.current_tick,
+                events,
+                self.elevators,
+                self.floors,
+            )
+            self._dispatch_events(state, events)
+            self._call_hook(
+                "callback.on_event_execute_end",
+                self.on_event_execute_end,
+                self.current_tick,
+                events,
+                self.elevators,
+                self.floors,
+            )
+
+            # 并发发送本tick回调中产生的命令
+            await self._flush_commands()
+            if self.profiler is not None:
+                self.profiler.record("tick", time.perf_counter_ns() - tick_start_ns)
+
+            # 检查是否需要切换流量文件
+            if self.current_tick >= self.current_traffic_max_tick:
+                pprint(state.metrics.to_dict())
+                if not await self.async_client.next_traffic_round():
+                    break
+                await self._reinit_after_round_switch()
+
+    def _apply_state(self, state: SimulationState, init: bool = False) -> None:
+        """更新快照并刷新代理对象"""
+        self.api_client.set_state(state)
+        self._update_wrappers(state, init=init)
+
+    async def _flush_commands(self) -> None:
+        """发送缓冲的命令"""
+        commands = self.api_client.take_pending_commands()
+        if commands:
+            await self._timed("command", self.async_client.send_commands(commands))
+
+    async def _timed(self, phase: str, awaitable: Awaitable[T]) -> T:
+        """等待协程完成，开启profile时记录耗时"""
+        if self.profiler is None:
+            return await awaitable
+        start_ns = time.perf_counter_ns()
+        try:
+            return await awaitable
+        finally:
+            self.profiler.record(phase, time.perf_counter_ns() - start_ns)
+
+    async def _take_round_state(self) -> SimulationState:
+        """优先使用重置/切换流量响应中带回的初始状态，没有时再请求"""
+        state = self.async_client.round_state
+        self.async_client.round_state = None
+        return state if state is not None else await self.async_client.get_state()
+
+    async def _update_traffic_info_async(self) -> None:
+        """更新当前流量文件信息"""
+        traffic_info = self.async_client.round_traffic_info
+        self.async_client.round_traffic_info = None
+        if traffic_info is None:
+            traffic_info = await self.async_client.get_traffic_info()
+        if traffic_info:
+            self.current_traffic_max_tick = int(traffic_info["max_tick"])
+            debug_log("Updated traffic info - max_tick: %d", self.current_traffic_max_tick)
+        else:
+            debug_log("Failed to get traffic info")
+            self.current_traffic_max_tick = 0
+
+    async def _reinit_after_round_switch(self) -> None:
+        """切换流量文件后重新初始化"""
+        self.current_tick = 0
+        state = await self._take_round_state()
+        self._apply_state(state, init=True)
+        await self._update_traffic_info_async()
+        self._internal_init(self.elevators, self.floors)
+        await self._flush_commands()
+
+
+async def run_controllers(controllers: List[AsyncElevatorController], return_exceptions: bool = False) -> List[Any]:
+    """在同一个事件循环中并发运行多个控制器"""
+    return list(await asyncio.gather(*(c.run() for c in controllers), return_exceptions=return_exceptions))
@@ -3,19 +3,51 @@
 Elevator Controller Base Class
 电梯调度基础控制器类 - 提供面向对象的算法开发接口
 """
+import dis
 import os
 import time
 from abc import ABC, abstractmethod
 from pprint import pprint
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from elevator_saga.client.api_client import ElevatorAPIClient
+from elevator_saga.client.profiler import LoopProfiler
 from elevator_saga.client.proxy_models import ProxyElevator, ProxyFloor, ProxyPassenger
+from elevator_saga.client.tick_batch import TickBatch, build_tick_batch
 from elevator_saga.core.models import EventType, SimulationEvent, SimulationState
 
 # 避免循环导入，使用运行时导入
 from elevator_saga.utils.debug import debug_log
 
+# 事件回调与其处理的事件类型
+EVENT_HOOKS: Dict[str, Tuple[EventType, ...]] = {
+    "on_passenger_call": (EventType.UP_BUTTON_PRESSED, EventType.DOWN_BUTTON_PRESSED),
+    "on_elevator_idle": (EventType.IDLE,),
+    "on_elevator_stopped": (EventType.STOPPED_AT_FLOOR,),
+    "on_passenger_board": (EventType.PASSENGER_BOARD,),
+    "on_passenger_alight": (EventType.PASSENGER_ALIGHT,),
+    "on_elevator_passing_floor": (EventType.PASSING_FLOOR,),
+    "on_elevator_approaching": (EventType.ELEVATOR_APPROACHING,),
+}
+# profile中事件回调的阶段名
+_HOOK_PHASES: Dict[EventType, str] = {
+    event_type: f"callback.{hook_name}" for hook_name, event_types in EVENT_HOOKS.items() for event_type in event_types
+}
+
+
+def _is_empty_hook(func: Any) -> bool:
+    """判断回调是否为空实现（函数体只有 pass / 文档字符串 / ...）"""
+    code = getattr(func, "__code__", None)
+    if code is None:
+        return False
+    for instruction in dis.get_instructions(code):
+        if instruction.opname in ("RESUME", "NOP", "CACHE", "RETURN_VALUE"):
+            continue
+        if instruction.opname in ("LOAD_CONST", "RETURN_CONST") and instruction.argval is None:
+            continue
+        return False
+    return True
+
 
 class ElevatorController(ABC):
     """
@@ -24,13 +56,31 @@ class ElevatorController(ABC):
     用户通过继承此类并实现 abstract 方法来创建自己的调度算法
     """
 
-    def __init__(self, server_url: str = "http://127.0.0.1:8000", debug: bool = False):
+    # 步进直到事件模式：服务端一次请求推进多个tick，直到出现控制器关心的事件或到达截止tick。
+    # 此模式下 on_event_execute_start/end 每个请求调用一次，收到的是这段时间内的全部事件
+    step_until_event: bool = False
+    # 控制器关心的事件类型，为None时根据非空实现的 on_* 回调推导
+    handled_events: Optional[Set[EventType]] = None
+    # 单次步进最多推进的tick数，为None时只受当前流量的最大tick限制
+    max_ticks_per_step: Optional[int] = None
+    # 是否逐个事件调用 on_* 回调；只使用 on_tick_batch 的向量化控制器可以关闭
+    dispatch_single_events: bool = True
+
+    def __init__(
+        self,
+        server_url: str = "http://127.0.0.1:8000",
+        debug: bool = False,
+        profile: bool = False,
+        session_id: Optional[str] = None,
+    ):
         """
         初始化控制器
 
         Args:
             server_url: 服务器URL
             debug: 是否启用debug模式
+            profile: 是否统计主循环各阶段耗时，结束时打印摘要（见 get_profile）
+            session_id: 服务端会话id，多个控制器共享一个服务器时各自使用独立的模拟
         """
         self.server_url = server_url
         self.debug = debug
@@ -39,9 +89,13 @@ class ElevatorController(ABC):
         self.current_tick = 0
         self.is_running = False
         self.current_traffic_max_tick: int = 0
+        self._until_events: Optional[Set[EventType]] = None
 
         # 初始化API客户端
-        self.api_client = ElevatorAPIClient(server_url)
+        self.session_id = session_id
+        self.api_client = ElevatorAPIClient(server_url, session_id)
+        self.profiler: Optional[LoopProfiler] = LoopProfiler() if profile else None
+        self.api_client.profiler = self.profiler
 
     @abstractmethod
     def on_init(self, elevators: List[Any], floors: List[Any]) -> None:
@@ -171,6 +225,19 @@ class ElevatorController(ABC):
         """
         pass
 
+    def on_tick_batch(self, tick: int, batch: TickBatch) -> None:
+        """
+        批量事件回调 - 可选实现
+
+        在 on_event_execute_start 之后、逐个事件回调之前调用，
+        一次性提供本tick按类型分组的事件数组以及电梯/楼层状态的NumPy数组
+
+        Args:
+            tick: 当前时间tick
+            batch: 本tick的批量数据
+        """
+        pass
+
     def _internal_init(self, elevators: List[Any], floors: List[Any]) -> None:
         """内部初始化方法"""
         self.elevators = elevators
@@ -178,7 +245,7 @@ class ElevatorController(ABC):
         self.current_tick = 0
 
         # 调用用户的初始化方法
-        self.on_init(elevators, floors)
+        self._call_hook("callback.on_init", self.on_init, elevators, floors)
 
     def start(self) -> None:
         """
@@ -186,6 +253,7 @@ class ElevatorController(ABC):
         """
         self.on_start()
         self.is_running = True
+        self._until_events = self.resolve_handled_events() if self.step_until_event else None
 
         try:
             self._run_event_driven_simulation()
@@ -196,8 +264,26 @@ class ElevatorController(ABC):
             raise
         finally:
             self.is_running = False
+            if self.profiler is not None:
+                print(self.profiler.summary(f"{self.__class__.__name__} loop profile"))
             self.on_stop()
 
+    def get_profile(self) -> Optional[Dict[str, Any]]:
+        """获取主循环分阶段耗时统计，未开启profile时返回None"""
+        return self.profiler.to_dict() if self.profiler is not None else None
+
+    def _call_hook(self, phase: str, hook: Callable[..., None], *args: Any) -> None:
+        """调用用户回调，开启profile时记录耗时"""
+        profiler = self.profiler
+        if profiler is None:
+            hook(*args)
+            return
+        start_ns = time.perf_counter_ns()
+        try:
+            hook(*args)
+        finally:
+            profiler.record(phase, time.perf_counter_ns() - start_ns)
+
     def stop(self) -> None:
         """停止控制器"""
         self.is_running = False
@@ -223,8 +309,8 @@ class ElevatorController(ABC):
                 os._exit(1)
             if state.tick > 0:
                 print("模拟器可能已经开始了一次模拟，执行重置...")
+                # 重置是同步操作，响应中已带回新的初始状态，无需等待
                 self.api_client.reset()
-                time.sleep(0.3)
                 return self._run_event_driven_simulation()
             self._update_wrappers(state, init=True)
 
@@ -232,8 +318,9 @@ class ElevatorController(ABC):
             self._update_traffic_info()
             if self.current_traffic_max_tick == 0:
                 print("模拟器接收到的最大tick时间为0，可能所有的测试案例已用完，请求重置...")
-                self.api_client.next_traffic_round(full_reset=True)
-                time.sleep(0.3)
+                if not self.api_client.next_traffic_round(full_reset=True):
+                    print("没有可用的流量文件，停止模拟")
+                    return
                 return self._run_event_driven_simulation()
             # if self.current_tick >= self.current_traffic_max_tick:
             #     return
@@ -245,8 +332,9 @@ class ElevatorController(ABC):
                 if self.current_tick >= self.current_traffic_max_tick:
                     break
 
+                tick_start_ns = time.perf_counter_ns() if self.profiler is not None else 0
                 # 执行一个tick的模拟，从1开始
-                step_response = self.api_client.step(1)
+                step_response = self.api_client.step(*self._next_step_args())
                 # 更新当前状态
                 self.current_tick = step_response.tick
                 # 获取事件列表
@@ -257,21 +345,35 @@ class ElevatorController(ABC):
                 self._update_wrappers(state)
 
                 # 事件执行前回调
-                self.on_event_execute_start(self.current_tick, events, self.elevators, self.floors)
+                self._call_hook(
+                    "callback.on_event_execute_start",
+                    self.on_event_execute_start,
+                    self.current_tick,
+                    events,
+                    self.elevators,
+                    self.floors,
+                )
 
                 # 处理事件
-                if events:
-                    for event in events:
-                        self._handle_single_event(event)
+                self._dispatch_events(state, events)
 
                 # 获取更新后的状态
                 state = self.api_client.get_state()
                 self._update_wrappers(state)
 
                 # 事件执行后回调
-                self.on_event_execute_end(self.current_tick, events, self.elevators, self.floors)
+                self._call_hook(
+                    "callback.on_event_execute_end",
+                    self.on_event_execute_end,
+                    self.current_tick,
+                    events,
+                    self.elevators,
+                    self.floors,
+                )
                 # 标记tick处理完成，使API客户端缓存失效
                 self.api_client.mark_tick_processed()
+                if self.profiler is not None:
+                    self.profiler.record("tick", time.perf_counter_ns() - tick_start_ns)
                 # 检查是否需要切换流量文件
                 if self.current_tick >= self.current_traffic_max_tick:
                     pprint(state.metrics.to_dict())
@@ -284,6 +386,48 @@ class ElevatorController(ABC):
             print(f"模拟运行错误: {e}")
             raise
 
+    def resolve_handled_events(self) -> Set[EventType]:
+        """
+        获取控制器关心的事件类型
+
+        优先使用 handled_events；否则收集所有非空实现的 on_* 回调对应的事件类型
+        """
+        if self.handled_events is not None:
+            return set(self.handled_events)
+        event_types: Set[EventType] = set()
+        for hook_name, hook_events in EVENT_HOOKS.items():
+            if not _is_empty_hook(getattr(type(self), hook_name)):
+                event_types.update(hook_events)
+        debug_log("Handled events: %s", sorted(e.value for e in event_types))
+        return event_types
+
+    def _next_step_args(self) -> Tuple[int, Optional[Set[EventType]]]:
+        """计算下一次步进请求的参数 (ticks, until_events)"""
+        if self._until_events is None:
+            return 1, None
+        max_ticks = self.current_traffic_max_tick - self.current_tick
+        if self.max_ticks_per_step is not None:
+            max_ticks = min(max_ticks, self.max_ticks_per_step)
+        return max(1, max_ticks), self._until_events
+
+    def _dispatch_events(self, state: SimulationState, events: List[SimulationEvent]) -> None:
+        """分发事件：先调用批量回调（若已实现），再逐个调用事件回调"""
+        if type(self).on_tick_batch is not ElevatorController.on_tick_batch:
+            self._call_hook(
+                "callback.on_tick_batch",
+                self.on_tick_batch,
+                self.current_tick,
+                build_tick_batch(self.current_tick, events, state),
+            )
+        if not self.dispatch_single_events:
+            return
+        if self.profiler is None:
+            for event in events:
+                self._handle_single_event(event)
+        else:
+            for event in events:
+                self._call_hook(_HOOK_PHASES[event.type], self._handle_single_event, event)
+
     def _update_wrappers(self, state: SimulationState, init: bool = False) -> None:
         """更新电梯和楼层代理对象"""
         self.current_tick = state.tick
@@ -305,12 +449,12 @@ class ElevatorController(ABC):
             traffic_info = self.api_client.get_traffic_info()
             if traffic_info:
                 self.current_traffic_max_tick = int(traffic_info["max_tick"])
-                debug_log(f"Updated traffic info - max_tick: {self.current_traffic_max_tick}")
+                debug_log("Updated traffic info - max_tick: %d", self.current_traffic_max_tick)
             else:
                 debug_log("Failed to get traffic info")
                 self.current_traffic_max_tick = 0
         except Exception as e:
-            debug_log(f"Error updating traffic info: {e}")
+            debug_log("Error updating traffic info: %s", e)
             self.current_traffic_max_tick = 0
 
     def _handle_single_event(self, event: SimulationEvent) -> None:
@@ -382,21 +526,23 @@ class ElevatorController(ABC):
                 self.on_passenger_alight(elevator_proxy, passenger_proxy, floor_proxy)
 
     def _reset_and_reinit(self) -> None:
-        """重置并重新初始化"""
+        """切换流量文件后重新初始化"""
         try:
-            # 重置服务器状态
-            self.api_client.reset()
+            # next_traffic_round 的响应已包含新流量的初始状态（来自缓存，不会再次请求），
+            # 这里不能再调用reset，否则会清空刚加载的流量
             self.current_tick = 0
-            # 获取新的初始状态
             state = self.api_client.get_state()
-            self._update_wrappers(state)
+            # 新流量文件的建筑规模可能不同，允许重建代理对象
+            self._update_wrappers(state, init=True)
 
             # 更新流量信息（切换到新流量文件后需要重新获取最大tick）
             self._update_traffic_info()
 
             # 重新初始化用户算法
             self._internal_init(self.elevators, self.floors)
+            # 初始状态已使用完毕，下一次get_state需要重新获取
+            self.api_client.mark_tick_processed()
 
         except Exception as e:
-            debug_log(f"重置失败: {e}")
+            debug_log("重置失败: %s", e)
             raise
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Client loop profiler
+控制器主循环的分阶段计时器：低开销计数器 + 对数分桶直方图
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+# 直方图按纳秒数的二进制位数分桶：桶 i 覆盖 [2^(i-1), 2^i) ns
+_BUCKETS = 64
+
+
+class PhaseStats:
+    """单个阶段的计数、总耗时、极值和直方图"""
+
+    __slots__ = ("count", "total_ns", "min_ns", "max_ns", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+        self.buckets: List[int] = [0] * (_BUCKETS + 1)
+
+    def record(self, elapsed_ns: int) -> None:
+        if self.count == 0 or elapsed_ns < self.min_ns:
+            self.min_ns = elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.count += 1
+        self.total_ns += elapsed_ns
+        self.buckets[min(elapsed_ns.bit_length(), _BUCKETS)] += 1
+
+    def percentile_ns(self, percent: float) -> int:
+        """根据直方图估算百分位（返回所在桶的上界，不超过最大值）"""
+        if self.count == 0:
+            return 0
+        threshold = self.count * percent / 100
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= threshold:
+                return min(1 << index, self.max_ns)
+        return self.max_ns
+
+    def to_dict(self) -> Dict[str, Any]:
+        mean_ns = self.total_ns / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "total_ms": self.total_ns / 1e6,
+            "mean_us": mean_ns / 1e3,
+            "min_us": self.min_ns / 1e3,
+            "max_us": self.max_ns / 1e3,
+            "p50_us": self.percentile_ns(50) / 1e3,
+            "p95_us": self.percentile_ns(95) / 1e3,
+            "p99_us": self.percentile_ns(99) / 1e3,
+            # 键为桶上界（微秒），只输出非空桶
+            "histogram_us": {f"{(1 << i) / 1e3:g}": n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class LoopProfiler:
+    """
+    控制器主循环分阶段计时
+
+    阶段名约定：
+        step / get_state / command       - 客户端API调用（包含网络和解码）
+        http / decode / parse            - 网络往返 / JSON解码 / 构造数据模型
+        callback.<on_*>                  - 用户回调（包含回调中发出的命令）
+        tick                             - 一次完整的循环迭代
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, PhaseStats] = {}
+        self.started_at = time.perf_counter()
+
+    def record(self, phase: str, elapsed_ns: int) -> None:
+        """记录一次阶段耗时"""
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = PhaseStats()
+        stats.record(elapsed_ns)
+
+    def reset(self) -> None:
+        """清空所有统计"""
+        self.phases.clear()
+        self.started_at = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为字典，便于写入JSON或上报仪表盘"""
+        return {
+            "wall_time_s": time.perf_counter() - self.started_at,
+            "phases": {name: stats.to_dict() for name, stats in sorted(self.phases.items())},
+        }
+
+    def summary(self, title: Optional[str] = None) -> str:
+        """按总耗时排序的文本摘要"""
+        wall_ms = (time.perf_counter() - self.started_at) * 1e3
+        lines = [
+            title or "Loop profile",
+            f"{'phase':<36}{'count':>10}{'total ms':>12}{'% wall':>8}{'mean us':>10}{'p50 us':>10}"
+            f"{'p99 us':>10}{'max us':>10}",
+        ]
+        for name, stats in sorted(self.phases.items(), key=lambda item: item[1].total_ns, reverse=True):
+            data = stats.to_dict()
+            share = data["total_ms"] / wall_ms * 100 if wall_ms > 0 else 0.0
+            lines.append(
+                f"{name:<36}{data['count']:>10}{data['total_ms']:>12.1f}{share:>7.1f}%{data['mean_us']:>10.1f}"
+                f"{data['p50_us']:>10.1f}{data['p99_us']:>10.1f}{data['max_us']:>10.1f}"
+            )
+        lines.append(f"wall time: {wall_ms:.1f} ms")
+        return "\n".join(lines)
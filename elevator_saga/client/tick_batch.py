@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tick Batch for vectorized controllers
+按tick批量提供事件和状态的NumPy数组，便于用矩阵运算实现调度算法
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from elevator_saga.core.models import Direction, EventType, SimulationEvent, SimulationState
+
+# 每种事件类型对应的结构化数组字段，direction 取 +1（上行）/ -1（下行）
+_ELEVATOR_FLOOR = [("tick", np.int64), ("elevator", np.int32), ("floor", np.int32)]
+_ELEVATOR_FLOOR_DIRECTION = _ELEVATOR_FLOOR + [("direction", np.int8)]
+_ELEVATOR_FLOOR_PASSENGER = _ELEVATOR_FLOOR + [("passenger", np.int64)]
+_FLOOR_PASSENGER = [("tick", np.int64), ("floor", np.int32), ("passenger", np.int64)]
+
+EVENT_DTYPES: Dict[EventType, np.dtype] = {
+    EventType.UP_BUTTON_PRESSED: np.dtype(_FLOOR_PASSENGER),
+    EventType.DOWN_BUTTON_PRESSED: np.dtype(_FLOOR_PASSENGER),
+    EventType.PASSING_FLOOR: np.dtype(_ELEVATOR_FLOOR_DIRECTION),
+    EventType.STOPPED_AT_FLOOR: np.dtype(_ELEVATOR_FLOOR),
+    EventType.ELEVATOR_APPROACHING: np.dtype(_ELEVATOR_FLOOR_DIRECTION),
+    EventType.IDLE: np.dtype(_ELEVATOR_FLOOR),
+    EventType.PASSENGER_BOARD: np.dtype(_ELEVATOR_FLOOR_PASSENGER),
+    EventType.PASSENGER_ALIGHT: np.dtype(_ELEVATOR_FLOOR_PASSENGER),
+}
+
+_DIRECTION_SIGN = {Direction.UP.value: 1, Direction.DOWN.value: -1, Direction.STOPPED.value: 0}
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+@dataclass
+class TickBatch:
+    """
+    一个tick（步进直到事件模式下为一次步进）的批量数据
+
+    events 按事件类型分组为结构化数组，例如 batch.events[EventType.STOPPED_AT_FLOOR]["elevator"]；
+    电梯数组按电梯id索引，楼层数组按楼层号索引。所有数组均为只读。
+    """
+
+    tick: int
+    events: Dict[EventType, np.ndarray]
+    elevator_positions: np.ndarray  # float64，当前位置（含楼层间小数）
+    elevator_targets: np.ndarray  # int32，目标楼层
+    elevator_directions: np.ndarray  # int8，+1 上行 / -1 下行 / 0 停止
+    elevator_loads: np.ndarray  # int32，车内乘客数
+    elevator_capacities: np.ndarray  # int32，最大载客量
+    hall_calls_up: np.ndarray  # bool，各楼层是否有上行等待
+    hall_calls_down: np.ndarray  # bool，各楼层是否有下行等待
+    waiting_up: np.ndarray  # int32，各楼层上行等待人数
+    waiting_down: np.ndarray  # int32，各楼层下行等待人数
+    event_counts: Dict[EventType, int] = field(default_factory=dict)
+
+    @property
+    def hall_calls(self) -> np.ndarray:
+        """形状为 (楼层数, 2) 的呼叫位图，第0列上行、第1列下行"""
+        return np.stack([self.hall_calls_up, self.hall_calls_down], axis=1)
+
+    @property
+    def elevator_free_capacity(self) -> np.ndarray:
+        """各电梯剩余容量"""
+        free: np.ndarray = self.elevator_capacities - self.elevator_loads
+        return free
+
+
+def group_events(events: List[SimulationEvent]) -> Dict[EventType, np.ndarray]:
+    """按事件类型分组为结构化数组，每种类型都有对应数组（可能为空）"""
+    rows: Dict[EventType, List[Tuple[int, ...]]] = {event_type: [] for event_type in EVENT_DTYPES}
+    for event in events:
+        data = event.data
+        if event.type in (EventType.UP_BUTTON_PRESSED, EventType.DOWN_BUTTON_PRESSED):
+            rows[event.type].append((event.tick, data["floor"], data["passenger"]))
+        elif event.type in (EventType.STOPPED_AT_FLOOR, EventType.IDLE):
+            rows[event.type].append((event.tick, data["elevator"], data["floor"]))
+        elif event.type in (EventType.PASSING_FLOOR, EventType.ELEVATOR_APPROACHING):
+            direction = _DIRECTION_SIGN.get(data.get("direction", ""), 0)
+            rows[event.type].append((event.tick, data["elevator"], data["floor"], direction))
+        elif event.type in (EventType.PASSENGER_BOARD, EventType.PASSENGER_ALIGHT):
+            rows[event.type].append((event.tick, data["elevator"], data["floor"], data["passenger"]))
+    return {
+        event_type: _readonly(np.array(event_rows, dtype=EVENT_DTYPES[event_type]))
+        for event_type, event_rows in rows.items()
+    }
+
+
+def build_tick_batch(tick: int, events: List[SimulationEvent], state: SimulationState) -> TickBatch:
+    """根据事件列表和状态快照构建TickBatch"""
+    elevators = state.elevators
+    floors = state.floors
+    grouped = group_events(events)
+    waiting_up = np.fromiter((len(f.up_queue) for f in floors), dtype=np.int32, count=len(floors))
+    waiting_down = np.fromiter((len(f.down_queue) for f in floors), dtype=np.int32, count=len(floors))
+    return TickBatch(
+        tick=tick,
+        events=grouped,
+        elevator_positions=_readonly(
+            np.fromiter((e.current_floor_float for e in elevators), dtype=np.float64, count=len(elevators))
+        ),
+        elevator_targets=_readonly(
+            np.fromiter((e.target_floor for e in elevators), dtype=np.int32, count=len(elevators))
+        ),
+        elevator_directions=_readonly(
+            np.fromiter(
+                (_DIRECTION_SIGN[e.target_floor_direction.value] for e in elevators),
+                dtype=np.int8,
+                count=len(elevators),
+            )
+        ),
+        elevator_loads=_readonly(
+            np.fromiter((len(e.passengers) for e in elevators), dtype=np.int32, count=len(elevators))
+        ),
+        elevator_capacities=_readonly(
+            np.fromiter((e.max_capacity for e in elevators), dtype=np.int32, count=len(elevators))
+        ),
+        hall_calls_up=_readonly(waiting_up > 0),
+        hall_calls_down=_readonly(waiting_down > 0),
+        waiting_up=_readonly(waiting_up),
+        waiting_down=_readonly(waiting_down),
+        event_counts={event_type: len(array) for event_type, array in grouped.items()},
+    )
@@ -389,6 +389,10 @@ class SimulationState(SerializableModel):
 
 # ==================== HTTP API 数据模型 ====================
 
+# 会话请求头：服务端为每个会话id维护独立的模拟器，未指定时使用默认会话
+SESSION_HEADER = "X-Session-Id"
+DEFAULT_SESSION_ID = "default"
+
 
 @dataclass
 class APIRequest(SerializableModel):
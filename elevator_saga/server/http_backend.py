@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Standard library HTTP backend for the simulation server
+基于 ThreadingHTTPServer 的轻量HTTP后端：不经过WSGI和路由框架，直接把请求交给模拟器接口函数
+（单进程时为 simulator.handle_raw_request，分片模式下为 sharded.ShardRouter）
+"""
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional, Tuple
+
+from elevator_saga.core.models import SESSION_HEADER
+from elevator_saga.server.perf import PERF_PATH, metrics, route_label
+
+# (方法, 路径, 原始请求体, 会话id) -> (编码后的响应体, 状态码)
+RequestHandler = Callable[[str, str, bytes, Optional[str]], Tuple[bytes, int]]
+
+_CORS_HEADERS = (
+    ("Access-Control-Allow-Origin", "*"),
+    ("Access-Control-Allow-Headers", f"Content-Type,Authorization,{SESSION_HEADER}"),
+    ("Access-Control-Allow-Methods", "GET,PUT,POST,DELETE,OPTIONS"),
+)
+
+
+class SimulationRequestHandler(BaseHTTPRequestHandler):
+    """处理单个连接上的请求，HTTP/1.1 下连接在请求之间保持"""
+
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次写出，关闭Nagle避免与延迟ACK叠加产生几十毫秒的停顿
+    disable_nagle_algorithm = True
+    server_version = "ElevatorSaga"
+
+    # 由 make_server 在子类上设置
+    handle_request: RequestHandler
+    access_log: bool = False
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_OPTIONS(self) -> None:
+        self._send(204, b"")
+
+    def _handle(self, method: str) -> None:
+        start = time.perf_counter()
+        path, _, query = self.path.partition("?")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if path == PERF_PATH:
+            # 指标由前端进程统计，分片模式下也不转发给worker
+            response_body, content_type = metrics.render(query)
+            self._send(200, response_body, content_type)
+            return
+        response_body, status = self.handle_request(method, path, body, self.headers.get(SESSION_HEADER))
+        self._send(status, response_body)
+        metrics.record(method, route_label(path), status, length, len(response_body), time.perf_counter() - start)
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        if body:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in _CORS_HEADERS:
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.access_log:
+            super().log_message(format, *args)
+
+
+def make_server(host: str, port: int, handle_request: RequestHandler, access_log: bool = False) -> ThreadingHTTPServer:
+    """创建服务器（不启动），每个连接由独立线程处理"""
+    handler = type(
+        "BoundSimulationRequestHandler",
+        (SimulationRequestHandler,),
+        {"handle_request": staticmethod(handle_request), "access_log": access_log},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(host: str, port: int, handle_request: RequestHandler, access_log: bool = False) -> None:
+    """启动服务器并阻塞，直到收到KeyboardInterrupt"""
+    server = make_server(host, port, handle_request, access_log)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Real-time paced simulation
+按墙钟节奏推进模拟：后台线程以固定的每秒tick数步进，不等待客户端
+
+    python -m elevator_saga.server.simulator --pace 10
+
+节奏模式下：
+- POST /api/step 不再推进模拟，而是等待下一个tick，返回上次调用以来产生的全部事件
+- 电梯命令与非节奏模式一样先进入模拟器的命令队列，在下一个tick开始时统一生效
+- 某个tick产生需要决策的事件后，如果下一个tick开始前没有收到任何命令，记为一次错过决策期限；
+  同时记录事件产生到第一个响应命令之间的延迟
+"""
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, FrozenSet, List, Optional, Tuple
+
+from elevator_saga.core.models import EventType, SimulationEvent
+from elevator_saga.utils.debug import get_logger
+
+if TYPE_CHECKING:
+    from elevator_saga.server.simulator import ElevatorSimulation
+
+logger = get_logger("elevator_saga.server.pacing")
+
+# 需要控制器决策的事件；IDLE 每个tick都会对空闲电梯重复产生，不计入
+DECISION_EVENTS: FrozenSet[EventType] = frozenset(
+    {EventType.UP_BUTTON_PRESSED, EventType.DOWN_BUTTON_PRESSED, EventType.STOPPED_AT_FLOOR}
+)
+
+# 延迟样本上限，分位数按最近的样本计算
+_LATENCY_SAMPLES = 10000
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class TickPacer:
+    """
+    一个模拟器的节奏控制
+
+    第一次 wait_step 时开始计时并启动后台线程，运行到流量的最大tick后线程退出；
+    模拟器重置时调用 disarm，下一次 wait_step 重新开始。
+    """
+
+    def __init__(self, sim: "ElevatorSimulation", ticks_per_second: float):
+        if ticks_per_second <= 0:
+            raise ValueError("ticks_per_second must be positive")
+        self.sim = sim
+        self.ticks_per_second = ticks_per_second
+        self.period = 1.0 / ticks_per_second
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = False
+        self._reset_run()
+
+    def _reset_run(self) -> None:
+        """清空一次运行的状态和统计（调用方持有 _cond 或线程未运行）"""
+        self._tick = self.sim.tick
+        self._delivered_tick = self._tick
+        self._pending_events: List[SimulationEvent] = []
+        # 尚未得到响应的决策：(tick, 事件产生时间, 是否已错过期限)
+        self._open_decision: Optional[Tuple[int, float, bool]] = None
+        self.ticks = 0
+        self.overruns = 0
+        self.max_lateness = 0.0
+        self.decision_ticks = 0
+        self.responded = 0
+        self.missed_deadlines = 0
+        self.late_responses = 0
+        self.client_lag_ticks = 0
+        self.commands = 0
+        self._latencies: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ==================== 请求线程 ====================
+
+    def record_command(self) -> None:
+        """收到一条命令（已提交到模拟器的命令队列）：结束当前未响应的决策并记录延迟"""
+        now = time.perf_counter()
+        with self._cond:
+            self.commands += 1
+            if self._open_decision is not None:
+                _, emitted_at, missed = self._open_decision
+                latency = now - emitted_at
+                self._latencies.append(latency)
+                self._latency_sum += latency
+                self._latency_max = max(self._latency_max, latency)
+                self.responded += 1
+                if missed:
+                    # 下一个tick已经开始，已计入错过期限
+                    self.late_responses += 1
+                self._open_decision = None
+
+    def wait_step(self, timeout: Optional[float] = None) -> Tuple[int, List[SimulationEvent]]:
+        """
+        等待至少一个新的tick，返回 (当前tick, 上次调用以来的事件)
+
+        第一次调用时启动节奏线程；运行已结束时立即返回。
+        """
+        with self._cond:
+            if not self.running and self._tick < self.sim.max_duration_ticks:
+                self._start_locked()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self._tick == self._delivered_tick and self.running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            advanced = self._tick - self._delivered_tick
+            if advanced > 1:
+                self.client_lag_ticks += advanced - 1
+            self._delivered_tick = self._tick
+            events, self._pending_events = self._pending_events, []
+            return self._tick, events
+
+    def disarm(self) -> None:
+        """停止节奏线程并清空本次运行（模拟器重置时调用）"""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=max(1.0, self.period * 2))
+        with self._cond:
+            self._thread = None
+            self._stop = False
+            self._reset_run()
+
+    # ==================== 节奏线程 ====================
+
+    def _start_locked(self) -> None:
+        self._tick = self._delivered_tick = self.sim.tick
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="elevator-sim-pacer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        sim = self.sim
+        clock = time.perf_counter
+        next_at = clock()
+        while True:
+            next_at += self.period
+            with self._cond:
+                while not self._stop:
+                    remaining = next_at - clock()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stop:
+                    return
+                # tick边界：未响应的决策记为错过期限（仍等待响应以记录延迟）
+                if self._open_decision is not None and not self._open_decision[2]:
+                    self.missed_deadlines += 1
+                    self._open_decision = (self._open_decision[0], self._open_decision[1], True)
+            lateness = clock() - next_at
+            self.max_lateness = max(self.max_lateness, lateness)
+            if lateness > self.period:
+                # 落后超过一个周期（步进太慢或机器过载），不补跑，从当前时间重新排期
+                self.overruns += 1
+                next_at = clock()
+
+            # 排队的命令在 step 的 _process_tick 开始时生效
+            events = sim.step(1)
+            emitted_at = clock()
+
+            with self._cond:
+                if self._stop:
+                    return
+                self.ticks += 1
+                self._tick = sim.tick
+                self._pending_events.extend(events)
+                if any(event.type in DECISION_EVENTS for event in events):
+                    self.decision_ticks += 1
+                    self._open_decision = (self._tick, emitted_at, False)
+                finished = self._tick >= sim.max_duration_ticks
+                self._cond.notify_all()
+            if finished:
+                logger.info("%s", self.summary())
+                return
+
+    # ==================== 统计 ====================
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._cond:
+            latencies = sorted(self._latencies)
+            return {
+                "enabled": True,
+                "ticks_per_second": self.ticks_per_second,
+                "running": self.running,
+                "tick": self._tick,
+                "ticks": self.ticks,
+                "overruns": self.overruns,
+                "max_lateness_ms": self.max_lateness * 1e3,
+                "commands": self.commands,
+                "decision_ticks": self.decision_ticks,
+                "responded": self.responded,
+                "missed_deadlines": self.missed_deadlines,
+                "miss_rate": self.missed_deadlines / self.decision_ticks if self.decision_ticks else 0.0,
+                "late_responses": self.late_responses,
+                "client_lag_ticks": self.client_lag_ticks,
+                "response_latency_ms": {
+                    "count": self.responded,
+                    "mean": self._latency_sum / self.responded * 1e3 if self.responded else 0.0,
+                    **{f"p{int(q * 100)}": _quantile(latencies, q) * 1e3 for q in (0.5, 0.95, 0.99)},
+                    "max": self._latency_max * 1e3,
+                },
+            }
+
+    def summary(self) -> str:
+        data = self.to_dict()
+        latency = data["response_latency_ms"]
+        return (
+            f"Paced run at {self.ticks_per_second:g} ticks/s: {data['ticks']} ticks, {data['overruns']} overruns, "
+            f"missed {data['missed_deadlines']}/{data['decision_ticks']} decision deadlines, "
+            f"client lagged {data['client_lag_ticks']} ticks, response latency p50 {latency['p50']:.1f} ms "
+            f"p99 {latency['p99']:.1f} ms"
+        )
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Per-route request metrics for the simulation server
+按路由统计请求数、请求/响应字节数、延迟直方图和滑动窗口分位数，通过 /api/perf 以JSON或Prometheus文本格式导出
+
+滑动窗口按秒分桶：每秒的请求数精确计数（用于rps），延迟分位数来自每秒固定大小的蓄水池样本，
+因此请求速率再高，每个路由的内存也只有 窗口秒数 x 每秒样本数。
+"""
+import bisect
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Tuple
+
+# Prometheus 直方图桶上界（秒）
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+WINDOW_QUANTILES: Tuple[float, ...] = (0.5, 0.95, 0.99)
+
+PERF_PATH = "/api/perf"
+
+# 未匹配任何路由的请求（如404）统一使用的标签，避免任意路径产生无限多的路由
+UNMATCHED_ROUTE = "<unmatched>"
+
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def route_label(path: str) -> str:
+    """把路径中的数字段替换为占位符，使同一路由的请求归为一类"""
+    return _NUMERIC_SEGMENT.sub("/<int>", path)
+
+
+class _SecondBucket:
+    """滑动窗口中一秒内的请求：精确的请求数和蓄水池抽样的延迟样本"""
+
+    __slots__ = ("second", "count", "samples")
+
+    def __init__(self, second: int) -> None:
+        self.second = second
+        self.count = 0
+        self.samples: List[float] = []
+
+
+class RouteStats:
+    """单个路由的累计统计和按秒分桶的滑动窗口"""
+
+    __slots__ = ("count", "request_bytes", "response_bytes", "latency_sum", "buckets", "statuses", "window", "_rng")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.latency_sum = 0.0
+        # 最后一个桶为 +Inf
+        self.buckets: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.statuses: Dict[int, int] = {}
+        # 按秒递增的桶，只保留窗口内的秒
+        self.window: Deque[_SecondBucket] = deque()
+        self._rng = random.Random(0)
+
+    def record(
+        self,
+        status: int,
+        request_bytes: int,
+        response_bytes: int,
+        latency: float,
+        now: float,
+        window_seconds: int,
+        samples_per_second: int,
+    ) -> None:
+        self.count += 1
+        self.request_bytes += request_bytes
+        self.response_bytes += response_bytes
+        self.latency_sum += latency
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+        second = int(now)
+        window = self.window
+        if not window or window[-1].second != second:
+            window.append(_SecondBucket(second))
+            while window[0].second <= second - window_seconds:
+                window.popleft()
+        bucket = window[-1]
+        bucket.count += 1
+        if len(bucket.samples) < samples_per_second:
+            bucket.samples.append(latency)
+        else:
+            # 蓄水池抽样：这一秒的每个请求以相同概率留在样本中
+            index = self._rng.randrange(bucket.count)
+            if index < samples_per_second:
+                bucket.samples[index] = latency
+
+    def snapshot(self, since_second: int) -> "RouteSnapshot":
+        """在持有锁时复制导出需要的全部数据"""
+        window = [bucket for bucket in self.window if bucket.second >= since_second]
+        return RouteSnapshot(
+            count=self.count,
+            request_bytes=self.request_bytes,
+            response_bytes=self.response_bytes,
+            latency_sum=self.latency_sum,
+            buckets=list(self.buckets),
+            statuses=dict(self.statuses),
+            window_count=sum(bucket.count for bucket in window),
+            window_quantiles=_weighted_quantiles(window, WINDOW_QUANTILES),
+        )
+
+
+@dataclass
+class RouteSnapshot:
+    """导出时某个路由统计的一致副本（延迟单位为秒）"""
+
+    count: int
+    request_bytes: int
+    response_bytes: int
+    latency_sum: float
+    buckets: List[int]
+    statuses: Dict[int, int]
+    window_count: int
+    window_quantiles: List[float]
+
+
+def _weighted_quantiles(window: List[_SecondBucket], quantiles: Tuple[float, ...]) -> List[float]:
+    """每秒的样本按该秒的实际请求数加权，估计整个窗口的延迟分位数"""
+    # 每个桶至少有一个样本（桶在记录第一个请求时创建）
+    weighted = sorted((latency, bucket.count / len(bucket.samples)) for bucket in window for latency in bucket.samples)
+    if not weighted:
+        return [0.0 for _ in quantiles]
+    total = sum(weight for _, weight in weighted)
+    results = []
+    for q in quantiles:
+        target = q * total
+        cumulative = 0.0
+        value = weighted[-1][0]
+        for latency, weight in weighted:
+            cumulative += weight
+            if cumulative > target:
+                value = latency
+                break
+        results.append(value)
+    return results
+
+
+class RequestMetrics:
+    """
+    线程安全的请求指标登记表
+
+    记录一次请求只需要一次加锁和常数次的计数更新；分位数在导出时才计算。
+    """
+
+    def __init__(self, window_seconds: int = 60, samples_per_second: int = 200):
+        self.window_seconds = window_seconds
+        self.samples_per_second = samples_per_second
+        self.started_at = time.time()
+        self._routes: Dict[Tuple[str, str], RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, method: str, route: str, status: int, request_bytes: int, response_bytes: int, latency: float
+    ) -> None:
+        """记录一次已完成的请求，latency 单位为秒"""
+        now = time.monotonic()
+        with self._lock:
+            stats = self._routes.get((method, route))
+            if stats is None:
+                stats = self._routes[(method, route)] = RouteStats()
+            stats.record(
+                status, request_bytes, response_bytes, latency, now, self.window_seconds, self.samples_per_second
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self.started_at = time.time()
+
+    def _snapshot(self) -> Tuple[float, List[Tuple[str, str, RouteSnapshot]]]:
+        """在锁内复制所有路由的统计，返回 (运行时长, [(方法, 路由, 统计)])"""
+        since_second = int(time.monotonic()) - self.window_seconds + 1
+        with self._lock:
+            uptime = time.time() - self.started_at
+            return uptime, [
+                (method, route, stats.snapshot(since_second)) for (method, route), stats in sorted(self._routes.items())
+            ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON格式：每个路由的累计计数、字节数、直方图和窗口分位数（毫秒）"""
+        routes: Dict[str, Any] = {}
+        uptime, snapshot = self._snapshot()
+        span = min(self.window_seconds, uptime)
+        for method, route, stats in snapshot:
+            routes[f"{method} {route}"] = {
+                "count": stats.count,
+                "statuses": {str(status): n for status, n in sorted(stats.statuses.items())},
+                "request_bytes": stats.request_bytes,
+                "response_bytes": stats.response_bytes,
+                "mean_ms": stats.latency_sum / stats.count * 1e3 if stats.count else 0.0,
+                "histogram_ms": {
+                    **{f"{bound * 1e3:g}": n for bound, n in zip(LATENCY_BUCKETS, stats.buckets)},
+                    "+Inf": stats.buckets[-1],
+                },
+                "window": {
+                    "count": stats.window_count,
+                    "rps": stats.window_count / span if span > 0 else 0.0,
+                    **{
+                        f"p{int(q * 100)}_ms": value * 1e3 for q, value in zip(WINDOW_QUANTILES, stats.window_quantiles)
+                    },
+                },
+            }
+        return {
+            "uptime_s": uptime,
+            "window_seconds": self.window_seconds,
+            "process_cpu_seconds": time.process_time(),
+            "pid": os.getpid(),
+            "routes": routes,
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus文本格式（0.0.4）"""
+        lines = [
+            "# HELP elevator_saga_http_requests_total Completed HTTP requests.",
+            "# TYPE elevator_saga_http_requests_total counter",
+        ]
+        _, snapshot = self._snapshot()
+        for method, route, stats in snapshot:
+            for status, n in sorted(stats.statuses.items()):
+                lines.append(
+                    f'elevator_saga_http_requests_total{{method="{method}",route="{route}",status="{status}"}} {n}'
+                )
+        for name, attr, help_text in (
+            ("request_bytes", "request_bytes", "Request body bytes received."),
+            ("response_bytes", "response_bytes", "Response body bytes sent."),
+        ):
+            lines.append(f"# HELP elevator_saga_http_{name}_total {help_text}")
+            lines.append(f"# TYPE elevator_saga_http_{name}_total counter")
+            for method, route, stats in snapshot:
+                lines.append(
+                    f'elevator_saga_http_{name}_total{{method="{method}",route="{route}"}} {getattr(stats, attr)}'
+                )
+        lines.append("# HELP elevator_saga_http_request_duration_seconds Request latency.")
+        lines.append("# TYPE elevator_saga_http_request_duration_seconds histogram")
+        for method, route, stats in snapshot:
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += n
+                lines.append(
+                    f'elevator_saga_http_request_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}'
+                )
+            lines.append(f'elevator_saga_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+            lines.append(f"elevator_saga_http_request_duration_seconds_sum{{{labels}}} {stats.latency_sum:.6f}")
+            lines.append(f"elevator_saga_http_request_duration_seconds_count{{{labels}}} {stats.count}")
+        # 与Prometheus客户端库的summary相同：分位数取自滑动窗口，_sum 和 _count 为累计值
+        lines.append(
+            f"# HELP elevator_saga_http_request_window_seconds Latency quantiles over the last "
+            f"{self.window_seconds:g}s; _sum and _count are cumulative."
+        )
+        lines.append("# TYPE elevator_saga_http_request_window_seconds summary")
+        for method, route, stats in snapshot:
+            labels = f'method="{method}",route="{route}"'
+            for q, value in zip(WINDOW_QUANTILES, stats.window_quantiles):
+                lines.append(f'elevator_saga_http_request_window_seconds{{{labels},quantile="{q:g}"}} {value:.6f}')
+            lines.append(f"elevator_saga_http_request_window_seconds_sum{{{labels}}} {stats.latency_sum:.6f}")
+            lines.append(f"elevator_saga_http_request_window_seconds_count{{{labels}}} {stats.count}")
+        lines.append("# HELP process_cpu_seconds_total Total user and system CPU time spent in seconds.")
+        lines.append("# TYPE process_cpu_seconds_total counter")
+        lines.append(f"process_cpu_seconds_total {time.process_time():.6f}")
+        return "\n".join(lines) + "\n"
+
+    def render(self, query: str = "") -> Tuple[bytes, str]:
+        """根据查询字符串（?format=prometheus）返回 (响应体, Content-Type)"""
+        if urllib.parse.parse_qs(query).get("format") == ["prometheus"]:
+            return self.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        return json.dumps(self.to_dict()).encode("utf-8"), "application/json"
+
+
+# 进程内共享的指标登记表，Flask和标准库后端都记录到这里
+metrics = RequestMetrics()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+On-demand profiling for a running simulation server
+运行中按需采集：cProfile 覆盖接下来N个请求或N个tick，结果写为 .pstats；
+tracemalloc 快照之间的内存分配差异写为 JSON
+
+    POST /api/admin/profile/start        {"requests": 500} 或 {"ticks": 2000}
+    POST /api/admin/profile/stop
+    GET  /api/admin/profile
+    POST /api/admin/tracemalloc/snapshot {"top": 20}
+    POST /api/admin/tracemalloc/stop
+
+分片模式下请求按会话路由，采集的是该会话所在worker进程。
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ApiResult = Tuple[Any, int]
+
+# 默认输出到系统临时目录下，不写入当前工作目录；可通过 --profile-dir 修改
+DEFAULT_OUTPUT_DIR = os.path.join(tempfile.gettempdir(), "elevator_saga_profiles")
+
+
+def _top_functions(profile: cProfile.Profile, limit: int) -> List[Dict[str, Any]]:
+    """按累计时间排序的前若干个函数"""
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():  # type: ignore[attr-defined]
+        rows.append(
+            {
+                "function": f"{os.path.basename(filename)}:{line}({name})",
+                "calls": calls,
+                "tottime_s": total,
+                "cumtime_s": cumulative,
+            }
+        )
+    rows.sort(key=lambda row: row["cumtime_s"], reverse=True)
+    return rows[:limit]
+
+
+def _top_diffs(snapshot: tracemalloc.Snapshot, other: tracemalloc.Snapshot, top: int) -> List[Dict[str, Any]]:
+    """相对 other 增长最多的前 top 个分配位置"""
+    return [
+        {
+            "location": str(stat.traceback),
+            "size_diff_bytes": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "size_bytes": stat.size,
+        }
+        for stat in snapshot.compare_to(other, "lineno")[:top]
+    ]
+
+
+class ProfilerControl:
+    """
+    管理一次cProfile采集和tracemalloc快照
+
+    采集期间同一时间只有一个请求在 cProfile.Profile 下执行并计入（cProfile 只跟踪开启它的线程），
+    与它并发的其他请求照常执行但不计入；锁只在登记时持有，不在处理请求时持有。
+    达到请求数或tick数后自动停止并写出文件。
+    tracemalloc 只保留基线（第一个）和上一个快照。
+    """
+
+    def __init__(self, output_dir: str = DEFAULT_OUTPUT_DIR):
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        # 有请求正在采集中时为 True，stop 等待它结束后再写出结果
+        self._in_request = False
+        self._request_done = threading.Condition(self._lock)
+        self._profile: Optional[cProfile.Profile] = None
+        self._label = ""
+        self._requests_left: Optional[int] = None
+        self._ticks_left: Optional[int] = None
+        self._requests = 0
+        self._ticks = 0
+        self._started_at = 0.0
+        self.last_result: Optional[Dict[str, Any]] = None
+        # (tick, 快照)：基线和上一个快照，快照很大，不保留中间的
+        self._baseline: Optional[Tuple[int, tracemalloc.Snapshot]] = None
+        self._previous: Optional[Tuple[int, tracemalloc.Snapshot]] = None
+        self._snapshot_count = 0
+        self._files_written = 0
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+
+    def _output_path(self, prefix: str, suffix: str) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self._files_written += 1
+        return os.path.join(self.output_dir, f"{prefix}-{stamp}-{os.getpid()}-{self._files_written}{suffix}")
+
+    # ==================== cProfile ====================
+
+    def start(self, requests: Optional[int] = None, ticks: Optional[int] = None, label: str = "") -> Dict[str, Any]:
+        """开始采集，requests 和 ticks 至少指定一个"""
+        if requests is None and ticks is None:
+            raise ValueError("Specify 'requests' or 'ticks'")
+        with self._lock:
+            if self._profile is not None:
+                raise RuntimeError("A profile capture is already running")
+            self._profile = cProfile.Profile()
+            self._label = label
+            self._requests_left = requests
+            self._ticks_left = ticks
+            self._requests = 0
+            self._ticks = 0
+            self._started_at = time.perf_counter()
+        return self.status()
+
+    def run(self, handler: Callable[..., ApiResult], sim: Any, data: Dict[str, Any], *args: Any) -> ApiResult:
+        """在采集中执行一个请求；采集未开启或已有请求在采集中时直接调用"""
+        with self._lock:
+            profile = self._profile
+            if profile is None or self._in_request:
+                profile = None
+            else:
+                self._in_request = True
+        if profile is None:
+            return handler(sim, data, *args)
+        tick_before = sim.tick
+        profile.enable()
+        try:
+            return handler(sim, data, *args)
+        finally:
+            profile.disable()
+            with self._lock:
+                self._in_request = False
+                self._request_done.notify_all()
+                if self._profile is profile:
+                    self._requests += 1
+                    self._ticks += max(0, sim.tick - tick_before)
+                    if (self._requests_left is not None and self._requests >= self._requests_left) or (
+                        self._ticks_left is not None and self._ticks >= self._ticks_left
+                    ):
+                        self._finish_locked()
+
+    def stop(self) -> Dict[str, Any]:
+        """提前结束采集并写出结果"""
+        with self._lock:
+            while self._in_request:
+                self._request_done.wait()
+            if self._profile is None:
+                raise RuntimeError("No profile capture is running")
+            return self._finish_locked()
+
+    def _finish_locked(self) -> Dict[str, Any]:
+        assert self._profile is not None
+        profile, self._profile = self._profile, None
+        path = self._output_path(f"profile{'-' + self._label if self._label else ''}", ".pstats")
+        profile.dump_stats(path)
+        self.last_result = {
+            "path": os.path.abspath(path),
+            "requests": self._requests,
+            "ticks": self._ticks,
+            "elapsed_s": time.perf_counter() - self._started_at,
+            "top": _top_functions(profile, 15),
+        }
+        return self.last_result
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "requests": self._requests,
+            "ticks": self._ticks,
+            "target_requests": self._requests_left,
+            "target_ticks": self._ticks_left,
+            "last_result": self.last_result,
+            "tracemalloc": {"tracing": tracemalloc.is_tracing(), "snapshots": self._snapshot_count},
+        }
+
+    # ==================== tracemalloc ====================
+
+    def snapshot(
+        self, tick: int, top: int = 20, frames: int = 1, extra: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        拍摄内存快照
+
+        首次调用时开始跟踪并记录基线；之后每次调用分别与上一个快照和基线比较，
+        按增长量列出前 top 个分配位置，结果同时写入JSON文件。
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self._baseline = self._previous = None
+            self._snapshot_count = 0
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        result: Dict[str, Any] = {
+            "index": self._snapshot_count,
+            "tick": tick,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            **(extra or {}),
+        }
+        if self._previous is not None:
+            previous_tick, previous = self._previous
+            result["compared_to_tick"] = previous_tick
+            result["top_diffs"] = _top_diffs(snapshot, previous, top)
+        if self._baseline is not None and self._baseline is not self._previous:
+            baseline_tick, baseline = self._baseline
+            result["baseline_tick"] = baseline_tick
+            result["top_diffs_from_baseline"] = _top_diffs(snapshot, baseline, top)
+        self._previous = (tick, snapshot)
+        if self._baseline is None:
+            self._baseline = self._previous
+        self._snapshot_count += 1
+        path = self._output_path("tracemalloc", ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        result["path"] = os.path.abspath(path)
+        return result
+
+    def stop_tracemalloc(self) -> Dict[str, Any]:
+        """停止跟踪并丢弃快照"""
+        count = self._snapshot_count
+        self._baseline = self._previous = None
+        self._snapshot_count = 0
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return {"stopped": True, "snapshots": count}
+
+
+# 进程内共享的采集控制器
+profiler_control = ProfilerControl()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Multi-process sharded simulation server
+多进程分片服务器：N个worker进程各自持有一部分会话的模拟器，前端按会话id分发请求
+
+    python -m elevator_saga.server.simulator --workers 8
+
+前端只读取原始请求体并转发，JSON解析、模拟和序列化都在worker进程中完成，
+不同worker上的会话可以真正并行步进。会话按 crc32(session_id) 固定分配到一个worker（粘性路由）。
+"""
+import multiprocessing
+import threading
+import zlib
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from elevator_saga.core.models import DEFAULT_SESSION_ID
+from elevator_saga.server.http_backend import serve
+from elevator_saga.utils.debug import configure_logging, get_logger
+
+logger = get_logger("elevator_saga.server.sharded")
+
+_UNAVAILABLE = b'{"error": "simulation worker unavailable"}'
+
+
+def shard_index(session_id: Optional[str], workers: int) -> int:
+    """会话所属的worker编号，同一会话总是落在同一个worker上"""
+    key = session_id or DEFAULT_SESSION_ID
+    return zlib.crc32(key.encode("utf-8")) % workers
+
+
+def _worker_main(
+    conn: Connection,
+    traffic_dir: str,
+    debug: bool,
+    profile_ticks: bool = False,
+    profile_dir: Optional[str] = None,
+    soak: Optional[Dict[str, Any]] = None,
+    preload_traffic: bool = False,
+    log_level: Union[int, str, None] = None,
+    log_modules: Optional[Dict[str, Union[int, str]]] = None,
+) -> None:
+    """worker进程：循环接收请求，在本进程的会话上执行并回传编码后的响应"""
+    # spawn 启动的进程不继承前端的日志配置，按前端的 --log-level / --log-module 重新配置
+    configure_logging(log_level, log_modules)
+    from elevator_saga.server import simulator
+
+    if debug:
+        simulator.set_server_debug_mode(True)
+    simulator.set_tick_profiling_default(profile_ticks)
+    # worker逐个处理请求，节奏模式下等待中的步进会阻塞同一worker上的其他会话
+    simulator.set_pacing_available(False)
+    simulator.set_soak_default(soak)
+    if profile_dir is not None:
+        simulator.profiler_control.output_dir = profile_dir
+    simulator.set_session_traffic_dir(traffic_dir)
+    simulator.simulation = simulator.ElevatorSimulation(traffic_dir)
+    if preload_traffic and simulator.simulation.traffic_corpus is not None:
+        simulator.simulation.traffic_corpus.preload()
+    logger.debug("Simulation worker %s ready", multiprocessing.current_process().name)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+        method, path, body, session_id = message
+        conn.send(simulator.handle_raw_request(method, path, body, session_id))
+    conn.close()
+
+
+class ShardRouter:
+    """
+    前端分发器：持有到每个worker的管道，按会话id转发请求
+
+    每个管道同一时间只承载一个请求（每个worker一把锁），
+    因此同一worker上的会话串行执行，不同worker之间并行，worker中也不能开启节奏模式。
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        traffic_dir: str,
+        debug: bool = False,
+        profile_ticks: bool = False,
+        profile_dir: Optional[str] = None,
+        soak: Optional[Dict[str, Any]] = None,
+        preload_traffic: bool = False,
+        log_level: Union[int, str, None] = None,
+        log_modules: Optional[Dict[str, Union[int, str]]] = None,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        # spawn：前端已有日志线程等，fork 可能复制持有中的锁
+        context = multiprocessing.get_context("spawn")
+        self._connections: List[Connection] = []
+        self._locks: List[threading.Lock] = []
+        self._processes: List[multiprocessing.process.BaseProcess] = []
+        for index in range(workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_worker_main,
+                args=(child_conn, traffic_dir, debug, profile_ticks, profile_dir, soak, preload_traffic),
+                kwargs={"log_level": log_level, "log_modules": log_modules},
+                name=f"elevator-sim-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._locks.append(threading.Lock())
+            self._processes.append(process)
+        logger.info("Started %d simulation workers", workers)
+
+    @property
+    def workers(self) -> int:
+        return len(self._connections)
+
+    def __call__(self, method: str, path: str, body: bytes, session_id: Optional[str]) -> Tuple[bytes, int]:
+        index = shard_index(session_id, self.workers)
+        with self._locks[index]:
+            try:
+                self._connections[index].send((method, path, body, session_id))
+                response: Tuple[bytes, int] = self._connections[index].recv()
+                return response
+            except (EOFError, OSError) as e:
+                logger.error("Worker %d failed: %s", index, e)
+                return _UNAVAILABLE, 503
+
+    def close(self) -> None:
+        """通知所有worker退出并等待结束"""
+        for conn, lock in zip(self._connections, self._locks):
+            with lock:
+                try:
+                    conn.send(None)
+                except (OSError, ValueError):
+                    pass
+                conn.close()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+def serve_sharded(
+    host: str,
+    port: int,
+    workers: int,
+    traffic_dir: str,
+    debug: bool = False,
+    access_log: bool = False,
+    profile_ticks: bool = False,
+    profile_dir: Optional[str] = None,
+    soak: Optional[Dict[str, Any]] = None,
+    preload_traffic: bool = False,
+    log_level: Union[int, str, None] = None,
+    log_modules: Optional[Dict[str, Union[int, str]]] = None,
+) -> None:
+    """启动分片服务器并阻塞，log_level / log_modules 与 configure_logging 的参数相同，传给每个worker"""
+    router = ShardRouter(
+        workers, traffic_dir, debug, profile_ticks, profile_dir, soak, preload_traffic, log_level, log_modules
+    )
+    try:
+        serve(host, port, router, access_log)
+    finally:
+        router.close()
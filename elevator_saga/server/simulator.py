@@ -5,16 +5,24 @@ Provides HTTP API for controlling elevators and advancing simulation time
 """
 import argparse
 import json
+import logging
 import os.path
+import queue
+import sys
 import threading
+import time
+from collections import Counter
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Callable, Collection, Dict, List, Optional, Set, Tuple
 
-from flask import Flask, Response, request
+import numpy as np
+from flask import Flask, Response, g, request
 
 from elevator_saga.core.models import (
+    DEFAULT_SESSION_ID,
+    SESSION_HEADER,
     Direction,
     ElevatorState,
     ElevatorStatus,
@@ -26,24 +34,35 @@ from elevator_saga.core.models import (
     SerializableModel,
     SimulationEvent,
     SimulationState,
-    TrafficEntry,
     create_empty_simulation_state,
 )
+from elevator_saga.server.pacing import TickPacer
+from elevator_saga.server.perf import PERF_PATH, UNMATCHED_ROUTE, metrics
+from elevator_saga.server.profiling import profiler_control
+from elevator_saga.server.tick_profiler import TickPhaseProfiler
+from elevator_saga.traffic.corpus import TrafficCorpus, shared_traffic_corpus
+from elevator_saga.traffic.source import (
+    ArrayTrafficSource,
+    GeneratorTrafficSource,
+    TrafficSource,
+    inline_traffic_source,
+    open_traffic_source,
+)
+from elevator_saga.utils.debug import SERVER_LOGGER_NAME, configure_logging, get_logger
 
-# Global debug flag for server
-_SERVER_DEBUG_MODE = False
+# 以模块名命名，便于 --log-module elevator_saga.server.simulator=DEBUG 单独调整
+logger = get_logger(f"{SERVER_LOGGER_NAME}.simulator")
 
 
 def set_server_debug_mode(enabled: bool) -> None:
     """Enable or disable server debug logging"""
-    global _SERVER_DEBUG_MODE
-    globals()["_SERVER_DEBUG_MODE"] = enabled
+    get_logger(SERVER_LOGGER_NAME).setLevel(logging.DEBUG if enabled else logging.NOTSET)
 
 
-def server_debug_log(message: str) -> None:
-    """Print server debug message if debug mode is enabled"""
-    if _SERVER_DEBUG_MODE:
-        print(f"[SERVER-DEBUG] {message}", flush=True)
+def server_debug_log(message: str, *args: Any) -> None:
+    """Log a server debug message; args are %-formatted only if debug logging is enabled"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, *args)
 
 
 class CustomJSONEncoder(json.JSONEncoder):
@@ -71,6 +90,11 @@ class CustomJSONEncoder(json.JSONEncoder):
             return super().default(o)
 
 
+def encode_json(data: Any) -> bytes:
+    """序列化响应数据为UTF-8编码的JSON"""
+    return json.dumps(data, cls=CustomJSONEncoder, ensure_ascii=False).encode("utf-8")
+
+
 def json_response(data: Any, status: int = 200) -> Response | tuple[Response, int]:
     """
     创建JSON响应，使用自定义编码器处理Enum等特殊类型
@@ -82,8 +106,7 @@ def json_response(data: Any, status: int = 200) -> Response | tuple[Response, in
     Returns:
         Flask Response对象，或者Response和状态码的元组（当状态码不是200时）
     """
-    json_str = json.dumps(data, cls=CustomJSONEncoder, ensure_ascii=False)
-    response = Response(json_str, status=status, mimetype="application/json")
+    response = Response(encode_json(data), status=status, mimetype="application/json")
     if status == 200:
         return response
     else:
@@ -109,22 +132,193 @@ class SimulationStateResponse(SerializableModel):
     floors: List[FloorState]
     passengers: Dict[int, PassengerInfo]
     metrics: PerformanceMetrics
+    # 开启tick阶段计时（--profile-ticks）时为当前运行的分阶段统计
+    tick_profile: Optional[Dict[str, Any]] = None
+
+
+# 新建模拟器是否默认开启tick阶段计时
+_tick_profiling_default = False
+
+
+def set_tick_profiling_default(enabled: bool) -> None:
+    """设置之后创建的模拟器（包括按会话创建的）是否开启tick阶段计时"""
+    global _tick_profiling_default
+    _tick_profiling_default = enabled
+
+
+# 新建模拟器的节奏模式（每秒tick数），None 表示由客户端步进
+_pacing_default: Optional[float] = None
+
+
+def set_pacing_default(ticks_per_second: Optional[float]) -> None:
+    """设置之后创建的模拟器（包括按会话创建的）是否按墙钟节奏推进"""
+    global _pacing_default
+    _pacing_default = ticks_per_second
+
+
+# 是否允许通过 /api/pacing 开启节奏模式（分片worker串行处理请求，不允许）
+_pacing_available = True
+
+
+def set_pacing_available(available: bool) -> None:
+    """设置本进程的会话能否开启节奏模式"""
+    global _pacing_available
+    _pacing_available = available
+
+
+# 新建模拟器的生成器流量（GeneratorTrafficSource 的参数），None 表示从流量目录加载
+_soak_default: Optional[Dict[str, Any]] = None
+
+# 无结束时间的流量来源（浸泡测试）使用的最大时长
+UNBOUNDED_DURATION_TICKS = sys.maxsize
+
+
+def set_soak_default(spec: Optional[Dict[str, Any]]) -> None:
+    """设置之后创建的模拟器是否改用生成器流量，spec 为 GeneratorTrafficSource 的关键字参数"""
+    global _soak_default
+    _soak_default = spec
+
+
+class CompletedPassengerStats:
+    """
+    已移除的已完成乘客的累计指标（浸泡测试使用）
+
+    等待时间是整数tick，按取值计数，内存只取决于等待时间的取值范围而与乘客数无关；
+    由计数得到的平均值和排除最长5%后的平均值与按乘客逐个计算的结果相同。
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.floor_wait_times: "Counter[int]" = Counter()
+        self.arrival_wait_times: "Counter[int]" = Counter()
+
+    def add(self, passenger: PassengerInfo) -> None:
+        self.count += 1
+        self.floor_wait_times[passenger.floor_wait_time] += 1
+        self.arrival_wait_times[passenger.arrival_wait_time] += 1
+
+    def metrics(self, passengers: Collection[PassengerInfo]) -> PerformanceMetrics:
+        """合并仍保留的乘客，计算与 calculate_passenger_metrics 相同的指标"""
+        floor_wait_times = self.floor_wait_times.copy()
+        arrival_wait_times = self.arrival_wait_times.copy()
+        completed = self.count
+        for passenger in passengers:
+            if passenger.status == PassengerStatus.COMPLETED:
+                completed += 1
+                floor_wait_times[passenger.floor_wait_time] += 1
+                arrival_wait_times[passenger.arrival_wait_time] += 1
+        if not completed:
+            return calculate_passenger_metrics(passengers)
+
+        def average_excluding_top_percent(counts: "Counter[int]", exclude_percent: int) -> float:
+            keep_count = int(completed * (100 - exclude_percent) / 100)
+            if keep_count == 0:
+                return 0.0
+            total, remaining = 0, keep_count
+            for value in sorted(counts):
+                taken = min(counts[value], remaining)
+                total += value * taken
+                remaining -= taken
+                if not remaining:
+                    break
+            return total / keep_count
+
+        return PerformanceMetrics(
+            completed_passengers=completed,
+            total_passengers=self.count + len(passengers),
+            average_floor_wait_time=sum(v * c for v, c in floor_wait_times.items()) / completed,
+            p95_floor_wait_time=average_excluding_top_percent(floor_wait_times, 5),
+            average_arrival_wait_time=sum(v * c for v, c in arrival_wait_times.items()) / completed,
+            p95_arrival_wait_time=average_excluding_top_percent(arrival_wait_times, 5),
+        )
+
+
+def calculate_passenger_metrics(passengers: Collection[PassengerInfo]) -> PerformanceMetrics:
+    """按乘客计算性能指标（模拟器状态接口和分时段评估的拼接结果都使用它）"""
+    # 直接从乘客中筛选已完成的乘客
+    completed = [p for p in passengers if p.status == PassengerStatus.COMPLETED]
+
+    total_passengers = len(passengers)
+    if not completed:
+        return PerformanceMetrics(
+            completed_passengers=0,
+            total_passengers=total_passengers,
+            average_floor_wait_time=0,
+            p95_floor_wait_time=0,
+            average_arrival_wait_time=0,
+            p95_arrival_wait_time=0,
+        )
+
+    floor_wait_times = [float(p.floor_wait_time) for p in completed]
+    arrival_wait_times = [float(p.arrival_wait_time) for p in completed]
+
+    def average_excluding_top_percent(data: List[float], exclude_percent: int) -> float:
+        """计算排除掉最长的指定百分比后的平均值"""
+        if not data:
+            return 0.0
+        sorted_data = sorted(data)
+        # 计算要保留的数据数量（排除掉最长的 exclude_percent）
+        keep_count = int(len(sorted_data) * (100 - exclude_percent) / 100)
+        if keep_count == 0:
+            return 0.0
+        # 只保留前 keep_count 个数据，排除最长的部分
+        kept_data = sorted_data[:keep_count]
+        return sum(kept_data) / len(kept_data)
+
+    return PerformanceMetrics(
+        completed_passengers=len(completed),
+        total_passengers=total_passengers,
+        average_floor_wait_time=sum(floor_wait_times) / len(floor_wait_times) if floor_wait_times else 0,
+        p95_floor_wait_time=average_excluding_top_percent(floor_wait_times, 5),
+        average_arrival_wait_time=sum(arrival_wait_times) / len(arrival_wait_times) if arrival_wait_times else 0,
+        p95_arrival_wait_time=average_excluding_top_percent(arrival_wait_times, 5),
+    )
 
 
 class ElevatorSimulation:
-    traffic_queue: List[TrafficEntry]  # type: ignore
+    # 乘客到达来源，每个tick取出到达的乘客
+    traffic_source: TrafficSource
     next_passenger_id: int
     max_duration_ticks: int
 
-    def __init__(self, traffic_dir: str, _init_only: bool = False):
+    def __init__(self, traffic_dir: Optional[str], _init_only: bool = False):
         if _init_only:
             return
         self.lock = threading.Lock()
-        self.traffic_dir = Path(traffic_dir)
+        self.tick_profiler: Optional[TickPhaseProfiler] = TickPhaseProfiler() if _tick_profiling_default else None
+        # 上一次完整运行（到达最大时长）的分阶段统计
+        self.last_run_tick_profile: Optional[Dict[str, Any]] = None
+        # 为None时不扫描流量目录，流量通过 load_traffic_data 提供
+        self.traffic_dir = Path(traffic_dir) if traffic_dir is not None else None
         self.current_traffic_index = 0
         self.traffic_files: List[Path] = []
+        # 流量目录的共享解析缓存（所有会话共用），见 traffic/corpus.py
+        self.traffic_corpus: Optional[TrafficCorpus] = None
         self.state: SimulationState = create_empty_simulation_state(2, 1, 1)
-        self._load_traffic_files()
+        # 接口线程提交的电梯命令，在 _process_tick 开始时由持有 self.lock 的步进线程统一应用
+        self._commands: "queue.SimpleQueue[Tuple[int, int, bool]]" = queue.SimpleQueue()
+        # 节奏模式：后台线程按墙钟推进，见 server/pacing.py
+        self.pacer: Optional[TickPacer] = TickPacer(self, _pacing_default) if _pacing_default else None
+        self.next_passenger_id = 1
+        self.traffic_source = ArrayTrafficSource.empty()
+        self.max_duration_ticks = 0
+        # 无结束时间的流量来源（浸泡测试）：已完成的乘客在下一次步进开始时并入累计指标并移除，
+        # 上一次步进的事件同时丢弃，使内存不随运行时长增长；有结束时间时为 None
+        self.completed_stats: Optional[CompletedPassengerStats] = None
+        self._alighted: List[int] = []
+        # 生成器流量的参数；设置时不读取流量目录，切换轮次时从头重新生成
+        self.soak_spec = _soak_default
+        if self.soak_spec is not None:
+            self.load_traffic_source(GeneratorTrafficSource(**self.soak_spec))
+        elif self.traffic_dir is not None:
+            self._load_traffic_files()
+
+    @classmethod
+    def from_traffic_data(cls, file_data: Dict[str, Any]) -> "ElevatorSimulation":
+        """直接从内存中的流量数据创建模拟器（不读取流量目录），用于基准测试和内联流量"""
+        sim = cls(None)
+        sim.load_traffic_data(file_data)
+        return sim
 
     @property
     def tick(self) -> int:
@@ -147,14 +341,11 @@ class ElevatorSimulation:
         return self.state.passengers
 
     def _load_traffic_files(self) -> None:
-        """扫描traffic目录，加载所有json文件列表"""
-        # 查找所有json文件
-        for file_path in self.traffic_dir.glob("*.json"):
-            if file_path.is_file():
-                self.traffic_files.append(file_path)
-        # 按文件名排序
-        self.traffic_files.sort()
-        server_debug_log(f"Found {len(self.traffic_files)} traffic files: {[f.name for f in self.traffic_files]}")
+        """扫描traffic目录，使用该目录的共享解析缓存（json和二进制流量文件，同名时使用二进制文件）"""
+        assert self.traffic_dir is not None
+        self.traffic_corpus = shared_traffic_corpus(self.traffic_dir)
+        self.traffic_files = list(self.traffic_corpus.files)
+        server_debug_log("Found %d traffic files: %s", len(self.traffic_files), [f.name for f in self.traffic_files])
         # 如果有文件，加载第一个
         if self.traffic_files:
             self.load_current_traffic()
@@ -166,38 +357,48 @@ class ElevatorSimulation:
             return
 
         if self.current_traffic_index >= len(self.traffic_files):
-            server_debug_log(f"Traffic index {self.current_traffic_index} out of range")
+            server_debug_log("Traffic index %d out of range", self.current_traffic_index)
             return
 
         traffic_file = self.traffic_files[self.current_traffic_index]
-        server_debug_log(f"Loading traffic from {traffic_file.name}")
+        server_debug_log("Loading traffic from %s", traffic_file.name)
         try:
-            with open(traffic_file, "r", encoding="utf-8") as f:
-                file_data = json.load(f)
-            building_config = file_data["building"]
-            server_debug_log(f"Building config: {building_config}")
-            self.state = create_empty_simulation_state(
-                building_config["elevators"], building_config["floors"], building_config["elevator_capacity"]
-            )
-            self.reset()
-            self.max_duration_ticks = building_config["duration"]
-            traffic_data: list[Dict[str, Any]] = file_data["traffic"]
-            traffic_data.sort(key=lambda t: cast(int, t["tick"]))
-            for entry in traffic_data:
-                traffic_entry = TrafficEntry(
-                    id=self.next_passenger_id,
-                    origin=entry["origin"],
-                    destination=entry["destination"],
-                    tick=entry["tick"],
-                )
-                self.traffic_queue.append(traffic_entry)
-                self.next_passenger_id += 1
-
+            if self.traffic_corpus is not None:
+                # 共享已解析的只读数组，只新建游标；同时在后台预取下一轮的文件
+                self.load_traffic_source(self.traffic_corpus.source(self.current_traffic_index))
+            else:
+                self.load_traffic_source(open_traffic_source(traffic_file))
         except Exception as e:
-            server_debug_log(f"Error loading traffic file {traffic_file}: {e}")
+            server_debug_log("Error loading traffic file %s: %s", traffic_file, e)
+
+    def load_traffic_data(self, file_data: Dict[str, Any]) -> None:
+        """
+        从内存中的流量数据（与流量文件格式相同的 {"building": ..., "traffic": [...]}）加载建筑和乘客，
+        不经过文件系统
+        """
+        self.load_traffic_source(ArrayTrafficSource.from_traffic_data(file_data))
+
+    def load_traffic_source(self, source: TrafficSource) -> None:
+        """
+        按流量来源的建筑配置重建模拟器并开始从该来源取乘客；
+        来源没有结束时间时最大时长为 UNBOUNDED_DURATION_TICKS
+        """
+        building_config = source.building
+        server_debug_log("Building config: %s", building_config)
+        self.state = create_empty_simulation_state(
+            building_config["elevators"], building_config["floors"], building_config["elevator_capacity"]
+        )
+        self.reset()
+        duration = source.duration
+        self.max_duration_ticks = UNBOUNDED_DURATION_TICKS if duration is None else duration
+        self.completed_stats = CompletedPassengerStats() if duration is None else None
+        self.traffic_source = source
 
     def next_traffic_round(self, full_reset: bool = False) -> bool:
         """切换到下一个流量文件，返回是否成功切换"""
+        if self.soak_spec is not None:
+            self.load_traffic_source(GeneratorTrafficSource(**self.soak_spec))
+            return True
         if not self.traffic_files:
             return False
 
@@ -213,36 +414,58 @@ class ElevatorSimulation:
         self.load_current_traffic()  # 加载新的流量文件
         return True
 
+    def select_traffic_file(self, name: str) -> bool:
+        """切换到流量目录中名为 name 的文件（完整文件名或不含扩展名），返回是否找到"""
+        for index, path in enumerate(self.traffic_files):
+            if name in (path.name, path.stem):
+                self.current_traffic_index = index
+                self.load_current_traffic()
+                return True
+        return False
+
     def load_traffic(self, traffic_file: str) -> None:
         """Load passenger traffic from JSON file using unified data models"""
         with open(traffic_file, "r") as f:
             traffic_data = json.load(f)
 
-        server_debug_log(f"Loading traffic from {traffic_file}, {len(traffic_data)} entries")
+        server_debug_log("Loading traffic from %s, %d entries", traffic_file, len(traffic_data))
 
-        self.traffic_queue: List[TrafficEntry] = []  # type: ignore[reportRedeclaration]
+        ids = []
         for entry in traffic_data:
-            # Create TrafficEntry from JSON data
-            traffic_entry = TrafficEntry(
-                id=entry.get("id", self.next_passenger_id),
-                origin=entry["origin"],
-                destination=entry["destination"],
-                tick=entry["tick"],
-            )
-            self.traffic_queue.append(traffic_entry)
-            self.next_passenger_id = max(self.next_passenger_id, traffic_entry.id + 1)
+            passenger_id = entry.get("id", self.next_passenger_id)
+            ids.append(passenger_id)
+            self.next_passenger_id = max(self.next_passenger_id, passenger_id + 1)
 
         # Sort by arrival time
-        self.traffic_queue.sort(key=lambda p: p.tick)
-        server_debug_log(f"Traffic loaded and sorted, next passenger ID: {self.next_passenger_id}")
+        ticks = np.array([entry["tick"] for entry in traffic_data], dtype=np.int64)
+        order = np.argsort(ticks, kind="stable")
+        self.traffic_source = ArrayTrafficSource(
+            {"duration": self.max_duration_ticks},
+            ticks[order],
+            np.array([entry["origin"] for entry in traffic_data], dtype=np.int64)[order],
+            np.array([entry["destination"] for entry in traffic_data], dtype=np.int64)[order],
+            np.array(ids, dtype=np.int64)[order],
+        )
+        server_debug_log("Traffic loaded and sorted, next passenger ID: %d", self.next_passenger_id)
 
     def _emit_event(self, event_type: EventType, data: Dict[str, Any]) -> None:
         """Emit an event to be sent to clients using unified data models"""
         self.state.add_event(event_type, data)
-        server_debug_log(f"Event emitted: {event_type.value} with data {data}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Event emitted: %s with data %s", event_type.value, data)
+
+    def step(self, num_ticks: int = 1, until_events: Optional[Set[EventType]] = None) -> List[SimulationEvent]:
+        """
+        推进模拟
 
-    def step(self, num_ticks: int = 1) -> List[SimulationEvent]:
+        Args:
+            num_ticks: 最多推进的tick数
+            until_events: 若提供，则在某个tick产生其中任意类型的事件后立即停止，
+                到达最大时长时也会停止；num_ticks 此时作为截止期限
+        """
         with self.lock:
+            if self.completed_stats is not None:
+                self._release_soak_history(self.completed_stats)
             new_events: List[SimulationEvent] = []
             for _ in range(num_ticks):
                 self.state.tick += 1
@@ -255,16 +478,41 @@ class ElevatorSimulation:
                 if self.tick >= self.max_duration_ticks:
                     completed_count = self.force_complete_remaining_passengers()
                     if completed_count > 0:
-                        server_debug_log(f"模拟结束，强制完成了 {completed_count} 个乘客")
+                        server_debug_log("模拟结束，强制完成了 %d 个乘客", completed_count)
+                    if self.tick_profiler is not None and self.tick == self.max_duration_ticks:
+                        self._finish_tick_profile()
 
-            server_debug_log(f"Step completed - Final tick: {self.tick}, Total events: {len(new_events)}")
+                if until_events is not None:
+                    if self.tick >= self.max_duration_ticks:
+                        break
+                    if any(event.type in until_events for event in tick_events):
+                        break
+
+            server_debug_log("Step completed - Final tick: %d, Total events: %d", self.tick, len(new_events))
             return new_events
 
+    def _release_soak_history(self, completed_stats: CompletedPassengerStats) -> None:
+        """
+        浸泡测试：上一次步进中下车的乘客并入累计指标后移除，上一次步进的事件已返回给客户端，一并丢弃
+
+        推迟到下一次步进，客户端处理下车事件时仍能在状态中查到这些乘客。
+        """
+        passengers = self.passengers
+        for passenger_id in self._alighted:
+            completed_stats.add(passengers.pop(passenger_id))
+        self._alighted.clear()
+        self.state.events.clear()
+
     def _process_tick(self) -> List[SimulationEvent]:
         """
         Process one simulation tick
         每个tick先发生事件，再发生动作
         """
+        # 0. 应用上一个tick之后收到的命令
+        if not self._commands.empty():
+            self._apply_commands()
+        if self.tick_profiler is not None:
+            return self._process_tick_profiled(self.tick_profiler)
         events_start = len(self.state.events)
         self._update_elevator_status()
 
@@ -280,6 +528,40 @@ class ElevatorSimulation:
         # Return events generated this tick
         return self.state.events[events_start:]
 
+    def _process_tick_profiled(self, profiler: TickPhaseProfiler) -> List[SimulationEvent]:
+        """与 _process_tick 相同，额外记录各阶段耗时和事件数"""
+        clock = time.perf_counter_ns
+        events = self.state.events
+        timestamps = [clock()]
+        marks = [len(events)]
+        for phase in (
+            self._update_elevator_status,
+            self._process_arrivals,
+            self._move_elevators,
+            self._process_elevator_stops,
+        ):
+            phase()
+            timestamps.append(clock())
+            marks.append(len(events))
+        profiler.record_tick(timestamps, marks, events)
+        return events[marks[0] :]
+
+    def enable_tick_profiling(self, enabled: bool = True) -> None:
+        """开启或关闭本模拟器的tick阶段计时"""
+        with self.lock:
+            self.tick_profiler = TickPhaseProfiler() if enabled else None
+
+    def _finish_tick_profile(self) -> None:
+        """一次运行结束：保存并记录分阶段统计摘要"""
+        assert self.tick_profiler is not None
+        self.last_run_tick_profile = self.tick_profiler.to_dict()
+        traffic_name = (
+            self.traffic_files[self.current_traffic_index].name
+            if 0 <= self.current_traffic_index < len(self.traffic_files)
+            else "traffic"
+        )
+        logger.info("%s", self.tick_profiler.summary(f"Tick phase profile: {traffic_name}"))
+
     def _process_passenger_in(self, elevator: ElevatorState) -> None:
         current_floor = elevator.current_floor
         # 处于Stopped状态，方向也已经清空，说明没有调度。
@@ -331,25 +613,31 @@ class ElevatorSimulation:
             elif elevator.run_status == ElevatorStatus.START_UP:
                 # 从启动状态切换到匀速
                 elevator.run_status = ElevatorStatus.CONSTANT_SPEED
-            server_debug_log(
-                f"电梯{elevator.id} 状态:{old_status}->{elevator.run_status.value} 方向:{elevator.target_floor_direction.value} "
-                f"位置:{elevator.position.current_floor_float:.1f} 目标:{target_floor}"
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "电梯%d 状态:%s->%s 方向:%s 位置:%.1f 目标:%s",
+                    elevator.id,
+                    old_status,
+                    elevator.run_status.value,
+                    elevator.target_floor_direction.value,
+                    elevator.position.current_floor_float,
+                    target_floor,
+                )
         # START_DOWN状态会在到达目标时在_move_elevators中切换为STOPPED
 
     def _process_arrivals(self) -> None:  # OK
         """Process new passenger arrivals"""
-        while self.traffic_queue and self.traffic_queue[0].tick <= self.tick:
-            traffic_entry = self.traffic_queue.pop(0)
+        ids, origins, destinations = self.traffic_source.take_until(self.tick)
+        for passenger_id, origin, destination in zip(ids, origins, destinations):
             passenger = PassengerInfo(
-                id=traffic_entry.id,
-                origin=traffic_entry.origin,
-                destination=traffic_entry.destination,
+                id=passenger_id,
+                origin=origin,
+                destination=destination,
                 arrive_tick=self.tick,
             )
-            assert traffic_entry.origin != traffic_entry.destination, f"乘客{passenger.id}目的地和起始地{traffic_entry.origin}重复"
+            assert origin != destination, f"乘客{passenger.id}目的地和起始地{origin}重复"
             self.passengers[passenger.id] = passenger
-            server_debug_log(f"乘客 {passenger.id:4}： 创建 | {passenger}")
+            server_debug_log("乘客 %4d： 创建 | %s", passenger.id, passenger)
             if passenger.destination > passenger.origin:
                 self.floors[passenger.origin].up_queue.append(passenger.id)
                 self._emit_event(EventType.UP_BUTTON_PRESSED, {"floor": passenger.origin, "passenger": passenger.id})
@@ -447,6 +735,8 @@ class ElevatorSimulation:
                     passengers_to_remove.append(passenger_id)
 
             # Remove passengers who alighted
+            if self.completed_stats is not None:
+                self._alighted.extend(passengers_to_remove)
             for passenger_id in passengers_to_remove:
                 elevator.passengers.remove(passenger_id)
                 self._emit_event(
@@ -467,19 +757,19 @@ class ElevatorSimulation:
         """
         original_target_floor = elevator.target_floor
         elevator.position.target_floor = floor
-        server_debug_log(f"电梯 E{elevator.id} 被设定为前往 F{floor}")
+        server_debug_log("电梯 E%d 被设定为前往 F%d", elevator.id, floor)
         new_target_floor_should_accel = self._should_start_deceleration(elevator)
         if not new_target_floor_should_accel:
             if elevator.run_status == ElevatorStatus.START_DOWN:  # 不应该加速但是加了
                 elevator.run_status = ElevatorStatus.CONSTANT_SPEED
-                server_debug_log(f"电梯 E{elevator.id} 被设定为匀速")
+                server_debug_log("电梯 E%d 被设定为匀速", elevator.id)
         elif new_target_floor_should_accel:
             if elevator.run_status == ElevatorStatus.CONSTANT_SPEED:  # 应该减速了，但是之前是匀速
                 elevator.run_status = ElevatorStatus.START_DOWN
-                server_debug_log(f"电梯 E{elevator.id} 被设定为减速")
+                server_debug_log("电梯 E%d 被设定为减速", elevator.id)
         if elevator.current_floor != floor or elevator.position.floor_up_position != 0:
             old_status = elevator.run_status.value
-            server_debug_log(f"电梯{elevator.id} 状态:{old_status}->{elevator.run_status.value}")
+            server_debug_log("电梯%d 状态:%s->%s", elevator.id, old_status, elevator.run_status.value)
 
     def _calculate_distance_to_target(self, elevator: ElevatorState) -> float:
         """计算到目标楼层的距离（以floor_up_position为单位）"""
@@ -508,9 +798,30 @@ class ElevatorSimulation:
         distance = self._calculate_distance_to_near_stop(elevator)
         return distance == 1
 
+    def submit_command(self, elevator_id: int, floor: int, immediate: bool = False) -> None:
+        """
+        提交电梯命令（任意线程，不加锁），在下一个tick开始时生效
+
+        接口线程只向队列写入，不直接修改电梯状态，因此不会与步进争用 self.lock
+        """
+        self._commands.put((elevator_id, floor, immediate))
+
+    def _apply_commands(self) -> None:
+        """按到达顺序应用队列中的全部命令（在 _process_tick 中调用，已持有 self.lock）"""
+        commands = self._commands
+        while True:
+            try:
+                elevator_id, floor, immediate = commands.get_nowait()
+            except queue.Empty:
+                return
+            self.elevator_go_to_floor(elevator_id, floor, immediate)
+
     def elevator_go_to_floor(self, elevator_id: int, floor: int, immediate: bool = False) -> None:
         """
         设置电梯去向，是生命周期开始，分配目的地
+
+        直接修改电梯状态，只能在持有 self.lock 的线程中调用（或单线程使用模拟器时）；
+        接口请求使用 submit_command
         """
         if 0 <= elevator_id < len(self.elevators) and 0 <= floor < len(self.floors):
             elevator = self.elevators[elevator_id]
@@ -518,7 +829,7 @@ class ElevatorSimulation:
                 self._set_elevator_target_floor(elevator, floor)
             else:
                 elevator.next_target_floor = floor
-                server_debug_log(f"电梯 E{elevator_id} 下一目的地设定为 F{floor}")
+                server_debug_log("电梯 E%d 下一目的地设定为 F%d", elevator_id, floor)
 
     def get_state(self) -> SimulationStateResponse:
         """Get complete simulation state"""
@@ -532,59 +843,30 @@ class ElevatorSimulation:
                 floors=self.floors,
                 passengers=self.passengers,
                 metrics=metrics,
+                tick_profile=self.tick_profiler.to_dict() if self.tick_profiler is not None else None,
             )
 
     def _calculate_metrics(self) -> PerformanceMetrics:
         """Calculate performance metrics"""
-        # 直接从state中筛选已完成的乘客
-        completed = [p for p in self.state.passengers.values() if p.status == PassengerStatus.COMPLETED]
-
-        total_passengers = len(self.state.passengers)
-        if not completed:
-            return PerformanceMetrics(
-                completed_passengers=0,
-                total_passengers=total_passengers,
-                average_floor_wait_time=0,
-                p95_floor_wait_time=0,
-                average_arrival_wait_time=0,
-                p95_arrival_wait_time=0,
-            )
-
-        floor_wait_times = [float(p.floor_wait_time) for p in completed]
-        arrival_wait_times = [float(p.arrival_wait_time) for p in completed]
-
-        def average_excluding_top_percent(data: List[float], exclude_percent: int) -> float:
-            """计算排除掉最长的指定百分比后的平均值"""
-            if not data:
-                return 0.0
-            sorted_data = sorted(data)
-            # 计算要保留的数据数量（排除掉最长的 exclude_percent）
-            keep_count = int(len(sorted_data) * (100 - exclude_percent) / 100)
-            if keep_count == 0:
-                return 0.0
-            # 只保留前 keep_count 个数据，排除最长的部分
-            kept_data = sorted_data[:keep_count]
-            return sum(kept_data) / len(kept_data)
-
-        return PerformanceMetrics(
-            completed_passengers=len(completed),
-            total_passengers=total_passengers,
-            average_floor_wait_time=sum(floor_wait_times) / len(floor_wait_times) if floor_wait_times else 0,
-            p95_floor_wait_time=average_excluding_top_percent(floor_wait_times, 5),
-            average_arrival_wait_time=sum(arrival_wait_times) / len(arrival_wait_times) if arrival_wait_times else 0,
-            p95_arrival_wait_time=average_excluding_top_percent(arrival_wait_times, 5),
-        )
+        if self.completed_stats is not None:
+            return self.completed_stats.metrics(self.state.passengers.values())
+        return calculate_passenger_metrics(self.state.passengers.values())
 
     def get_events(self, since_tick: int = 0) -> List[SimulationEvent]:
         """Get events since specified tick"""
         return [e for e in self.state.events if e.tick > since_tick]
 
     def get_traffic_info(self) -> Dict[str, Any]:
-        return {
+        info: Dict[str, Any] = {
             "current_index": self.current_traffic_index,
             "total_files": len(self.traffic_files),
             "max_tick": self.max_duration_ticks,
         }
+        if self.last_run_tick_profile is not None:
+            info["last_run_tick_profile"] = self.last_run_tick_profile
+        if isinstance(self.traffic_source, GeneratorTrafficSource):
+            info["generator"] = self.traffic_source.to_dict()
+        return info
 
     def force_complete_remaining_passengers(self) -> int:
         """强制完成所有未完成的乘客，返回完成的乘客数量"""
@@ -597,104 +879,355 @@ class ElevatorSimulation:
                 passenger.pickup_tick = current_tick
         return completed_count
 
+    def set_pacing(self, ticks_per_second: Optional[float]) -> None:
+        """开启（每秒tick数）或关闭（None）节奏模式"""
+        if self.pacer is not None:
+            self.pacer.disarm()
+        self.pacer = TickPacer(self, ticks_per_second) if ticks_per_second else None
+
     def reset(self) -> None:
         """Reset simulation to initial state"""
+        if self.pacer is not None:
+            # 先停止节奏线程，它在步进时持有 self.lock
+            self.pacer.disarm()
         with self.lock:
             self.state = create_empty_simulation_state(
                 len(self.elevators), len(self.floors), self.elevators[0].max_capacity
             )
-            self.traffic_queue: List[TrafficEntry] = []
+            # 丢弃针对上一次运行的命令
+            self._commands = queue.SimpleQueue()
             self.max_duration_ticks = 0
+            self.completed_stats = None
+            self._alighted = []
             self.next_passenger_id = 1
+            self.traffic_source = ArrayTrafficSource.empty()
+            if self.tick_profiler is not None:
+                self.tick_profiler.reset()
 
 
 # Global simulation instance for Flask routes
 simulation: ElevatorSimulation = ElevatorSimulation("", _init_only=True)
 
+# 默认流量目录，按会话创建的模拟器也从这里加载
+DEFAULT_TRAFFIC_DIR = os.path.join(os.path.dirname(__file__), "..", "traffic")
+
+# 会话：请求头 X-Session-Id 指定会话，每个会话拥有独立的模拟器；
+# 未指定或为 "default" 时使用全局 simulation
+_sessions: Dict[str, ElevatorSimulation] = {}
+_sessions_lock = threading.Lock()
+_session_traffic_dir: str = DEFAULT_TRAFFIC_DIR
+
+
+def set_session_traffic_dir(traffic_dir: str) -> None:
+    """设置新会话加载流量文件的目录"""
+    global _session_traffic_dir
+    _session_traffic_dir = traffic_dir
+
+
+def get_simulation(session_id: Optional[str] = None) -> ElevatorSimulation:
+    """获取会话对应的模拟器，首次访问时创建"""
+    if not session_id or session_id == DEFAULT_SESSION_ID:
+        return simulation
+    sim = _sessions.get(session_id)
+    if sim is None:
+        with _sessions_lock:
+            sim = _sessions.get(session_id)
+            if sim is None:
+                sim = _sessions[session_id] = ElevatorSimulation(_session_traffic_dir)
+                server_debug_log("Session %s created", session_id)
+    return sim
+
+
+def close_session(session_id: str) -> bool:
+    """释放会话的模拟器，返回会话是否存在"""
+    with _sessions_lock:
+        return _sessions.pop(session_id, None) is not None
+
+
 # Create Flask app
 app = Flask(__name__)
 
 
+@app.before_request
+def before_request() -> None:
+    g.perf_start = time.perf_counter()
+
+
 # Configure CORS
 @app.after_request
 def after_request(response: Response) -> Response:
+    if request.path != PERF_PATH:
+        # 按匹配的路由规则归类（如 /api/elevators/<int:elevator_id>/go_to_floor），未匹配的请求归为一类
+        metrics.record(
+            request.method,
+            request.url_rule.rule if request.url_rule is not None else UNMATCHED_ROUTE,
+            response.status_code,
+            request.content_length or 0,
+            response.content_length or 0,
+            time.perf_counter() - g.perf_start,
+        )
     response.headers.add("Access-Control-Allow-Origin", "*")
-    response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
+    response.headers.add("Access-Control-Allow-Headers", f"Content-Type,Authorization,{SESSION_HEADER}")
     response.headers.add("Access-Control-Allow-Methods", "GET,PUT,POST,DELETE,OPTIONS")
     return response
 
 
-@app.route("/api/state", methods=["GET"])
-def get_state() -> Response | tuple[Response, int]:
+# 与Web框架无关的接口处理函数：输入会话的模拟器和请求体，返回 (响应数据, 状态码)。
+# Flask路由、标准库后端（http_backend.py）和分片worker（sharded.py）共用这些函数。
+ApiResult = Tuple[Any, int]
+
+# 节奏模式下 /api/step 等待下一个tick的最长时间（秒）
+PACED_STEP_TIMEOUT = 30.0
+
+
+def api_get_state(sim: ElevatorSimulation, data: Dict[str, Any]) -> ApiResult:
+    return sim.get_state(), 200
+
+
+def api_step(sim: ElevatorSimulation, data: Dict[str, Any]) -> ApiResult:
+    if sim.pacer is not None:
+        # 节奏模式：模拟由后台线程推进，这里等待下一个tick并返回之前积累的事件
+        tick, events = sim.pacer.wait_step(PACED_STEP_TIMEOUT)
+        return {"tick": tick, "events": events}, 200
+    ticks = data.get("ticks", 1)
+    # 步进直到事件模式：ticks作为截止期限，遇到指定类型的事件即返回
+    until_events: Optional[Set[EventType]] = None
+    if data.get("until_events") is not None:
+        until_events = {EventType(value) for value in data["until_events"]}
+    # server_debug_log("")
+    # server_debug_log(f"HTTP /api/step request ----- ticks: {ticks}")
+    events = sim.step(ticks, until_events)
+    server_debug_log("HTTP /api/step response ----- tick: %d, events: %d\n", sim.tick, len(events))
+    return {"tick": sim.tick, "events": events}, 200
+
+
+def round_response(sim: ElevatorSimulation) -> Dict[str, Any]:
+    """重置/切换流量后的响应：直接带上新的初始状态和流量信息，客户端无需等待或再次轮询"""
+    return {"success": True, "state": sim.get_state(), "traffic": sim.get_traffic_info()}
+
+
+def api_reset(sim: ElevatorSimulation, data: Dict[str, Any]) -> ApiResult:
+    """
+    重置模拟；请求体可以同时指定新的流量：
+
+    - {"traffic": "up_peak"}：切换到流量目录中的文件（文件名，可省略扩展名）
+    - {"building": {...}, "traffic": {...} 或 [...]}：内联的建筑配置和流量，不读写文件，见 inline_traffic_source
+    """
+    traffic = data.get("traffic")
+    if traffic is None:
+        if data.get("building") is not None:
+            return {"error": "building requires traffic"}, 400
+        sim.reset()
+    elif isinstance(traffic, str):
+        if not sim.select_traffic_file(traffic):
+            return {"error": f"traffic file {traffic!r} not found"}, 404
+    else:
+        try:
+            source = inline_traffic_source(data.get("building"), traffic)
+        except ValueError as e:
+            return {"error": f"invalid inline traffic: {e}"}, 400
+        sim.load_traffic_source(source)
+    return round_response(sim), 200
+
+
+def api_go_to_floor(sim: ElevatorSimulation, data: Dict[str, Any], elevator_id: int) -> ApiResult:
+    floor = data["floor"]
+    immediate = data.get("immediate", False)
+    sim.submit_command(elevator_id, floor, immediate)
+    if sim.pacer is not None:
+        sim.pacer.record_command()
+    return {"success": True}, 200
+
+
+def api_next_traffic_round(sim: ElevatorSimulation, data: Dict[str, Any]) -> ApiResult:
+    """切换到下一个流量文件"""
+    success = sim.next_traffic_round(data["full_reset"])
+    if success:
+        return round_response(sim), 200
+    return {"success": False, "error": "No traffic files available"}, 400
+
+
+def api_get_traffic_info(sim: ElevatorSimulation, data: Dict[str, Any]) -> ApiResult:
+    """获取当前流量文件信息"""
+    return sim.get_traffic_info(), 200
+
+
+def api_get_pacing(sim: ElevatorSimulation, data: Dict[str, Any]) -> ApiResult:
+    """节奏模式统计：错过的决策期限、事件到命令的延迟等"""
+    if sim.pacer is None:
+        return {"enabled": False}, 200
+    return sim.pacer.to_dict(), 200
+
+
+def api_set_pacing(sim: ElevatorSimulation, data: Dict[str, Any]) -> ApiResult:
+    """开启或关闭本会话的节奏模式：{"ticks_per_second": 10} 或 {"ticks_per_second": null}"""
+    ticks_per_second = data.get("ticks_per_second")
+    if ticks_per_second is not None and (not isinstance(ticks_per_second, (int, float)) or ticks_per_second <= 0):
+        return {"error": "ticks_per_second must be a positive number or null"}, 400
+    if ticks_per_second is not None and not _pacing_available:
+        return {"error": "pacing is not available with --workers"}, 400
+    sim.set_pacing(ticks_per_second)
+    return api_get_pacing(sim, data)
+
+
+def api_admin_profile_start(sim: ElevatorSimulation, data: Dict[str, Any]) -> ApiResult:
+    """开始cProfile采集，覆盖接下来的 requests 个请求或 ticks 个tick"""
+    try:
+        return profiler_control.start(data.get("requests"), data.get("ticks"), str(data.get("label", ""))), 200
+    except (RuntimeError, ValueError) as e:
+        return {"error": str(e)}, 400
+
+
+def api_admin_profile_stop(sim: ElevatorSimulation, data: Dict[str, Any]) -> ApiResult:
+    """提前结束cProfile采集，写出 .pstats"""
+    try:
+        return profiler_control.stop(), 200
+    except RuntimeError as e:
+        return {"error": str(e)}, 400
+
+
+def api_admin_profile_status(sim: ElevatorSimulation, data: Dict[str, Any]) -> ApiResult:
+    return profiler_control.status(), 200
+
+
+def api_admin_tracemalloc_snapshot(sim: ElevatorSimulation, data: Dict[str, Any]) -> ApiResult:
+    """拍摄内存快照并与上一个快照比较，附带事件和乘客数量便于判断增长来源"""
+    extra = {"events": len(sim.state.events), "passengers": len(sim.passengers)}
+    return profiler_control.snapshot(sim.tick, int(data.get("top", 20)), int(data.get("frames", 1)), extra), 200
+
+
+def api_admin_tracemalloc_stop(sim: ElevatorSimulation, data: Dict[str, Any]) -> ApiResult:
+    return profiler_control.stop_tracemalloc(), 200
+
+
+API_ROUTES: Dict[Tuple[str, str], Callable[..., ApiResult]] = {
+    ("GET", "/api/state"): api_get_state,
+    ("POST", "/api/step"): api_step,
+    ("POST", "/api/reset"): api_reset,
+    ("POST", "/api/traffic/next"): api_next_traffic_round,
+    ("GET", "/api/traffic/info"): api_get_traffic_info,
+    ("GET", "/api/pacing"): api_get_pacing,
+    ("POST", "/api/pacing"): api_set_pacing,
+    ("POST", "/api/admin/profile/start"): api_admin_profile_start,
+    ("POST", "/api/admin/profile/stop"): api_admin_profile_stop,
+    ("GET", "/api/admin/profile"): api_admin_profile_status,
+    ("POST", "/api/admin/tracemalloc/snapshot"): api_admin_tracemalloc_snapshot,
+    ("POST", "/api/admin/tracemalloc/stop"): api_admin_tracemalloc_stop,
+}
+
+
+def resolve_route(method: str, path: str) -> Optional[Tuple[Callable[..., ApiResult], Tuple[Any, ...]]]:
+    """根据请求方法和路径查找处理函数及路径参数，未匹配时返回None"""
+    handler = API_ROUTES.get((method, path))
+    if handler is not None:
+        return handler, ()
+    # /api/elevators/<int:elevator_id>/go_to_floor
+    if method == "POST" and path.startswith("/api/elevators/") and path.endswith("/go_to_floor"):
+        elevator_id = path[len("/api/elevators/") : -len("/go_to_floor")]
+        if elevator_id.isdigit():
+            return api_go_to_floor, (int(elevator_id),)
+    return None
+
+
+def call_api(
+    handler: Callable[..., ApiResult], session_id: Optional[str], data: Dict[str, Any], *args: Any
+) -> ApiResult:
+    """在会话的模拟器上调用接口处理函数，异常转换为500错误响应"""
     try:
-        state = simulation.get_state()
-        return json_response(state)
+        sim = get_simulation(session_id)
+        if profiler_control.active and not handler.__name__.startswith("api_admin_"):
+            return profiler_control.run(handler, sim, data, *args)
+        return handler(sim, data, *args)
     except Exception as e:
-        return json_response({"error": str(e)}, 500)
+        return {"error": str(e)}, 500
+
+
+def dispatch_api(
+    method: str, path: str, data: Dict[str, Any], session_id: Optional[str] = None
+) -> Optional[ApiResult]:
+    """按方法和路径分发请求，未匹配的路由返回None"""
+    route = resolve_route(method, path)
+    if route is None:
+        return None
+    handler, args = route
+    return call_api(handler, session_id, data, *args)
+
+
+def handle_raw_request(method: str, path: str, body: bytes, session_id: Optional[str]) -> Tuple[bytes, int]:
+    """处理未解析的请求体并返回编码后的响应，供不经过Flask的后端使用"""
+    data: Dict[str, Any] = {}
+    if body:
+        try:
+            parsed = json.loads(body)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, dict):
+            data = parsed
+    result = dispatch_api(method, path, data, session_id)
+    if result is None:
+        return encode_json({"error": f"{method} {path} not found"}), 404
+    payload, status = result
+    return encode_json(payload), status
+
+
+def _flask_call(handler: Callable[..., ApiResult], *args: Any) -> Response | tuple[Response, int]:
+    data: Dict[str, Any] = request.get_json(silent=True) or {}
+    return json_response(*call_api(handler, request.headers.get(SESSION_HEADER), data, *args))
+
+
+@app.route(PERF_PATH, methods=["GET"])
+def get_perf() -> Response:
+    """按路由的请求计数、字节数和延迟统计；?format=prometheus 返回Prometheus文本格式"""
+    body, content_type = metrics.render(request.query_string.decode("latin-1"))
+    return Response(body, content_type=content_type)
+
+
+@app.route("/api/admin/<path:action>", methods=["GET", "POST"])
+def admin(action: str) -> Response | tuple[Response, int]:
+    """运行时采集接口（cProfile / tracemalloc），路由见 API_ROUTES"""
+    route = resolve_route(request.method, request.path)
+    if route is None:
+        return json_response({"error": f"{request.method} {request.path} not found"}, 404)
+    handler, args = route
+    return _flask_call(handler, *args)
+
+
+@app.route("/api/state", methods=["GET"])
+def get_state() -> Response | tuple[Response, int]:
+    return _flask_call(api_get_state)
 
 
 @app.route("/api/step", methods=["POST"])
 def step_simulation() -> Response | tuple[Response, int]:
-    try:
-        data: Dict[str, Any] = request.get_json() or {}
-        ticks = data.get("ticks", 1)
-        # server_debug_log("")
-        # server_debug_log(f"HTTP /api/step request ----- ticks: {ticks}")
-        events = simulation.step(ticks)
-        server_debug_log(f"HTTP /api/step response ----- tick: {simulation.tick}, events: {len(events)}\n")
-        return json_response(
-            {
-                "tick": simulation.tick,
-                "events": events,
-            }
-        )
-    except Exception as e:
-        return json_response({"error": str(e)}, 500)
+    return _flask_call(api_step)
 
 
 @app.route("/api/reset", methods=["POST"])
 def reset_simulation() -> Response | tuple[Response, int]:
-    try:
-        simulation.reset()
-        return json_response({"success": True})
-    except Exception as e:
-        return json_response({"error": str(e)}, 500)
+    return _flask_call(api_reset)
 
 
 @app.route("/api/elevators/<int:elevator_id>/go_to_floor", methods=["POST"])
 def elevator_go_to_floor(elevator_id: int) -> Response | tuple[Response, int]:
-    try:
-        data: Dict[str, Any] = request.get_json() or {}
-        floor = data["floor"]
-        immediate = data.get("immediate", False)
-        simulation.elevator_go_to_floor(elevator_id, floor, immediate)
-        return json_response({"success": True})
-    except Exception as e:
-        return json_response({"error": str(e)}, 500)
+    return _flask_call(api_go_to_floor, elevator_id)
 
 
 @app.route("/api/traffic/next", methods=["POST"])
 def next_traffic_round() -> Response | tuple[Response, int]:
     """切换到下一个流量文件"""
-    try:
-        full_reset = request.get_json()["full_reset"]
-        success = simulation.next_traffic_round(full_reset)
-        if success:
-            return json_response({"success": True})
-        else:
-            return json_response({"success": False, "error": "No traffic files available"}, 400)
-    except Exception as e:
-        return json_response({"error": str(e)}, 500)
+    return _flask_call(api_next_traffic_round)
 
 
 @app.route("/api/traffic/info", methods=["GET"])
 def get_traffic_info() -> Response | tuple[Response, int]:
     """获取当前流量文件信息"""
-    try:
-        info = simulation.get_traffic_info()
-        return json_response(info)
-    except Exception as e:
-        return json_response({"error": str(e)}, 500)
+    return _flask_call(api_get_traffic_info)
+
+
+@app.route("/api/pacing", methods=["GET", "POST"])
+def pacing() -> Response | tuple[Response, int]:
+    """节奏模式的统计和开关"""
+    return _flask_call(api_get_pacing if request.method == "GET" else api_set_pacing)
 
 
 def main() -> None:
@@ -703,24 +1236,137 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Elevator Simulation Server")
     parser.add_argument("--host", default="127.0.0.1", help="Server host")
     parser.add_argument("--port", type=int, default=8000, help="Server port")
-    parser.add_argument("--debug", default=True, action="store_true", help="Enable debug logging")
+    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    parser.add_argument("--log-level", default="INFO", help="Log level for elevator_saga loggers")
+    parser.add_argument(
+        "--log-module",
+        action="append",
+        default=[],
+        metavar="NAME=LEVEL",
+        help="Per-module log level, e.g. elevator_saga.server.simulator=DEBUG (repeatable)",
+    )
+    parser.add_argument("--access-log", action="store_true", help="Log every HTTP request")
+    parser.add_argument(
+        "--backend",
+        choices=["flask", "stdlib"],
+        default="flask",
+        help="HTTP server: flask (development server) or stdlib (ThreadingHTTPServer, lower per-request overhead)",
+    )
+    parser.add_argument(
+        "--profile-ticks",
+        action="store_true",
+        help="Time each _process_tick phase; exposed as tick_profile in /api/state and logged per run",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default=profiler_control.output_dir,
+        help="Directory for .pstats and tracemalloc JSON written by /api/admin endpoints",
+    )
+    parser.add_argument(
+        "--pace",
+        type=float,
+        default=None,
+        metavar="TPS",
+        help="Advance every simulation on a wall-clock schedule of TPS ticks per second instead of on /api/step",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of simulation worker processes; >1 shards sessions across processes (stdlib front end)",
+    )
+    parser.add_argument(
+        "--soak",
+        metavar="SCENARIO[:SCALE]",
+        default=None,
+        help="Generate traffic period by period from a traffic scenario instead of loading the traffic directory",
+    )
+    parser.add_argument("--soak-ticks", type=int, default=0, help="Run length for --soak in ticks (0: unbounded)")
+    parser.add_argument("--soak-seed", type=int, default=42, help="Seed of the first --soak period")
+    parser.add_argument(
+        "--soak-vectorized", action="store_true", help="Use the NumPy generators (Poisson arrivals) for --soak"
+    )
+    parser.add_argument(
+        "--preload-traffic",
+        action="store_true",
+        help="Parse the whole traffic directory in a background thread at startup (default: on first use)",
+    )
 
     args = parser.parse_args()
 
+    set_tick_profiling_default(args.profile_ticks)
+    if args.pace is not None and args.pace <= 0:
+        parser.error("--pace must be positive")
+    if args.pace is not None and args.workers > 1:
+        # 每个worker逐个处理请求，一个会话等待中的步进会阻塞同一worker上的其他会话
+        parser.error("--pace cannot be combined with --workers")
+    set_pacing_default(args.pace)
+    soak: Optional[Dict[str, Any]] = None
+    if args.soak:
+        scenario, _, scale = args.soak.partition(":")
+        soak = {
+            "scenario": scenario,
+            "scale": scale or None,
+            "seed": args.soak_seed,
+            "max_ticks": args.soak_ticks or None,
+            "vectorized": args.soak_vectorized,
+        }
+        try:
+            GeneratorTrafficSource(**soak)
+        except (KeyError, ValueError) as e:
+            parser.error(f"--soak: {e}")
+    set_soak_default(soak)
+    profiler_control.output_dir = args.profile_dir
+    module_levels = dict(item.split("=", 1) for item in args.log_module)
+    configure_logging(args.log_level, module_levels)
+    if not args.access_log:
+        # 每个请求一行的访问日志在高频步进时开销很大，默认只保留警告
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
     # Enable debug mode if requested
     if args.debug:
         set_server_debug_mode(True)
         server_debug_log("Server debug mode enabled")
         app.config["DEBUG"] = True
 
+    if args.workers > 1:
+        from elevator_saga.server.sharded import serve_sharded
+
+        print(f"Elevator simulation server running on http://{args.host}:{args.port} with {args.workers} workers")
+        try:
+            serve_sharded(
+                args.host,
+                args.port,
+                args.workers,
+                DEFAULT_TRAFFIC_DIR,
+                args.debug,
+                args.access_log,
+                profile_ticks=args.profile_ticks,
+                profile_dir=args.profile_dir,
+                soak=soak,
+                preload_traffic=args.preload_traffic,
+                log_level=args.log_level,
+                log_modules=module_levels,
+            )
+        except KeyboardInterrupt:
+            print("\nShutting down server...")
+        return
+
     # Create simulation with traffic directory
-    simulation = ElevatorSimulation(f"{os.path.join(os.path.dirname(__file__), '..', 'traffic')}")
+    simulation = ElevatorSimulation(DEFAULT_TRAFFIC_DIR)
+    if args.preload_traffic and simulation.traffic_corpus is not None:
+        simulation.traffic_corpus.preload()
 
     # Print traffic status
     print(f"Elevator simulation server running on http://{args.host}:{args.port}")
 
     try:
-        app.run(host=args.host, port=args.port, debug=args.debug, threaded=True)
+        if args.backend == "stdlib":
+            from elevator_saga.server.http_backend import serve
+
+            serve(args.host, args.port, handle_raw_request, access_log=args.access_log)
+        else:
+            app.run(host=args.host, port=args.port, debug=args.debug, threaded=True)
     except KeyboardInterrupt:
         print("\nShutting down server...")
 
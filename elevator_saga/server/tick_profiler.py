@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tick phase profiler for ElevatorSimulation
+记录 _process_tick 各阶段的耗时、事件数以及乘客流动数量，用于定位模拟引擎的瓶颈
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from elevator_saga.core.models import EventType, SimulationEvent
+
+# _process_tick 中的阶段，顺序与执行顺序一致
+TICK_PHASES = ("update_status", "arrivals", "move", "stops")
+
+
+class TickPhaseProfiler:
+    """
+    按阶段累计 perf_counter_ns 计时和事件数
+
+    由 ElevatorSimulation 在每个tick结束时调用 record_tick，
+    边界时间戳和事件下标由调用方采集，本类只做累加。
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """清空统计（每次重置模拟/加载新流量时调用）"""
+        self.ticks = 0
+        self.total_ns = [0] * len(TICK_PHASES)
+        self.max_ns = [0] * len(TICK_PHASES)
+        self.events = [0] * len(TICK_PHASES)
+        self.passengers_arrived = 0
+        self.passengers_boarded = 0
+        self.passengers_alighted = 0
+        self.started_at = time.perf_counter()
+
+    def record_tick(self, timestamps: List[int], event_marks: List[int], events: List[SimulationEvent]) -> None:
+        """
+        记录一个tick
+
+        Args:
+            timestamps: 各阶段边界的时间戳，长度为阶段数+1
+            event_marks: 各阶段边界处 state.events 的长度，长度为阶段数+1
+            events: state.events
+        """
+        self.ticks += 1
+        for index in range(len(TICK_PHASES)):
+            elapsed = timestamps[index + 1] - timestamps[index]
+            self.total_ns[index] += elapsed
+            if elapsed > self.max_ns[index]:
+                self.max_ns[index] = elapsed
+            self.events[index] += event_marks[index + 1] - event_marks[index]
+        for event in events[event_marks[0] :]:
+            if event.type == EventType.PASSENGER_BOARD:
+                self.passengers_boarded += 1
+            elif event.type == EventType.PASSENGER_ALIGHT:
+                self.passengers_alighted += 1
+            elif event.type in (EventType.UP_BUTTON_PRESSED, EventType.DOWN_BUTTON_PRESSED):
+                self.passengers_arrived += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为字典，随状态接口返回"""
+        tick_ns = sum(self.total_ns)
+        phases = {}
+        for index, name in enumerate(TICK_PHASES):
+            total = self.total_ns[index]
+            phases[name] = {
+                "total_ms": total / 1e6,
+                "mean_us": total / self.ticks / 1e3 if self.ticks else 0.0,
+                "max_us": self.max_ns[index] / 1e3,
+                "share": total / tick_ns if tick_ns else 0.0,
+                "events": self.events[index],
+            }
+        return {
+            "ticks": self.ticks,
+            "tick_total_ms": tick_ns / 1e6,
+            "tick_mean_us": tick_ns / self.ticks / 1e3 if self.ticks else 0.0,
+            "ticks_per_s": self.ticks / (tick_ns / 1e9) if tick_ns else 0.0,
+            "wall_time_s": time.perf_counter() - self.started_at,
+            "phases": phases,
+            "passengers": {
+                "arrived": self.passengers_arrived,
+                "boarded": self.passengers_boarded,
+                "alighted": self.passengers_alighted,
+            },
+        }
+
+    def summary(self, title: Optional[str] = None) -> str:
+        """文本摘要，每次运行结束时写入日志"""
+        data = self.to_dict()
+        lines = [
+            title or "Tick phase profile",
+            f"{'phase':<16}{'total ms':>12}{'share':>8}{'mean us':>10}{'max us':>10}{'events':>10}",
+        ]
+        for name, phase in data["phases"].items():
+            lines.append(
+                f"{name:<16}{phase['total_ms']:>12.2f}{phase['share'] * 100:>7.1f}%{phase['mean_us']:>10.1f}"
+                f"{phase['max_us']:>10.1f}{phase['events']:>10}"
+            )
+        passengers = data["passengers"]
+        lines.append(
+            f"ticks: {data['ticks']}  engine time: {data['tick_total_ms']:.2f} ms ({data['ticks_per_s']:.0f} ticks/s)  "
+            f"passengers arrived/boarded/alighted: {passengers['arrived']}/{passengers['boarded']}/"
+            f"{passengers['alighted']}"
+        )
+        return "\n".join(lines)
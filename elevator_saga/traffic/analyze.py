@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Traffic analysis
+用 NumPy 批量刻画流量文件（JSON 或 .elvt），用于挑选要运行的场景：
+
+- 起终点矩阵（OD矩阵）：od[起点, 终点] 为乘客数
+- 按时间窗口的到达率（每tick人数）和峰值窗口
+- 方向比例：上行/下行、进出大厅、峰值窗口内的主方向占比
+- 理论最少行程：每个窗口内各方向的乘客即使同时出发，一趟单向运行的载客量也不能超过轿厢容量，
+  因此该方向至少需要 ceil(最大跨楼层载荷 / 容量) 趟；对所有窗口和方向求和
+- 语料中的近似重复：楼层数相同、分段OD分布和到达时间分布的总变差距离都低于阈值的文件对。
+  OD按大厅和 OD_BANDS - 1 个楼层段合并后再比较，否则小文件的抽样噪声会掩盖场景本身的差异
+
+    python -m elevator_saga.traffic.analyze elevator_saga/traffic
+    python -m elevator_saga.traffic.analyze traffic_grid/*/ --window 120 --workers 8 --output summary.json
+"""
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from elevator_saga.traffic.corpus import list_traffic_files
+from elevator_saga.traffic.source import open_traffic_source
+
+PathLike = Union[str, Path]
+
+# 默认时间窗口（tick）
+DEFAULT_WINDOW = 60
+
+# 比较到达时间分布时，把每个文件的时长等分为这么多段
+PROFILE_BINS = 10
+
+# 比较OD分布时的楼层分段数：大厅单独一段，其余楼层等分为 OD_BANDS - 1 段
+OD_BANDS = 4
+
+# 默认的近似重复阈值（总变差距离）
+DEFAULT_DUPLICATE_THRESHOLD = 0.15
+
+
+def od_matrix(origins: np.ndarray, destinations: np.ndarray, floors: int) -> np.ndarray:
+    """起终点矩阵，od[i, j] 为从 i 楼到 j 楼的乘客数"""
+    flat = np.asarray(origins, dtype=np.int64) * floors + np.asarray(destinations, dtype=np.int64)
+    return np.bincount(flat, minlength=floors * floors).reshape(floors, floors)
+
+
+def window_counts(ticks: np.ndarray, duration: int, window: int) -> np.ndarray:
+    """每个时间窗口内到达的乘客数"""
+    windows = max(1, math.ceil(duration / window))
+    return np.bincount(np.minimum(np.asarray(ticks) // window, windows - 1), minlength=windows)
+
+
+def _peak_loads(window_index: np.ndarray, low: np.ndarray, high: np.ndarray, windows: int, floors: int) -> np.ndarray:
+    """
+    每个窗口内，所有 [low, high) 区间在某一楼层间隔上的最大重叠数
+
+    即一趟单向运行必须同时载运的最少人数。
+    """
+    diff = np.zeros(windows * (floors + 1), dtype=np.int64)
+    np.add.at(diff, window_index * (floors + 1) + low, 1)
+    np.add.at(diff, window_index * (floors + 1) + high, -1)
+    loads: np.ndarray = np.cumsum(diff.reshape(windows, floors + 1), axis=1).max(axis=1)
+    return loads
+
+
+def minimum_trips(
+    ticks: np.ndarray, origins: np.ndarray, destinations: np.ndarray, floors: int, capacity: int, window: int
+) -> np.ndarray:
+    """
+    每个窗口的理论最少单向运行趟数：上行和下行分别为 ceil(最大跨楼层载荷 / 容量)
+
+    把窗口内的乘客视为同时出发，忽略往返和停靠时间，因此是任何调度都无法低于的下界。
+    """
+    ticks = np.asarray(ticks, dtype=np.int64)
+    origins = np.asarray(origins, dtype=np.int64)
+    destinations = np.asarray(destinations, dtype=np.int64)
+    windows = max(1, int(ticks.max()) // window + 1) if ticks.size else 1
+    window_index = ticks // window
+    up = destinations > origins
+    trips = np.zeros(windows, dtype=np.int64)
+    for mask, low, high in ((up, origins, destinations), (~up, destinations, origins)):
+        loads = _peak_loads(window_index[mask], low[mask], high[mask], windows, floors)
+        trips += -(-loads // capacity)
+    return trips
+
+
+@dataclass
+class TrafficAnalysis:
+    """一个流量文件的分析结果；summary 为可直接写入JSON的紧凑摘要"""
+
+    path: Path
+    summary: Dict[str, Any]
+    od: np.ndarray
+    profile: np.ndarray
+
+    @property
+    def floors(self) -> int:
+        return int(self.od.shape[0])
+
+
+def _ratio(part: Any, total: Any) -> float:
+    return float(part) / float(total) if total else 0.0
+
+
+def analyze_columns(
+    building: Dict[str, Any],
+    ticks: np.ndarray,
+    origins: np.ndarray,
+    destinations: np.ndarray,
+    window: int = DEFAULT_WINDOW,
+    path: PathLike = "",
+) -> TrafficAnalysis:
+    """分析按tick排序的三列数据"""
+    floors = int(building["floors"])
+    capacity = int(building.get("elevator_capacity") or 1)
+    elevators = int(building.get("elevators") or 1)
+    ticks = np.asarray(ticks, dtype=np.int64)
+    origins = np.asarray(origins, dtype=np.int64)
+    destinations = np.asarray(destinations, dtype=np.int64)
+    passengers = int(ticks.size)
+    duration = int(building.get("duration") or (int(ticks.max()) + 1 if passengers else 1))
+
+    od = od_matrix(origins, destinations, floors)
+    counts = window_counts(ticks, duration, window)
+    up = destinations > origins
+    up_counts = window_counts(ticks[up], duration, window)
+    peak = int(counts.argmax())
+    peak_total = int(counts[peak])
+    peak_up = int(up_counts[peak])
+    trips = minimum_trips(ticks, origins, destinations, floors, capacity, window)
+    trip_floors = np.abs(destinations - origins)
+    profile = np.bincount(
+        np.minimum(ticks * PROFILE_BINS // max(duration, 1), PROFILE_BINS - 1), minlength=PROFILE_BINS
+    ) / max(passengers, 1)
+
+    summary: Dict[str, Any] = {
+        "file": Path(path).name,
+        "scenario": building.get("scenario"),
+        "floors": floors,
+        "elevators": elevators,
+        "elevator_capacity": capacity,
+        "duration": duration,
+        "passengers": passengers,
+        "window": window,
+        "arrival_rate": {
+            "mean": _ratio(passengers, duration),
+            "peak": peak_total / window,
+            "peak_window_start": peak * window,
+            "per_window": np.round(counts / window, 4).tolist(),
+        },
+        "direction": {
+            "up_ratio": _ratio(up.sum(), passengers),
+            "lobby_origin_ratio": _ratio((origins == 0).sum(), passengers),
+            "lobby_destination_ratio": _ratio((destinations == 0).sum(), passengers),
+            "interfloor_ratio": _ratio(((origins != 0) & (destinations != 0)).sum(), passengers),
+            "peak_up_ratio": _ratio(peak_up, peak_total),
+            "peak_directional_ratio": _ratio(max(peak_up, peak_total - peak_up), peak_total),
+        },
+        "trips": {
+            "min_car_trips": int(trips.sum()),
+            "peak_window_min_trips": int(trips.max()) if trips.size else 0,
+            "peak_min_trips_per_car": _ratio(trips.max() if trips.size else 0, elevators),
+            "mean_trip_floors": _ratio(trip_floors.sum(), passengers),
+            "min_car_floors": _ratio(trip_floors.sum(), capacity),
+        },
+    }
+    return TrafficAnalysis(Path(path), summary, od, profile)
+
+
+def analyze_file(path: PathLike, window: int = DEFAULT_WINDOW) -> TrafficAnalysis:
+    """分析一个流量文件（.json 逐条解析，.elvt 内存映射）"""
+    source = open_traffic_source(path)
+    return analyze_columns(source.building, source.ticks, source.origins, source.destinations, window, path)
+
+
+def _analyze_task(task: Tuple[Path, int]) -> TrafficAnalysis:
+    return analyze_file(*task)
+
+
+def find_traffic_files(paths: Iterable[PathLike]) -> List[Path]:
+    """展开参数中的目录（与服务器相同，同名的 .json 和 .elvt 只取 .elvt），文件按原样保留"""
+    files: List[Path] = []
+    for path in map(Path, paths):
+        files.extend(list_traffic_files(path) if path.is_dir() else [path])
+    return files
+
+
+def analyze_corpus(
+    paths: Sequence[PathLike], window: int = DEFAULT_WINDOW, workers: Optional[int] = None
+) -> List[TrafficAnalysis]:
+    """并行分析多个流量文件，结果顺序与 paths 相同；workers 为1时在当前进程中顺序分析"""
+    tasks = [(Path(path), window) for path in paths]
+    if workers == 1 or len(tasks) <= 1:
+        return [_analyze_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_analyze_task, tasks))
+
+
+def banded_od(od: np.ndarray, bands: int = OD_BANDS) -> np.ndarray:
+    """把OD矩阵按楼层段合并为 bands x bands 的分布（和为1）"""
+    floors = od.shape[0]
+    band = np.zeros(floors, dtype=np.int64)
+    if floors > 1:
+        band[1:] = 1 + np.arange(floors - 1) * (bands - 1) // (floors - 1)
+    merged = np.zeros((bands, bands), dtype=np.float64)
+    np.add.at(merged, (band[:, None], band[None, :]), od)
+    total = merged.sum()
+    return merged / total if total else merged
+
+
+def _total_variation(a: np.ndarray, b: np.ndarray) -> float:
+    return 0.5 * float(np.abs(a - b).sum())
+
+
+def traffic_distance(a: TrafficAnalysis, b: TrafficAnalysis) -> Optional[Tuple[float, float]]:
+    """两个文件的 (分段OD分布距离, 到达时间分布距离)，均为总变差距离；楼层数不同时返回 None"""
+    if a.floors != b.floors:
+        return None
+    return _total_variation(banded_od(a.od), banded_od(b.od)), _total_variation(a.profile, b.profile)
+
+
+def find_duplicates(
+    analyses: Sequence[TrafficAnalysis], threshold: float = DEFAULT_DUPLICATE_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """两两比较，返回分段OD分布和到达时间分布距离都不超过 threshold 的文件对"""
+    duplicates = []
+    for i, a in enumerate(analyses):
+        for b in analyses[i + 1 :]:
+            distance = traffic_distance(a, b)
+            if distance is not None and max(distance) <= threshold:
+                duplicates.append(
+                    {
+                        "files": [str(a.path), str(b.path)],
+                        "od_distance": round(distance[0], 4),
+                        "profile_distance": round(distance[1], 4),
+                    }
+                )
+    return duplicates
+
+
+def main() -> None:
+    """命令行接口：分析文件或目录，打印摘要表和近似重复的文件对"""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Characterize traffic files: OD matrices, arrival rates, min trips")
+    parser.add_argument("paths", nargs="+", help="Traffic files (.json/.elvt) or directories")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Time window in ticks")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument(
+        "--duplicate-threshold",
+        type=float,
+        default=DEFAULT_DUPLICATE_THRESHOLD,
+        help="Max total variation distance of both OD and arrival profiles to flag a pair as duplicates",
+    )
+    parser.add_argument("--output", default=None, help="Write compact JSON summaries to this file")
+    parser.add_argument("--save-od", default=None, help="Write OD matrices to this .npz file (keyed by file name)")
+    args = parser.parse_args()
+    if args.window <= 0:
+        parser.error("--window must be positive")
+
+    files = find_traffic_files(args.paths)
+    if not files:
+        parser.error("no traffic files found")
+    analyses = analyze_corpus(files, args.window, args.workers)
+    duplicates = find_duplicates(analyses, args.duplicate_threshold)
+
+    print(f"{'file':<32}{'floors':>7}{'pass':>9}{'rate':>8}{'peak':>8}{'up':>7}{'peak dir':>10}{'min trips':>11}")
+    for analysis in analyses:
+        s = analysis.summary
+        print(
+            f"{s['file']:<32}{s['floors']:>7}{s['passengers']:>9}{s['arrival_rate']['mean']:>8.3f}"
+            f"{s['arrival_rate']['peak']:>8.3f}{s['direction']['up_ratio']:>7.2f}"
+            f"{s['direction']['peak_directional_ratio']:>10.2f}{s['trips']['min_car_trips']:>11}"
+        )
+    for pair in duplicates:
+        print(
+            f"Near-duplicate: {pair['files'][0]} ~ {pair['files'][1]} "
+            f"(OD {pair['od_distance']:.3f}, profile {pair['profile_distance']:.3f})"
+        )
+
+    if args.output:
+        report = {"summaries": [analysis.summary for analysis in analyses], "duplicates": duplicates}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, separators=(",", ":"))
+    if args.save_od:
+        matrices: Dict[str, Any] = {str(analysis.path): analysis.od for analysis in analyses}
+        np.savez_compressed(args.save_od, **matrices)
+    if duplicates:
+        print(f"{len(duplicates)} near-duplicate pair(s) at threshold {args.duplicate_threshold}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
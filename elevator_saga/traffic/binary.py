@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Binary traffic files (.elvt)
+列式二进制流量格式，服务器以内存映射方式读取，不为每个乘客创建对象
+
+文件布局（小端序）：
+- 16字节前缀：魔数 b"ELVT"、格式版本(uint16)、保留(uint16)、头部长度(uint32)、保留(uint32)
+- JSON头部：{"building": {...}, "count": N, "columns": [[名称, dtype], ...]}，以空格补齐到8字节对齐
+- 按头部 columns 的顺序依次存放各列：tick(int64)、origin(int32)、destination(int32)，已按tick稳定排序
+
+乘客id不单独存储，与JSON流量文件相同，加载时按tick顺序从1开始编号。
+
+    python -m elevator_saga.traffic.binary elevator_saga/traffic/*.json
+    python -m elevator_saga.traffic.binary --info elevator_saga/traffic/up_peak.elvt
+"""
+import json
+import struct
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from elevator_saga.traffic.jsonstream import load_traffic_columns
+
+BINARY_TRAFFIC_SUFFIX = ".elvt"
+BINARY_TRAFFIC_MAGIC = b"ELVT"
+BINARY_TRAFFIC_VERSION = 1
+
+_PREFIX = struct.Struct("<4sHHI4x")
+_ALIGNMENT = 8
+
+# 列名和存储类型，顺序即文件中的存放顺序
+COLUMNS: List[Tuple[str, str]] = [("tick", "<i8"), ("origin", "<i4"), ("destination", "<i4")]
+
+PathLike = Union[str, Path]
+
+
+@dataclass
+class BinaryTraffic:
+    """
+    一个二进制流量文件：建筑配置和按tick排序的列
+
+    各列是只读的 np.memmap，按需从页缓存读取
+    """
+
+    path: Path
+    building: Dict[str, Any]
+    ticks: np.ndarray
+    origins: np.ndarray
+    destinations: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.ticks.shape[0])
+
+
+def write_binary_traffic(path: PathLike, building: Dict[str, Any], ticks: Any, origins: Any, destinations: Any) -> int:
+    """将建筑配置和三列数据写入二进制流量文件（写入前按tick稳定排序），返回乘客数"""
+    ticks = np.asarray(ticks, dtype=np.int64)
+    origins = np.asarray(origins, dtype=np.int64)
+    destinations = np.asarray(destinations, dtype=np.int64)
+    if not ticks.shape == origins.shape == destinations.shape or ticks.ndim != 1:
+        raise ValueError("tick, origin and destination must be 1-D arrays of the same length")
+    if np.any(origins == destinations):
+        raise ValueError("origin and destination must differ for every passenger")
+    order = np.argsort(ticks, kind="stable")
+
+    header = json.dumps(
+        {"building": building, "count": int(ticks.size), "columns": COLUMNS}, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    header += b" " * (-(_PREFIX.size + len(header)) % _ALIGNMENT)
+
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(BINARY_TRAFFIC_MAGIC, BINARY_TRAFFIC_VERSION, 0, len(header)))
+        f.write(header)
+        for (_, dtype), column in zip(COLUMNS, (ticks, origins, destinations)):
+            column[order].astype(dtype).tofile(f)
+    return int(ticks.size)
+
+
+def write_traffic_array(path: PathLike, building: Dict[str, Any], traffic: np.ndarray) -> int:
+    """将 traffic.vectorized 生成的结构化数组写入二进制流量文件"""
+    return write_binary_traffic(path, building, traffic["tick"], traffic["origin"], traffic["destination"])
+
+
+def read_binary_header(path: PathLike) -> Tuple[Dict[str, Any], int]:
+    """读取头部，返回 (头部字典, 数据起始偏移)"""
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ValueError(f"{path}: truncated binary traffic file")
+        magic, version, _, header_length = _PREFIX.unpack(prefix)
+        if magic != BINARY_TRAFFIC_MAGIC:
+            raise ValueError(f"{path}: not a binary traffic file")
+        if version != BINARY_TRAFFIC_VERSION:
+            raise ValueError(f"{path}: unsupported binary traffic version {version}")
+        header = json.loads(f.read(header_length).decode("utf-8"))
+    return header, _PREFIX.size + header_length
+
+
+def load_binary_traffic(path: PathLike) -> BinaryTraffic:
+    """以只读内存映射方式打开二进制流量文件，不读取数据本身"""
+    path = Path(path)
+    header, offset = read_binary_header(path)
+    count = header["count"]
+    columns: Dict[str, np.ndarray] = {}
+    for name, dtype in header["columns"]:
+        if count:
+            columns[name] = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+        else:
+            columns[name] = np.empty(0, dtype=dtype)
+        offset += count * np.dtype(dtype).itemsize
+    return BinaryTraffic(path, header["building"], columns["tick"], columns["origin"], columns["destination"])
+
+
+def convert_json_to_binary(json_path: PathLike, output_path: Optional[PathLike] = None) -> Path:
+    """将JSON流量文件转换为二进制流量文件，默认写到同目录的同名 .elvt 文件"""
+    json_path = Path(json_path)
+    out = Path(output_path) if output_path is not None else json_path.with_suffix(BINARY_TRAFFIC_SUFFIX)
+    write_binary_traffic(out, *load_traffic_columns(json_path))
+    return out
+
+
+def main() -> None:
+    """命令行接口：转换JSON流量文件或查看二进制流量文件头部"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert JSON traffic files to the binary .elvt format")
+    parser.add_argument("files", nargs="+", help="JSON traffic files to convert (or .elvt files with --info)")
+    parser.add_argument("--output-dir", type=str, default=None, help="Output directory (default: next to input)")
+    parser.add_argument("--info", action="store_true", help="Print the header of .elvt files instead of converting")
+    args = parser.parse_args()
+
+    for name in args.files:
+        path = Path(name)
+        if args.info:
+            header, offset = read_binary_header(path)
+            print(f"{path}: {header['count']} passengers, data at byte {offset}, building {header['building']}")
+            continue
+        output_path = None
+        if args.output_dir:
+            Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+            output_path = Path(args.output_dir) / path.with_suffix(BINARY_TRAFFIC_SUFFIX).name
+        try:
+            out = convert_json_to_binary(path, output_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error converting {path}: {e}", file=sys.stderr)
+            continue
+        print(f"Converted {path} ({path.stat().st_size} bytes) -> {out} ({out.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
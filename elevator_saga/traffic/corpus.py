@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Traffic corpus cache
+流量目录的解析缓存：每个流量文件只解析一次，解析结果为只读数组，
+所有模拟器（重置、切换轮次、各个会话）共享同一份数据，各自只持有一个游标
+
+- 默认按需解析：第一次用到某个文件时解析，并在后台预取下一个文件，切换轮次时通常已解析完成
+- preload()：在后台线程中按顺序解析整个目录（服务器 --preload-traffic）
+
+缓存按进程保存；分片服务器的每个worker进程各有一份（.elvt 文件为内存映射，共享系统页缓存）。
+"""
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from elevator_saga.traffic.binary import BINARY_TRAFFIC_SUFFIX
+from elevator_saga.traffic.source import ArrayTrafficSource, open_traffic_source
+from elevator_saga.utils.debug import get_logger
+
+logger = get_logger("elevator_saga.traffic.corpus")
+
+
+def list_traffic_files(traffic_dir: Union[str, Path]) -> List[Path]:
+    """目录中的流量文件，按文件名排序；同名的 .json 和 .elvt 同时存在时只取 .elvt"""
+    traffic_dir = Path(traffic_dir)
+    files = [
+        path
+        for path in traffic_dir.glob("*.json")
+        if path.is_file() and not path.with_suffix(BINARY_TRAFFIC_SUFFIX).is_file()
+    ]
+    files.extend(path for path in traffic_dir.glob(f"*{BINARY_TRAFFIC_SUFFIX}") if path.is_file())
+    return sorted(files)
+
+
+@dataclass(frozen=True)
+class ParsedTraffic:
+    """一个已解析的流量文件：建筑配置和按tick排序的只读列"""
+
+    path: Path
+    building: Dict[str, Any]
+    ticks: np.ndarray
+    origins: np.ndarray
+    destinations: np.ndarray
+
+    def source(self) -> ArrayTrafficSource:
+        """共享列、游标从头开始的流量来源（building 为浅拷贝）"""
+        return ArrayTrafficSource(dict(self.building), self.ticks, self.origins, self.destinations)
+
+
+def _read_only(column: np.ndarray) -> np.ndarray:
+    column.setflags(write=False)
+    return column
+
+
+class TrafficCorpus:
+    """
+    一组流量文件的解析缓存，线程安全
+
+    同一文件同时只有一个线程在解析，其余线程等待并复用结果；解析失败时不缓存，下次重试。
+    """
+
+    def __init__(self, files: List[Path]):
+        self.files = list(files)
+        self._parsed: List[Optional[ParsedTraffic]] = [None] * len(self.files)
+        self._locks = [threading.Lock() for _ in self.files]
+        self._preload_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_directory(cls, traffic_dir: Union[str, Path]) -> "TrafficCorpus":
+        return cls(list_traffic_files(traffic_dir))
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @property
+    def parsed_count(self) -> int:
+        return sum(parsed is not None for parsed in self._parsed)
+
+    def get(self, index: int, prefetch: bool = True) -> ParsedTraffic:
+        """第 index 个文件的解析结果；prefetch 时在后台解析下一个文件"""
+        parsed = self._parsed[index]
+        if parsed is None:
+            with self._locks[index]:
+                parsed = self._parsed[index]
+                if parsed is None:
+                    parsed = self._parse(index)
+        if prefetch:
+            self.prefetch(index + 1)
+        return parsed
+
+    def source(self, index: int) -> ArrayTrafficSource:
+        """第 index 个文件的流量来源，与其他模拟器共享解析后的数组"""
+        return self.get(index).source()
+
+    def prefetch(self, index: int) -> None:
+        """在后台解析第 index 个文件（已解析、正在解析或越界时什么都不做）"""
+        if not 0 <= index < len(self.files) or self._parsed[index] is not None or self._locks[index].locked():
+            return
+        threading.Thread(target=self._parse_quietly, args=(index,), name="traffic-prefetch", daemon=True).start()
+
+    def preload(self) -> threading.Thread:
+        """在后台线程中按顺序解析所有文件，返回该线程"""
+        if self._preload_thread is None:
+            self._preload_thread = threading.Thread(target=self._preload_all, name="traffic-preload", daemon=True)
+            self._preload_thread.start()
+        return self._preload_thread
+
+    def _preload_all(self) -> None:
+        for index in range(len(self.files)):
+            self._parse_quietly(index)
+        logger.info("Preloaded %d/%d traffic files", self.parsed_count, len(self.files))
+
+    def _parse_quietly(self, index: int) -> None:
+        try:
+            self.get(index, prefetch=False)
+        except Exception as e:
+            logger.warning("Failed to parse traffic file %s: %s", self.files[index], e)
+
+    def _parse(self, index: int) -> ParsedTraffic:
+        """解析文件（调用方持有该文件的锁）"""
+        source = open_traffic_source(self.files[index])
+        parsed = ParsedTraffic(
+            self.files[index],
+            source.building,
+            _read_only(source.ticks),
+            _read_only(source.origins),
+            _read_only(source.destinations),
+        )
+        self._parsed[index] = parsed
+        logger.debug("Parsed traffic file %s (%d passengers)", self.files[index].name, len(source))
+        return parsed
+
+
+# 进程内按目录共享的语料缓存
+_corpora: Dict[Path, TrafficCorpus] = {}
+_corpora_lock = threading.Lock()
+
+
+def shared_traffic_corpus(traffic_dir: Union[str, Path]) -> TrafficCorpus:
+    """
+    目录对应的共享语料缓存
+
+    每次调用都重新扫描目录（只列出文件名）；文件列表变化时创建新的缓存，沿用未变文件的解析结果。
+    已解析的文件不会因为内容修改而重新解析，需要时调用 clear_traffic_corpora。
+    """
+    key = Path(traffic_dir).resolve()
+    files = list_traffic_files(key)
+    with _corpora_lock:
+        corpus = _corpora.get(key)
+        if corpus is None or corpus.files != files:
+            previous = corpus
+            corpus = _corpora[key] = TrafficCorpus(files)
+            if previous is not None:
+                known = dict(zip(previous.files, previous._parsed))
+                corpus._parsed = [known.get(path) for path in files]
+        return corpus
+
+
+def clear_traffic_corpora() -> None:
+    """丢弃所有共享语料缓存（已创建的流量来源仍持有各自的数组）"""
+    with _corpora_lock:
+        _corpora.clear()
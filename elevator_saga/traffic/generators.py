@@ -2,14 +2,35 @@
 """
 Traffic Pattern Generators for Elevator Simulation
 Generate JSON traffic files for different scenarios with scalable building sizes
-From small (1 elevator, 3 floors, 10 people) to large (4 elevators, 12 floors, 200 people)
+From small (1 elevator, 3 floors, 10 people) to large (4 elevators, 12 floors, 200 people),
+plus xlarge/mega high-rise presets (up to 48 elevators, 120 floors, 60k trips per day) for stress workloads
 """
+import functools
+import hashlib
+import inspect
 import json
 import math
 import os.path
 import random
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union, overload
+
+import numpy as np
+
+from elevator_saga.traffic.jsonstream import COMPACT_JSON_THRESHOLD, TrafficJsonWriter
+from elevator_saga.utils.debug import get_logger
+
+logger = get_logger("elevator_saga.traffic.generators")
+
+# 生成器版本：修改生成逻辑而源码哈希无法反映时（如依赖的辅助函数变化）递增，使缓存的流量文件失效
+GENERATOR_VERSION = 2
+
+# 流量文件缓存清单，位于输出目录下，记录每个文件的内容哈希
+CACHE_MANIFEST = ".traffic_cache.json"
 
 # 建筑规模配置
 BUILDING_SCALES = {
@@ -37,6 +58,23 @@ BUILDING_SCALES = {
         "duration_range": (300, 600),
         "description": "大型建筑 - 3-4台电梯，10-12楼，120-200人",
     },
+    # 高层和超高层：duration 为一个工作日（7:00-20:00），上限时一个tick为一秒
+    "xlarge": {
+        "floors": (60, 90),
+        "elevators": (24, 32),
+        "capacity": (20, 24),
+        "max_people": (20000, 30000),
+        "duration_range": (23400, 46800),
+        "description": "高层建筑 - 24-32台电梯，60-90楼，每天2-3万人次",
+    },
+    "mega": {
+        "floors": (100, 120),
+        "elevators": (40, 48),
+        "capacity": (24, 26),
+        "max_people": (50000, 60000),
+        "duration_range": (23400, 46800),
+        "description": "超高层建筑 - 40-48台电梯，100-120楼，每天5-6万人次",
+    },
 }
 
 
@@ -54,22 +92,112 @@ def calculate_intensity_for_scale(base_intensity: float, floors: int, target_peo
     return min(1.0, base_intensity * adjustment_factor)
 
 
-def limit_traffic_count(traffic: List[Dict[str, Any]], max_people: int) -> List[Dict[str, Any]]:
-    """限制流量中的人数不超过最大值"""
+class TrafficColumns:
+    """
+    按列收集生成的乘客
+
+    append 接受与流量列表相同的条目字典，但只保存四个整数列，不保留字典，
+    生成大流量文件时内存占用与乘客数成正比且远小于条目列表。
+    """
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.origins = array("q")
+        self.destinations = array("q")
+        self.ticks = array("q")
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        self.ids.append(entry["id"])
+        self.origins.append(entry["origin"])
+        self.destinations.append(entry["destination"])
+        self.ticks.append(entry["tick"])
+
+    def __len__(self) -> int:
+        return len(self.ticks)
+
+    @classmethod
+    def from_entries(cls, traffic: List[Dict[str, Any]]) -> "TrafficColumns":
+        columns = cls()
+        for entry in traffic:
+            columns.append(entry)
+        return columns
+
+    def sorted_arrays(self, limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """按tick稳定排序后的 (ticks, origins, destinations, ids) 数组，limit 为保留的前若干个乘客"""
+        ticks = np.frombuffer(self.ticks, dtype=np.int64)
+        order = np.argsort(ticks, kind="stable")[:limit]
+        return (
+            ticks[order],
+            np.frombuffer(self.origins, dtype=np.int64)[order],
+            np.frombuffer(self.destinations, dtype=np.int64)[order],
+            np.frombuffer(self.ids, dtype=np.int64)[order],
+        )
+
+    def sort_by_tick(self, limit: Optional[int] = None, renumber: bool = False) -> "TrafficColumns":
+        """按tick稳定排序后的新列，只保留前 limit 个乘客；renumber 时id按排序后的顺序从1开始编号"""
+        ticks, origins, destinations, ids = self.sorted_arrays(limit)
+        result = TrafficColumns()
+        result.ticks.frombytes(ticks.tobytes())
+        result.origins.frombytes(origins.tobytes())
+        result.destinations.frombytes(destinations.tobytes())
+        if renumber:
+            result.ids.extend(range(1, len(ticks) + 1))
+        else:
+            result.ids.frombytes(ids.tobytes())
+        return result
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [
+            {"id": passenger_id, "origin": origin, "destination": destination, "tick": tick}
+            for passenger_id, origin, destination, tick in zip(self.ids, self.origins, self.destinations, self.ticks)
+        ]
+
+
+@overload
+def limit_traffic_count(traffic: TrafficColumns, max_people: int) -> TrafficColumns: ...
+
+
+@overload
+def limit_traffic_count(traffic: List[Dict[str, Any]], max_people: int) -> List[Dict[str, Any]]: ...
+
+
+def limit_traffic_count(
+    traffic: Union[TrafficColumns, List[Dict[str, Any]]], max_people: int
+) -> Union[TrafficColumns, List[Dict[str, Any]]]:
+    """限制流量中的人数不超过最大值，traffic 为 TrafficColumns 或条目列表"""
     if len(traffic) <= max_people:
         return traffic
 
     # 按时间排序，优先保留早期的乘客
-    traffic_sorted = sorted(traffic, key=lambda x: x["tick"])
-    return traffic_sorted[:max_people]
+    if isinstance(traffic, TrafficColumns):
+        return traffic.sort_by_tick(max_people)
+    return sorted(traffic, key=lambda x: x["tick"])[:max_people]
+
+
+def traffic_entries(generate_columns: Callable[..., TrafficColumns]) -> Callable[..., List[Dict[str, Any]]]:
+    """
+    将按列生成乘客的函数包装为返回条目列表的生成器
+
+    generate_traffic_file 通过 inspect.unwrap 直接调用按列生成的函数，不构建条目列表。
+    """
 
+    @functools.wraps(generate_columns)
+    def generate(*args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
+        return generate_columns(*args, **kwargs).to_list()
 
+    # inspect.signature 按 __signature__ 报告返回条目列表，参数与按列生成的函数相同
+    signature = inspect.signature(generate_columns).replace(return_annotation=List[Dict[str, Any]])
+    generate.__signature__ = signature  # type: ignore[attr-defined]
+    return generate
+
+
+@traffic_entries
 def generate_up_peak_traffic(
     floors: int = 10, duration: int = 300, intensity: float = 0.6, max_people: int = 100, seed: int = 42
-) -> List[Dict[str, Any]]:
+) -> TrafficColumns:
     """生成上行高峰流量 - 主要从底层到高层"""
-    random.seed(seed)
-    traffic = []
+    rng = random.Random(seed)
+    traffic = TrafficColumns()
     passenger_id = 1
 
     # 根据目标人数调整强度
@@ -80,18 +208,18 @@ def generate_up_peak_traffic(
         time_factor = 1.0 + 0.5 * math.sin(tick * math.pi / duration)
         current_intensity = adjusted_intensity * time_factor
 
-        if random.random() < current_intensity:
+        if rng.random() < current_intensity:
             # 针对小建筑调整比例 - 小建筑大厅使用更频繁
             lobby_ratio = 0.95 if floors <= 5 else 0.9
 
-            if random.random() < lobby_ratio:
+            if rng.random() < lobby_ratio:
                 origin = 0
-                destination = random.randint(1, floors - 1)
+                destination = rng.randint(1, floors - 1)
             else:
                 # 其他楼层间流量
                 if floors > 2:
-                    origin = random.randint(1, min(floors - 2, floors - 1))
-                    destination = random.randint(origin + 1, floors - 1)
+                    origin = rng.randint(1, min(floors - 2, floors - 1))
+                    destination = rng.randint(origin + 1, floors - 1)
                 else:
                     origin = 0
                     destination = floors - 1
@@ -102,12 +230,13 @@ def generate_up_peak_traffic(
     return limit_traffic_count(traffic, max_people)
 
 
+@traffic_entries
 def generate_down_peak_traffic(
     floors: int = 10, duration: int = 300, intensity: float = 0.6, max_people: int = 100, seed: int = 42
-) -> List[Dict[str, Any]]:
+) -> TrafficColumns:
     """生成下行高峰流量 - 主要从高层到底层"""
-    random.seed(seed)
-    traffic = []
+    rng = random.Random(seed)
+    traffic = TrafficColumns()
     passenger_id = 1
 
     # 根据目标人数调整强度
@@ -118,18 +247,18 @@ def generate_down_peak_traffic(
         time_factor = 1.0 + 0.5 * math.sin((tick + duration / 2) * math.pi / duration)
         current_intensity = adjusted_intensity * time_factor
 
-        if random.random() < current_intensity:
+        if rng.random() < current_intensity:
             # 针对小建筑调整比例 - 小建筑到大厅更频繁
             lobby_ratio = 0.95 if floors <= 5 else 0.9
 
-            if random.random() < lobby_ratio:
-                origin = random.randint(1, floors - 1)
+            if rng.random() < lobby_ratio:
+                origin = rng.randint(1, floors - 1)
                 destination = 0
             else:
                 # 其他楼层间流量
                 if floors > 2:
-                    origin = random.randint(2, floors - 1)
-                    destination = random.randint(1, origin - 1)
+                    origin = rng.randint(2, floors - 1)
+                    destination = rng.randint(1, origin - 1)
                 else:
                     origin = floors - 1
                     destination = 0
@@ -140,12 +269,13 @@ def generate_down_peak_traffic(
     return limit_traffic_count(traffic, max_people)
 
 
+@traffic_entries
 def generate_inter_floor_traffic(
     floors: int = 10, duration: int = 400, intensity: float = 0.4, max_people: int = 80, seed: int = 42
-) -> List[Dict[str, Any]]:
+) -> TrafficColumns:
     """生成楼层间流量 - 主要楼层间移动，适合小建筑"""
-    random.seed(seed)
-    traffic = []
+    rng = random.Random(seed)
+    traffic = TrafficColumns()
     passenger_id = 1
 
     # 小建筑更适合这种场景，调整强度
@@ -159,15 +289,15 @@ def generate_inter_floor_traffic(
         time_variation = 1.0 + 0.2 * math.sin(tick * 2 * math.pi / duration)
         current_intensity = adjusted_intensity * time_variation
 
-        if random.random() < current_intensity:
+        if rng.random() < current_intensity:
             if floors <= 3:
                 # 超小建筑，允许包含大厅
-                origin = random.randint(0, floors - 1)
-                destination = random.choice([f for f in range(floors) if f != origin])
+                origin = rng.randint(0, floors - 1)
+                destination = rng.choice([f for f in range(floors) if f != origin])
             else:
                 # 其他建筑，避免大厅
-                origin = random.randint(1, floors - 1)
-                destination = random.choice([f for f in range(1, floors) if f != origin])
+                origin = rng.randint(1, floors - 1)
+                destination = rng.choice([f for f in range(1, floors) if f != origin])
 
             traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
             passenger_id += 1
@@ -175,12 +305,13 @@ def generate_inter_floor_traffic(
     return limit_traffic_count(traffic, max_people)
 
 
+@traffic_entries
 def generate_lunch_rush_traffic(
     floors: int = 10, duration: int = 200, intensity: float = 0.7, max_people: int = 60, seed: int = 42
-) -> List[Dict[str, Any]]:
+) -> TrafficColumns:
     """生成午餐时间流量 - 双向流量，适合中大型建筑"""
-    random.seed(seed)
-    traffic = []
+    rng = random.Random(seed)
+    traffic = TrafficColumns()
     passenger_id = 1
 
     # 小建筑没有餐厅概念，生成简单的双向流量
@@ -195,9 +326,9 @@ def generate_lunch_rush_traffic(
             distance_from_peak = abs(tick - peak_center) / peak_width
             current_intensity = adjusted_intensity * max(0.3, math.exp(-distance_from_peak * distance_from_peak))
 
-            if random.random() < current_intensity:
-                origin = random.randint(0, floors - 1)
-                destination = random.choice([f for f in range(floors) if f != origin])
+            if rng.random() < current_intensity:
+                origin = rng.randint(0, floors - 1)
+                destination = rng.choice([f for f in range(floors) if f != origin])
                 traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
                 passenger_id += 1
     else:
@@ -214,15 +345,15 @@ def generate_lunch_rush_traffic(
             distance_from_peak = abs(tick - peak_center) / peak_width
             current_intensity = adjusted_intensity * max(0.2, math.exp(-distance_from_peak * distance_from_peak))
 
-            if random.random() < current_intensity:
-                if office_floors and random.random() < 0.5:
+            if rng.random() < current_intensity:
+                if office_floors and rng.random() < 0.5:
                     # 去餐厅
-                    origin = random.choice(office_floors)
-                    destination = random.choice(restaurant_floors)
+                    origin = rng.choice(office_floors)
+                    destination = rng.choice(restaurant_floors)
                 else:
                     # 回办公室
-                    origin = random.choice(restaurant_floors)
-                    destination = random.choice(office_floors) if office_floors else 0
+                    origin = rng.choice(restaurant_floors)
+                    destination = rng.choice(office_floors) if office_floors else 0
 
                 traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
                 passenger_id += 1
@@ -230,12 +361,13 @@ def generate_lunch_rush_traffic(
     return limit_traffic_count(traffic, max_people)
 
 
+@traffic_entries
 def generate_random_traffic(
     floors: int = 10, duration: int = 500, intensity: float = 0.3, max_people: int = 80, seed: int = 42
-) -> List[Dict[str, Any]]:
+) -> TrafficColumns:
     """生成随机流量 - 均匀分布，适合所有规模建筑"""
-    random.seed(seed)
-    traffic = []
+    rng = random.Random(seed)
+    traffic = TrafficColumns()
     passenger_id = 1
 
     # 根据目标人数调整强度
@@ -246,9 +378,9 @@ def generate_random_traffic(
         time_variation = 1.0 + 0.1 * math.sin(tick * 4 * math.pi / duration)
         current_intensity = adjusted_intensity * time_variation
 
-        if random.random() < current_intensity:
-            origin = random.randint(0, floors - 1)
-            destination = random.choice([f for f in range(floors) if f != origin])
+        if rng.random() < current_intensity:
+            origin = rng.randint(0, floors - 1)
+            destination = rng.choice([f for f in range(floors) if f != origin])
 
             traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
             passenger_id += 1
@@ -256,12 +388,13 @@ def generate_random_traffic(
     return limit_traffic_count(traffic, max_people)
 
 
+@traffic_entries
 def generate_fire_evacuation_traffic(
     floors: int = 10, duration: int = 150, max_people: int = 120, seed: int = 42
-) -> List[Dict[str, Any]]:
+) -> TrafficColumns:
     """生成火警疏散流量 - 紧急疏散到大厅"""
-    random.seed(seed)
-    traffic = []
+    rng = random.Random(seed)
+    traffic = TrafficColumns()
     passenger_id = 1
 
     # 正常时间段
@@ -270,9 +403,9 @@ def generate_fire_evacuation_traffic(
     # 正常流量 - 较少
     normal_intensity = 0.15
     for tick in range(normal_duration):
-        if random.random() < normal_intensity:
-            origin = random.randint(0, floors - 1)
-            destination = random.choice([f for f in range(floors) if f != origin])
+        if rng.random() < normal_intensity:
+            origin = rng.randint(0, floors - 1)
+            destination = rng.choice([f for f in range(floors) if f != origin])
             traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
             passenger_id += 1
 
@@ -289,23 +422,26 @@ def generate_fire_evacuation_traffic(
 
     for floor in range(1, floors):
         # 每层随机数量的人需要疏散
-        num_people = random.randint(people_per_floor[0], people_per_floor[1])
+        num_people = rng.randint(people_per_floor[0], people_per_floor[1])
         for i in range(num_people):
             # 在10个tick内陆续到达，模拟疏散的紧急性
-            arrival_tick = alarm_tick + random.randint(0, min(10, duration - alarm_tick - 1))
+            arrival_tick = alarm_tick + rng.randint(0, min(10, duration - alarm_tick - 1))
             if arrival_tick < duration:
-                traffic.append({"id": passenger_id, "origin": floor, "destination": 0, "tick": arrival_tick})  # 疏散到大厅
+                traffic.append(
+                    {"id": passenger_id, "origin": floor, "destination": 0, "tick": arrival_tick}
+                )  # 疏散到大厅
                 passenger_id += 1
 
     return limit_traffic_count(traffic, max_people)
 
 
+@traffic_entries
 def generate_mixed_scenario_traffic(
     floors: int = 10, duration: int = 600, max_people: int = 150, seed: int = 42
-) -> List[Dict[str, Any]]:
+) -> TrafficColumns:
     """生成混合场景流量 - 包含多种模式，适合中大型建筑"""
-    random.seed(seed)
-    traffic = []
+    rng = random.Random(seed)
+    traffic = TrafficColumns()
     passenger_id = 1
 
     # 根据人数目标调整各阶段强度
@@ -316,15 +452,15 @@ def generate_mixed_scenario_traffic(
     phase1_intensity = calculate_intensity_for_scale(0.7, floors, target_per_phase, phase1_end)
 
     for tick in range(phase1_end):
-        if random.random() < phase1_intensity:
+        if rng.random() < phase1_intensity:
             lobby_ratio = 0.9 if floors > 5 else 0.95
-            if random.random() < lobby_ratio:
+            if rng.random() < lobby_ratio:
                 origin = 0
-                destination = random.randint(1, floors - 1)
+                destination = rng.randint(1, floors - 1)
             else:
                 if floors > 2:
-                    origin = random.randint(0, floors - 2)
-                    destination = random.randint(origin + 1, floors - 1)
+                    origin = rng.randint(0, floors - 2)
+                    destination = rng.randint(origin + 1, floors - 1)
                 else:
                     origin = 0
                     destination = floors - 1
@@ -337,9 +473,9 @@ def generate_mixed_scenario_traffic(
     phase2_intensity = calculate_intensity_for_scale(0.3, floors, target_per_phase, phase2_end - phase1_end)
 
     for tick in range(phase1_end, phase2_end):
-        if random.random() < phase2_intensity:
-            origin = random.randint(0, floors - 1)
-            destination = random.choice([f for f in range(floors) if f != origin])
+        if rng.random() < phase2_intensity:
+            origin = rng.randint(0, floors - 1)
+            destination = rng.choice([f for f in range(floors) if f != origin])
 
             traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
             passenger_id += 1
@@ -349,19 +485,19 @@ def generate_mixed_scenario_traffic(
     phase3_intensity = calculate_intensity_for_scale(0.6, floors, target_per_phase, phase3_end - phase2_end)
 
     for tick in range(phase2_end, phase3_end):
-        if random.random() < phase3_intensity:
-            if floors > 5 and random.random() < 0.6:
+        if rng.random() < phase3_intensity:
+            if floors > 5 and rng.random() < 0.6:
                 # 餐厅流量 - 仅适用于大型建筑
-                if random.random() < 0.5:
-                    origin = random.randint(3, floors - 1)
-                    destination = random.randint(1, 2)
+                if rng.random() < 0.5:
+                    origin = rng.randint(3, floors - 1)
+                    destination = rng.randint(1, 2)
                 else:
-                    origin = random.randint(1, 2)
-                    destination = random.randint(3, floors - 1)
+                    origin = rng.randint(1, 2)
+                    destination = rng.randint(3, floors - 1)
             else:
                 # 其他流量
-                origin = random.randint(0, floors - 1)
-                destination = random.choice([f for f in range(floors) if f != origin])
+                origin = rng.randint(0, floors - 1)
+                destination = rng.choice([f for f in range(floors) if f != origin])
 
             traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
             passenger_id += 1
@@ -370,15 +506,15 @@ def generate_mixed_scenario_traffic(
     phase4_intensity = calculate_intensity_for_scale(0.6, floors, target_per_phase, duration - phase3_end)
 
     for tick in range(phase3_end, duration):
-        if random.random() < phase4_intensity:
+        if rng.random() < phase4_intensity:
             lobby_ratio = 0.85 if floors > 5 else 0.9
-            if random.random() < lobby_ratio:
-                origin = random.randint(1, floors - 1)
+            if rng.random() < lobby_ratio:
+                origin = rng.randint(1, floors - 1)
                 destination = 0
             else:
                 if floors > 2:
-                    origin = random.randint(2, floors - 1)
-                    destination = random.randint(1, origin - 1)
+                    origin = rng.randint(2, floors - 1)
+                    destination = rng.randint(1, origin - 1)
                 else:
                     origin = floors - 1
                     destination = 0
@@ -389,12 +525,13 @@ def generate_mixed_scenario_traffic(
     return limit_traffic_count(traffic, max_people)
 
 
+@traffic_entries
 def generate_high_density_traffic(
     floors: int = 10, duration: int = 300, intensity: float = 1.2, max_people: int = 200, seed: int = 42
-) -> List[Dict[str, Any]]:
+) -> TrafficColumns:
     """生成高密度流量 - 压力测试，适合测试电梯系统极限"""
-    random.seed(seed)
-    traffic = []
+    rng = random.Random(seed)
+    traffic = TrafficColumns()
     passenger_id = 1
 
     # 计算目标强度，确保不超过人数限制
@@ -404,12 +541,12 @@ def generate_high_density_traffic(
     for tick in range(duration):
         # 高强度的随机流量，使用高斯分布增加变化
         base_passengers = safe_intensity
-        variation = random.gauss(0, safe_intensity * 0.3)  # 30%变化
+        variation = rng.gauss(0, safe_intensity * 0.3)  # 30%变化
         num_passengers = max(0, int(base_passengers + variation))
 
         for _ in range(num_passengers):
-            origin = random.randint(0, floors - 1)
-            destination = random.choice([f for f in range(floors) if f != origin])
+            origin = rng.randint(0, floors - 1)
+            destination = rng.choice([f for f in range(floors) if f != origin])
 
             traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
             passenger_id += 1
@@ -424,12 +561,13 @@ def generate_high_density_traffic(
     return limit_traffic_count(traffic, max_people)
 
 
+@traffic_entries
 def generate_small_building_traffic(
     floors: int = 4, duration: int = 180, intensity: float = 0.4, max_people: int = 25, seed: int = 42
-) -> List[Dict[str, Any]]:
+) -> TrafficColumns:
     """生成小建筑专用流量 - 简单楼层间移动，适合3-5层建筑"""
-    random.seed(seed)
-    traffic = []
+    rng = random.Random(seed)
+    traffic = TrafficColumns()
     passenger_id = 1
 
     # 小建筑特点：频繁使用大厅，简单的上下楼
@@ -440,21 +578,21 @@ def generate_small_building_traffic(
         time_factor = 1.0 + 0.3 * math.sin(tick * 2 * math.pi / duration)
         current_intensity = adjusted_intensity * time_factor
 
-        if random.random() < current_intensity:
+        if rng.random() < current_intensity:
             # 80%涉及大厅的移动
-            if random.random() < 0.8:
-                if random.random() < 0.5:
+            if rng.random() < 0.8:
+                if rng.random() < 0.5:
                     # 从大厅上楼
                     origin = 0
-                    destination = random.randint(1, floors - 1)
+                    destination = rng.randint(1, floors - 1)
                 else:
                     # 下到大厅
-                    origin = random.randint(1, floors - 1)
+                    origin = rng.randint(1, floors - 1)
                     destination = 0
             else:
                 # 楼层间移动
-                origin = random.randint(1, floors - 1)
-                destination = random.choice([f for f in range(1, floors) if f != origin])
+                origin = rng.randint(1, floors - 1)
+                destination = rng.choice([f for f in range(1, floors) if f != origin])
 
             traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
             passenger_id += 1
@@ -462,12 +600,13 @@ def generate_small_building_traffic(
     return limit_traffic_count(traffic, max_people)
 
 
+@traffic_entries
 def generate_medical_building_traffic(
     floors: int = 8, duration: int = 240, intensity: float = 0.5, max_people: int = 80, seed: int = 42
-) -> List[Dict[str, Any]]:
+) -> TrafficColumns:
     """生成医疗建筑流量 - 模拟医院/诊所的特殊流量模式"""
-    random.seed(seed)
-    traffic = []
+    rng = random.Random(seed)
+    traffic = TrafficColumns()
     passenger_id = 1
 
     # 医疗建筑特点：大厅使用频繁，某些楼层(如手术室)访问较少
@@ -491,27 +630,27 @@ def generate_medical_building_traffic(
         time_factor = 1.0 + 0.4 * math.sin((tick + duration * 0.2) * math.pi / duration)
         current_intensity = adjusted_intensity * time_factor
 
-        if random.random() < current_intensity:
+        if rng.random() < current_intensity:
             # 85%的移动涉及大厅
-            if random.random() < 0.85:
-                if random.random() < 0.6:
+            if rng.random() < 0.85:
+                if rng.random() < 0.6:
                     # 从大厅到其他楼层
                     origin = 0
                     # 使用权重选择目标楼层
                     destinations = list(range(1, floors))
                     weights = floor_weights[1:]
-                    destination = random.choices(destinations, weights=weights)[0]
+                    destination = rng.choices(destinations, weights=weights)[0]
                 else:
                     # 从其他楼层到大厅
                     origins = list(range(1, floors))
                     weights = floor_weights[1:]
-                    origin = random.choices(origins, weights=weights)[0]
+                    origin = rng.choices(origins, weights=weights)[0]
                     destination = 0
             else:
                 # 楼层间移动（较少）
                 floor_candidates = list(range(floors))
-                origin = random.choice(floor_candidates)
-                destination = random.choice([f for f in floor_candidates if f != origin])
+                origin = rng.choice(floor_candidates)
+                destination = rng.choice([f for f in floor_candidates if f != origin])
 
             traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
             passenger_id += 1
@@ -519,12 +658,13 @@ def generate_medical_building_traffic(
     return limit_traffic_count(traffic, max_people)
 
 
+@traffic_entries
 def generate_meeting_event_traffic(
     floors: int = 6, duration: int = 150, intensity: float = 0.8, max_people: int = 50, seed: int = 42
-) -> List[Dict[str, Any]]:
+) -> TrafficColumns:
     """生成会议事件流量 - 模拟大型会议开始和结束的流量模式"""
-    random.seed(seed)
-    traffic = []
+    rng = random.Random(seed)
+    traffic = TrafficColumns()
     passenger_id = 1
 
     # 假设会议在某个楼层举行
@@ -544,15 +684,15 @@ def generate_meeting_event_traffic(
             phase_progress = tick / arrival_end
             current_intensity = intensity * (1.0 + math.sin(phase_progress * math.pi))
 
-            if random.random() < current_intensity:
+            if rng.random() < current_intensity:
                 # 主要从大厅到会议楼层
-                if random.random() < 0.9:
+                if rng.random() < 0.9:
                     origin = 0
                     destination = meeting_floor
                 else:
                     # 少量其他楼层间移动
-                    origin = random.randint(0, floors - 1)
-                    destination = random.choice([f for f in range(floors) if f != origin])
+                    origin = rng.randint(0, floors - 1)
+                    destination = rng.choice([f for f in range(floors) if f != origin])
                 should_add_passenger = True
 
         elif tick >= departure_start:
@@ -560,21 +700,21 @@ def generate_meeting_event_traffic(
             phase_progress = (tick - departure_start) / (duration - departure_start)
             current_intensity = intensity * (1.0 + math.sin(phase_progress * math.pi))
 
-            if random.random() < current_intensity:
+            if rng.random() < current_intensity:
                 # 主要从会议楼层到大厅
-                if random.random() < 0.9:
+                if rng.random() < 0.9:
                     origin = meeting_floor
                     destination = 0
                 else:
                     # 少量其他移动
-                    origin = random.randint(0, floors - 1)
-                    destination = random.choice([f for f in range(floors) if f != origin])
+                    origin = rng.randint(0, floors - 1)
+                    destination = rng.choice([f for f in range(floors) if f != origin])
                 should_add_passenger = True
         else:
             # 中间阶段 - 低流量
-            if random.random() < intensity * 0.1:
-                origin = random.randint(0, floors - 1)
-                destination = random.choice([f for f in range(floors) if f != origin])
+            if rng.random() < intensity * 0.1:
+                origin = rng.randint(0, floors - 1)
+                destination = rng.choice([f for f in range(floors) if f != origin])
                 should_add_passenger = True
 
         if should_add_passenger:
@@ -584,12 +724,13 @@ def generate_meeting_event_traffic(
     return limit_traffic_count(traffic, max_people)
 
 
+@traffic_entries
 def generate_progressive_test_traffic(
     floors: int = 8, duration: int = 400, max_people: int = 100, seed: int = 42
-) -> List[Dict[str, Any]]:
+) -> TrafficColumns:
     """生成渐进式测试流量 - 从低强度逐渐增加到高强度"""
-    random.seed(seed)
-    traffic = []
+    rng = random.Random(seed)
+    traffic = TrafficColumns()
     passenger_id = 1
 
     # 分为四个阶段，强度逐渐增加
@@ -609,9 +750,9 @@ def generate_progressive_test_traffic(
             time_factor = 1.0 + 0.3 * math.sin(local_progress * 2 * math.pi)
             current_intensity = adjusted_intensity * time_factor
 
-            if random.random() < current_intensity:
-                origin = random.randint(0, floors - 1)
-                destination = random.choice([f for f in range(floors) if f != origin])
+            if rng.random() < current_intensity:
+                origin = rng.randint(0, floors - 1)
+                destination = rng.choice([f for f in range(floors) if f != origin])
 
                 traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
                 passenger_id += 1
@@ -619,6 +760,73 @@ def generate_progressive_test_traffic(
     return limit_traffic_count(traffic, max_people)
 
 
+# 全天办公流量的时段：(类型, 时刻均值, 标准差, 占全天出行的比例)，时刻为一天中的小时数；
+# interfloor 为 8:00-18:00 的均匀分布（均值、标准差位置存放起止时刻）
+OFFICE_DAY_HOURS = (7.0, 20.0)
+OFFICE_DAY_PROFILE: List[Tuple[str, float, float, float]] = [
+    ("up_peak", 8.75, 0.5, 0.27),
+    ("lunch_out", 12.1, 0.35, 0.11),
+    ("lunch_back", 13.0, 0.35, 0.11),
+    ("down_peak", 17.6, 0.55, 0.27),
+    ("interfloor", 8.0, 18.0, 0.24),
+]
+
+
+def office_day_floors(floors: int) -> Tuple[List[int], List[int]]:
+    """全天办公流量的 (餐厅楼层, 办公楼层)：7层以上的建筑1-2楼为餐厅，否则午餐只去大厅"""
+    if floors > 6:
+        return [1, 2], list(range(3, floors))
+    return [0], list(range(1, floors))
+
+
+@traffic_entries
+def generate_office_day_traffic(
+    floors: int = 60, duration: int = 46800, max_people: int = 20000, seed: int = 42
+) -> TrafficColumns:
+    """
+    生成全天办公流量 - 上行高峰、午餐往返、下行高峰和全天的楼层间流量，适合高层建筑
+
+    OFFICE_DAY_HOURS（7:00-20:00）线性映射到 [0, duration)，duration=46800 时一个tick为一秒。
+    每个乘客先按 OFFICE_DAY_PROFILE 的比例选择时段，再抽取到达时刻，因此同一tick可以有多人到达，
+    人数恰好为 max_people，生成耗时与 duration 无关。
+    """
+    rng = random.Random(seed)
+    restaurant_floors, office_floors = office_day_floors(floors)
+    start_hour, end_hour = OFFICE_DAY_HOURS
+    ticks_per_hour = duration / (end_hour - start_hour)
+    weights = [share for _, _, _, share in OFFICE_DAY_PROFILE]
+
+    traffic = TrafficColumns()
+    for kind, center, spread, _ in rng.choices(OFFICE_DAY_PROFILE, weights=weights, k=max_people):
+        if kind == "interfloor":
+            hour = rng.uniform(center, spread)
+        else:
+            # 超出一天范围的时刻重新抽取
+            hour = rng.gauss(center, spread)
+            while not start_hour <= hour < end_hour:
+                hour = rng.gauss(center, spread)
+        tick = min(duration - 1, int((hour - start_hour) * ticks_per_hour))
+
+        office = rng.choice(office_floors)
+        if kind == "up_peak":
+            origin, destination = 0, office
+        elif kind == "down_peak":
+            origin, destination = office, 0
+        elif kind == "lunch_out":
+            # 一半离开大楼，一半去餐厅
+            origin, destination = office, rng.choice(restaurant_floors) if rng.random() < 0.5 else 0
+        elif kind == "lunch_back":
+            origin, destination = rng.choice(restaurant_floors) if rng.random() < 0.5 else 0, office
+        else:
+            origin = office
+            destination = rng.choice(office_floors) if len(office_floors) > 1 else 0
+            while destination == origin:
+                destination = rng.choice(office_floors)
+        traffic.append({"id": 0, "origin": origin, "destination": destination, "tick": tick})
+
+    return traffic.sort_by_tick(renumber=True)
+
+
 # 按建筑规模分类的场景配置
 TRAFFIC_SCENARIOS = {
     # 经典场景 - 适用于所有规模，会根据建筑规模自动调整
@@ -723,6 +931,13 @@ TRAFFIC_SCENARIOS = {
         "scales": {"small": {"max_people": 40}, "medium": {"max_people": 100}, "large": {"max_people": 150}},
         "suitable_scales": ["small", "medium", "large"],
     },
+    # 高层建筑的全天压力场景
+    "office_day": {
+        "generator": generate_office_day_traffic,
+        "description": "全天办公 - 上行高峰、午餐、下行高峰和楼层间流量，适合高层建筑",
+        "scales": {"large": {"max_people": 200}, "xlarge": {"max_people": 20000}, "mega": {"max_people": 50000}},
+        "suitable_scales": ["large", "xlarge", "mega"],
+    },
 }
 
 
@@ -732,12 +947,16 @@ def determine_building_scale(floors: int, elevators: int) -> str:
         return "small"
     elif floors <= 9 and elevators <= 3:
         return "medium"
-    else:
+    elif floors < 60:
         return "large"
+    elif floors < 100:
+        return "xlarge"
+    else:
+        return "mega"
 
 
-def generate_traffic_file(scenario: str, output_file: str, scale: Optional[str] = None, **kwargs: Any) -> int:
-    """生成单个流量文件，支持规模化配置"""
+def resolve_scenario_params(scenario: str, scale: Optional[str] = None, **kwargs: Any) -> Tuple[str, Dict[str, Any]]:
+    """确定场景的建筑规模并合并参数（kwargs > 场景的规模参数 > 建筑规模默认值），返回 (规模, 参数)"""
     if scenario not in TRAFFIC_SCENARIOS:
         raise ValueError(f"Unknown scenario: {scenario}. Available: {list(TRAFFIC_SCENARIOS.keys())}")
 
@@ -751,8 +970,11 @@ def generate_traffic_file(scenario: str, output_file: str, scale: Optional[str]
 
     # 检查场景是否适合该规模
     if scale not in config["suitable_scales"]:
-        print(
-            f"Warning: Scenario '{scenario}' not recommended for scale '{scale}'. Suitable scales: {config['suitable_scales']}"
+        logger.warning(
+            "Scenario '%s' not recommended for scale '%s'. Suitable scales: %s",
+            scenario,
+            scale,
+            config["suitable_scales"],
         )
         # 选择最接近的适合规模
         if "medium" in config["suitable_scales"]:
@@ -781,14 +1003,32 @@ def generate_traffic_file(scenario: str, output_file: str, scale: Optional[str]
 
     # 允许kwargs完全覆盖
     params.update(kwargs)
+    return scale, params
 
-    # 生成流量数据 - 只传递生成器函数需要的参数
-    import inspect
 
-    generator_func: Callable[..., List[Dict[str, Any]]] = config["generator"]
+def generate_traffic_file(
+    scenario: str, output_file: str, scale: Optional[str] = None, compact: Optional[bool] = None, **kwargs: Any
+) -> int:
+    """
+    生成单个流量文件，支持规模化配置
+
+    乘客按列生成（不构建条目列表），按tick稳定排序一次后整列写入；
+    compact 为 None 时乘客数超过 COMPACT_JSON_THRESHOLD 才输出紧凑格式
+    """
+    scale, params = resolve_scenario_params(scenario, scale, **kwargs)
+    config: Dict[str, Any] = TRAFFIC_SCENARIOS[scenario]
+
+    # 生成流量数据 - 只传递生成器函数需要的参数
+    generator_func: Callable[..., Any] = config["generator"]
     generator_signature = inspect.signature(generator_func)
     generator_params = {k: v for k, v in params.items() if k in generator_signature.parameters}
-    traffic_data = generator_func(**generator_params)
+    # 用 traffic_entries 包装的生成器直接调用按列生成的函数，其他生成器返回的条目列表转换为列
+    traffic = inspect.unwrap(generator_func)(**generator_params)
+    if not isinstance(traffic, TrafficColumns):
+        traffic = TrafficColumns.from_entries(traffic)
+    count = len(traffic)
+    ticks, origins, destinations, ids = traffic.sorted_arrays()
+    del traffic
 
     # 准备building配置
     building_config = {
@@ -798,19 +1038,180 @@ def generate_traffic_file(scenario: str, output_file: str, scale: Optional[str]
         "scenario": scenario,
         "scale": scale,
         "description": f"{config['description']} ({scale}规模)",
-        "expected_passengers": len(traffic_data),
+        "expected_passengers": count,
         "duration": params["duration"],
     }
 
-    # 组合完整的数据结构
-    complete_data = {"building": building_config, "traffic": traffic_data}
+    if compact is None:
+        compact = count > COMPACT_JSON_THRESHOLD
+    with TrafficJsonWriter(output_file, building_config, indent=None if compact else 2) as writer:
+        writer.write_columns(ticks, origins, destinations, ids)
+
+    logger.info("Generated %d passengers for scenario '%s' (%s) -> %s", count, scenario, scale, output_file)
+    return count
+
+
+def scenario_seed(seed: int, scenario: str) -> int:
+    """场景的随机种子：基础种子加场景名的crc32，跨进程稳定（不受 PYTHONHASHSEED 影响）"""
+    return seed + zlib.crc32(scenario.encode("utf-8")) % 1000
+
+
+def traffic_cache_key(scenario: str, scale: str, params: Dict[str, Any]) -> str:
+    """流量文件的内容哈希：场景、规模、完整参数、GENERATOR_VERSION 和生成器源码"""
+    generator_func = TRAFFIC_SCENARIOS[scenario]["generator"]
+    try:
+        source = inspect.getsource(generator_func)  # type: ignore[arg-type]
+    except (OSError, TypeError):
+        source = ""
+    payload = {
+        "scenario": scenario,
+        "scale": scale,
+        "params": params,
+        "version": GENERATOR_VERSION,
+        "source": hashlib.sha256(source.encode("utf-8")).hexdigest(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class TrafficGridError(RuntimeError):
+    """流量网格中有文件生成失败；缓存清单已写入，results 为成功生成或跳过的文件"""
+
+    def __init__(self, failures: Dict[Path, str], results: Dict[Path, int]):
+        super().__init__(f"Failed to generate {len(failures)} traffic files: {', '.join(map(str, sorted(failures)))}")
+        self.failures = failures
+        self.results = results
+
+
+@dataclass
+class TrafficTask:
+    """流量网格中的一个文件"""
+
+    scenario: str
+    scale: str
+    params: Dict[str, Any]
+    output_file: Path
+    key: str
 
-    # 写入文件
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(complete_data, f, indent=2, ensure_ascii=False)
 
-    print(f"Generated {len(traffic_data)} passengers for scenario '{scenario}' ({scale}) -> {output_file}")
-    return len(traffic_data)
+def plan_traffic_grid(
+    output_dir: str,
+    scales: Sequence[str],
+    seeds: Sequence[int],
+    scenarios: Optional[Sequence[str]] = None,
+    custom_building: Optional[Dict[str, Any]] = None,
+) -> List[TrafficTask]:
+    """
+    列出 场景 × 规模 × 种子 网格中的所有文件，只包含适合该规模的场景
+
+    多个规模时每个规模一个子目录，多个种子时每个种子一个 seed_<seed> 子目录，
+    因此单一规模和种子时与原来的目录布局相同。
+    """
+    tasks = []
+    for scale in scales:
+        building_config = BUILDING_SCALES[scale]
+        building = custom_building or {}
+        base_params = {
+            "floors": building.get("floors", building_config["floors"][0]),
+            "elevators": building.get("elevators", building_config["elevators"][0]),
+            "elevator_capacity": building.get("capacity", building_config["capacity"][0]),
+        }
+        for seed in seeds:
+            directory = Path(output_dir)
+            if len(scales) > 1:
+                directory = directory / scale
+            if len(seeds) > 1:
+                directory = directory / f"seed_{seed}"
+            for scenario_name, scenario_config in TRAFFIC_SCENARIOS.items():
+                config_dict: Dict[str, Any] = scenario_config
+                if scenarios is not None and scenario_name not in scenarios:
+                    continue
+                if scale not in config_dict["suitable_scales"]:
+                    continue
+                # 为每个场景使用不同的seed
+                _, params = resolve_scenario_params(
+                    scenario_name, scale, **base_params, seed=scenario_seed(seed, scenario_name)
+                )
+                key = traffic_cache_key(scenario_name, scale, params)
+                tasks.append(TrafficTask(scenario_name, scale, params, directory / f"{scenario_name}.json", key))
+    return tasks
+
+
+def _run_traffic_task(task: TrafficTask) -> int:
+    """进程池中执行：生成一个流量文件，返回乘客数"""
+    return generate_traffic_file(task.scenario, str(task.output_file), scale=task.scale, **task.params)
+
+
+def generate_traffic_grid(
+    output_dir: str,
+    scales: Sequence[str] = tuple(BUILDING_SCALES),
+    seeds: Sequence[int] = (42,),
+    scenarios: Optional[Sequence[str]] = None,
+    custom_building: Optional[Dict[str, Any]] = None,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> Dict[Path, int]:
+    """
+    并行生成 场景 × 规模 × 种子 网格中的流量文件，返回 {文件路径: 乘客数}
+
+    输出目录下的 CACHE_MANIFEST 记录每个文件的内容哈希（见 traffic_cache_key），
+    哈希未变且文件存在时跳过生成；force=True 时全部重新生成。
+    有文件生成失败时，写入缓存清单后抛出 TrafficGridError。
+
+    Args:
+        workers: 进程数，None 为CPU核数，1 为在当前进程中顺序生成
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_path / CACHE_MANIFEST
+    manifest: Dict[str, Dict[str, Any]] = {}
+    if manifest_path.is_file() and not force:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    results: Dict[Path, int] = {}
+    pending: List[TrafficTask] = []
+    for task in plan_traffic_grid(output_dir, scales, seeds, scenarios, custom_building):
+        name = task.output_file.relative_to(output_path).as_posix()
+        cached = manifest.get(name)
+        if cached is not None and cached["key"] == task.key and task.output_file.is_file():
+            results[task.output_file] = cached["passengers"]
+        else:
+            task.output_file.parent.mkdir(parents=True, exist_ok=True)
+            pending.append(task)
+    if len(results):
+        logger.info("Skipped %d unchanged traffic files (cached in %s)", len(results), manifest_path)
+
+    failures: Dict[Path, str] = {}
+
+    def fail(task: TrafficTask, error: Exception) -> None:
+        failures[task.output_file] = f"{type(error).__name__}: {error}"
+        logger.error("Error generating %s -> %s: %s", task.scenario, task.output_file, error)
+
+    def record(task: TrafficTask, passengers: int) -> None:
+        results[task.output_file] = passengers
+        manifest[task.output_file.relative_to(output_path).as_posix()] = {"key": task.key, "passengers": passengers}
+
+    if workers == 1 or len(pending) <= 1:
+        for task in pending:
+            try:
+                record(task, _run_traffic_task(task))
+            except Exception as e:
+                fail(task, e)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_traffic_task, task): task for task in pending}
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    record(task, future.result())
+                except Exception as e:
+                    fail(task, e)
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(manifest.items())), f, indent=2)
+    if failures:
+        raise TrafficGridError(failures, results)
+    return results
 
 
 def generate_scaled_traffic_files(
@@ -819,85 +1220,42 @@ def generate_scaled_traffic_files(
     seed: int = 42,
     generate_all_scales: bool = False,
     custom_building: Optional[Dict[str, Any]] = None,
+    seeds: Optional[Sequence[int]] = None,
+    workers: Optional[int] = None,
+    force: bool = False,
 ) -> None:
-    """生成按规模分类的流量文件"""
-    output_path = Path(output_dir)
-    output_path.mkdir(exist_ok=True)
-
+    """生成按规模分类的流量文件；seeds 给出多个种子时每个种子一个子目录"""
     if generate_all_scales:
-        # 生成所有规模的文件
-        for scale_name in ["small", "medium", "large"]:
-            scale_dir = output_path / scale_name
-            scale_dir.mkdir(exist_ok=True)
-            _generate_files_for_scale(scale_dir, scale_name, seed)
+        # 生成所有规模的文件，每个规模一个子目录
+        scales = list(BUILDING_SCALES)
+        custom_building = None
     else:
         # 只生成指定规模
         if custom_building:
             floors = custom_building.get("floors", BUILDING_SCALES[scale]["floors"][0])
             elevators = custom_building.get("elevators", BUILDING_SCALES[scale]["elevators"][0])
-            elevator_capacity = custom_building.get("capacity", BUILDING_SCALES[scale]["capacity"][0])
 
             # 重新确定规模
             detected_scale = determine_building_scale(floors, elevators)
             if detected_scale != scale:
-                print(f"Note: Building config suggests {detected_scale} scale, but {scale} was requested")
+                logger.info("Building config suggests %s scale, but %s was requested", detected_scale, scale)
                 scale = detected_scale
+        scales = [scale]
 
-        _generate_files_for_scale(output_path, scale, seed, custom_building)
-
-
-def _generate_files_for_scale(
-    output_path: Path, scale: str, seed: int, custom_building: Optional[Dict[str, Any]] = None
-) -> None:
-    """为指定规模生成所有适合的场景文件"""
-    building_config = BUILDING_SCALES[scale]
-    total_passengers = 0
-    files_generated = 0
-
-    # 确定建筑参数
-    if custom_building:
-        floors = custom_building.get("floors", building_config["floors"][0])
-        elevators = custom_building.get("elevators", building_config["elevators"][0])
-        elevator_capacity = custom_building.get("capacity", building_config["capacity"][0])
-    else:
-        # 使用规模的默认配置
-        floors = building_config["floors"][0]
-        elevators = building_config["elevators"][0]
-        elevator_capacity = building_config["capacity"][0]
-
-    print(f"\nGenerating {scale} scale traffic files:")
-    print(f"Building: {floors} floors, {elevators} elevators, capacity {elevator_capacity}")
-
-    for scenario_name, scenario_config in TRAFFIC_SCENARIOS.items():
-        # 检查场景是否适合该规模
-        config_dict: Dict[str, Any] = scenario_config
-        if scale not in config_dict["suitable_scales"]:
-            continue
-
-        filename = f"{scenario_name}.json"
-        file_path = output_path / filename
-
-        # 准备参数
-        params = {
-            "floors": floors,
-            "elevators": elevators,
-            "elevator_capacity": elevator_capacity,
-            "seed": seed + hash(scenario_name) % 1000,  # 为每个场景使用不同的seed
-        }
-
-        # 生成流量文件
-        try:
-            passenger_count = generate_traffic_file(scenario_name, str(file_path), scale=scale, **params)
-            total_passengers += passenger_count
-            files_generated += 1
-        except Exception as e:
-            print(f"Error generating {scenario_name}: {e}")
-
-    print(f"Generated {files_generated} traffic files for {scale} scale in {output_path}")
-    print(f"Total passengers: {total_passengers}")
-    print(
-        f"Average per scenario: {total_passengers/files_generated:.1f}" if files_generated > 0 else "No files generated"
+    results = generate_traffic_grid(
+        output_dir, scales, list(seeds or [seed]), custom_building=custom_building, workers=workers, force=force
     )
+    output_path = Path(output_dir)
+    for scale_name in scales:
+        scale_dir = output_path / scale_name if len(scales) > 1 else output_path
+        counts = [count for path, count in results.items() if path.is_relative_to(scale_dir)]
+        total_passengers = sum(counts)
+        logger.info("Generated %d traffic files for %s scale in %s", len(counts), scale_name, scale_dir)
+        logger.info("Total passengers: %d", total_passengers)
+        if counts:
+            logger.info("Average per scenario: %.1f", total_passengers / len(counts))
+        else:
+            logger.info("No files generated")
 
 
 def generate_all_traffic_files(
@@ -906,12 +1264,23 @@ def generate_all_traffic_files(
     elevators: int = 2,
     elevator_capacity: int = 8,
     seed: int = 42,
+    seeds: Optional[Sequence[int]] = None,
+    workers: Optional[int] = None,
+    force: bool = False,
 ) -> None:
     """生成所有场景的流量文件 - 保持向后兼容"""
     scale = determine_building_scale(floors, elevators)
     custom_building = {"floors": floors, "elevators": elevators, "capacity": elevator_capacity}
 
-    generate_scaled_traffic_files(output_dir=output_dir, scale=scale, seed=seed, custom_building=custom_building)
+    generate_scaled_traffic_files(
+        output_dir=output_dir,
+        scale=scale,
+        seed=seed,
+        custom_building=custom_building,
+        seeds=seeds,
+        workers=workers,
+        force=force,
+    )
 
 
 def main() -> None:
@@ -922,7 +1291,7 @@ def main() -> None:
     parser.add_argument(
         "--scale",
         type=str,
-        choices=["small", "medium", "large"],
+        choices=list(BUILDING_SCALES),
         help="Building scale (overrides individual parameters)",
     )
     parser.add_argument(
@@ -932,6 +1301,11 @@ def main() -> None:
     parser.add_argument("--elevators", type=int, help="Number of elevators")
     parser.add_argument("--elevator-capacity", type=int, help="Elevator capacity")
     parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument(
+        "--seeds", type=int, nargs="+", default=None, help="Several seeds, one seed_<seed> directory each"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Regenerate files even if the cache is up to date")
     parser.add_argument("--output-dir", type=str, default=None, help="Output directory (default: current directory)")
 
     args = parser.parse_args()
@@ -940,7 +1314,14 @@ def main() -> None:
 
     if args.all_scales:
         # 生成所有规模的文件
-        generate_scaled_traffic_files(output_dir=output_dir, generate_all_scales=True, seed=args.seed)
+        generate_scaled_traffic_files(
+            output_dir=output_dir,
+            generate_all_scales=True,
+            seed=args.seed,
+            seeds=args.seeds,
+            workers=args.workers,
+            force=args.force,
+        )
     elif args.scale:
         # 生成指定规模的文件
         custom_building = None
@@ -954,7 +1335,13 @@ def main() -> None:
                 custom_building["capacity"] = args.elevator_capacity
 
         generate_scaled_traffic_files(
-            output_dir=output_dir, scale=args.scale, seed=args.seed, custom_building=custom_building
+            output_dir=output_dir,
+            scale=args.scale,
+            seed=args.seed,
+            custom_building=custom_building,
+            seeds=args.seeds,
+            workers=args.workers,
+            force=args.force,
         )
     else:
         # 向后兼容模式：使用旧的参数
@@ -968,6 +1355,9 @@ def main() -> None:
             elevators=elevators,
             elevator_capacity=elevator_capacity,
             seed=args.seed,
+            seeds=args.seeds,
+            workers=args.workers,
+            force=args.force,
         )
 
     print("\nUsage examples:")
@@ -979,6 +1369,8 @@ def main() -> None:
     print("  python generators.py --floors 3 --elevators 1")
     print("  # Force scale with custom config:")
     print("  python generators.py --scale large --floors 12 --elevators 4")
+    print("  # Seed grid on 8 processes (unchanged files are skipped):")
+    print("  python generators.py --all-scales --seeds 1 2 3 --workers 8")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Streaming JSON traffic files
+增量读写JSON流量文件：写入时逐条输出，读取时逐条解析，不在内存中保存整个文档
+
+- TrafficJsonWriter：按tick顺序逐条写入乘客，building 块在前（与 json.dump 的输出顺序相同），
+  indent=2 时输出与 json.dump(indent=2) 相同，indent=None 时为紧凑格式
+- iter_traffic_entries：按文件顺序逐条产生乘客，要求文件已按tick排序
+- load_traffic_columns：逐条解析为按tick排序的三列数组，文件未排序时在列上稳定排序
+
+乘客数超过 COMPACT_JSON_THRESHOLD 时生成器默认输出紧凑格式。
+"""
+import json
+import re
+from array import array
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+import numpy as np
+
+# 乘客数超过该值时默认不缩进
+COMPACT_JSON_THRESHOLD = 10000
+
+PathLike = Union[str, Path]
+
+_CHUNK_SIZE = 1 << 20
+_FLUSH_ENTRIES = 4096
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+# expected_passengers 为 None 时先写入的占位宽度，关闭时回填实际乘客数（数字后的空格是合法的JSON空白）
+_COUNT_WIDTH = 20
+_COUNT_MARKER = 10 ** (_COUNT_WIDTH - 1)
+
+
+class TrafficJsonWriter:
+    """
+    逐条写入JSON流量文件，乘客必须按tick非递减的顺序写入
+
+    building 中 expected_passengers 为 None 时在关闭文件时回填实际写入的乘客数。
+
+        with TrafficJsonWriter(path, building, indent=None) as writer:
+            for entry in entries:
+                writer.write(entry)
+    """
+
+    def __init__(self, path: PathLike, building: Dict[str, Any], indent: Optional[int] = 2):
+        self.path = Path(path)
+        self.indent = indent
+        self.count = 0
+        self.last_tick: Optional[int] = None
+        self._pending: List[str] = []
+
+        header_building = dict(building)
+        patch_count = "expected_passengers" in building and building["expected_passengers"] is None
+        if patch_count:
+            header_building["expected_passengers"] = _COUNT_MARKER
+        separators = (",", ":") if indent is None else (",", ": ")
+        text = json.dumps(
+            {"building": header_building, "traffic": []}, indent=indent, separators=separators, ensure_ascii=False
+        )
+        split = text.rindex("[]")
+        head, self._tail = text[:split] + "[", text[split + 2 :]
+        if indent is None:
+            self._separator = ""
+            self._entry_template = '{"id":%d,"origin":%d,"destination":%d,"tick":%d}'
+        else:
+            outer, inner = " " * (2 * indent), " " * (3 * indent)
+            self._separator = "\n" + outer
+            self._entry_template = (
+                self._separator
+                + "{\n"
+                + ",\n".join(f'{inner}"{key}": %d' for key in ("id", "origin", "destination", "tick"))
+                + "\n"
+                + outer
+                + "}"
+            )
+
+        self._file: IO[bytes] = open(self.path, "wb")
+        self._count_offset: Optional[int] = None
+        if patch_count:
+            marker = head.index(str(_COUNT_MARKER), head.index('"expected_passengers"'))
+            self._count_offset = len(head[:marker].encode("utf-8"))
+        self._file.write(head.encode("utf-8"))
+
+    def _check_tick(self, tick: int) -> None:
+        if self.last_tick is not None and tick < self.last_tick:
+            raise ValueError(f"traffic must be written in tick order (tick {tick} after {self.last_tick})")
+        self.last_tick = tick
+
+    def _append(self, text: str) -> None:
+        self._pending.append(text if not self.count else "," + text)
+        self.count += 1
+        if len(self._pending) >= _FLUSH_ENTRIES:
+            self.flush()
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        """写入一条乘客记录（{"id", "origin", "destination", "tick"}，可以有其他字段）"""
+        self._check_tick(entry["tick"])
+        if self.indent is None:
+            text = json.dumps(entry, separators=(",", ":"), ensure_ascii=False)
+        else:
+            text = self._separator + json.dumps(entry, indent=self.indent, ensure_ascii=False).replace(
+                "\n", self._separator
+            )
+        self._append(text)
+
+    def write_columns(self, ticks: Any, origins: Any, destinations: Any, ids: Any = None) -> None:
+        """写入一批按tick排序的列（可以是NumPy数组），ids 为 None 时从已写入的乘客数加一开始连续编号"""
+        ticks = np.asarray(ticks, dtype=np.int64)
+        if ticks.size == 0:
+            return
+        if np.any(ticks[1:] < ticks[:-1]):
+            raise ValueError("traffic columns must be sorted by tick")
+        self._check_tick(int(ticks[0]))
+        self.last_tick = int(ticks[-1])
+        first_id = self.count + 1
+        origins, destinations = np.asarray(origins), np.asarray(destinations)
+        id_array = None if ids is None else np.asarray(ids)
+        template = self._entry_template
+        # 每次只把一个刷新批次转换为Python整数，不为整列创建列表
+        for start in range(0, ticks.size, _FLUSH_ENTRIES):
+            stop = min(start + _FLUSH_ENTRIES, ticks.size)
+            id_values = range(first_id + start, first_id + stop) if id_array is None else id_array[start:stop].tolist()
+            rows = zip(
+                id_values,
+                origins[start:stop].tolist(),
+                destinations[start:stop].tolist(),
+                ticks[start:stop].tolist(),
+            )
+            for row in rows:
+                self._append(template % row)
+
+    def flush(self) -> None:
+        if self._pending:
+            self._file.write("".join(self._pending).encode("utf-8"))
+            self._pending = []
+
+    def close(self) -> None:
+        """写入结尾并回填乘客数"""
+        if self._file.closed:
+            return
+        self.flush()
+        closing = "]" if not self.count or self.indent is None else "\n" + " " * self.indent + "]"
+        self._file.write((closing + self._tail).encode("utf-8"))
+        if self._count_offset is not None:
+            self._file.seek(self._count_offset)
+            self._file.write(str(self.count).ljust(_COUNT_WIDTH).encode("ascii"))
+        self._file.close()
+
+    def __enter__(self) -> "TrafficJsonWriter":
+        return self
+
+    def __exit__(
+        self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException], tb: Optional[TracebackType]
+    ) -> None:
+        self.close()
+
+
+def write_traffic_json(
+    path: PathLike,
+    building: Dict[str, Any],
+    ticks: Any,
+    origins: Any,
+    destinations: Any,
+    indent: Optional[int] = None,
+) -> int:
+    """将三列数据按tick稳定排序后写入JSON流量文件，默认紧凑格式，返回乘客数"""
+    ticks = np.asarray(ticks, dtype=np.int64)
+    order = np.argsort(ticks, kind="stable")
+    with TrafficJsonWriter(path, building, indent=indent) as writer:
+        writer.write_columns(ticks[order], np.asarray(origins)[order], np.asarray(destinations)[order])
+    return writer.count
+
+
+class _ChunkScanner:
+    """按块读取文本并用 JSONDecoder.raw_decode 逐个解析值"""
+
+    def __init__(self, f: IO[str], path: PathLike):
+        self.f = f
+        self.path = path
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(_CHUNK_SIZE)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f"{self.path}: {message}")
+
+    def peek(self) -> str:
+        """跳过空白，返回下一个字符（文件结束时为空字符串）"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()  # type: ignore[union-attr]
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def take(self, expected: str) -> str:
+        char = self.peek()
+        if char not in expected or not char:
+            raise self._error(f"expected one of {expected!r}, found {char or 'end of file'!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise self._error(f"invalid JSON: {e}") from e
+            # 数字可能被块边界截断：值之后必须还有字符才能确认解析完整
+            if end >= len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def batch(self) -> List[Any]:
+        """
+        一次解析缓冲区中到最后一个 } 为止的所有数组元素，比逐个 raw_decode 快得多
+
+        切分位置不在元素边界上时（如 } 位于嵌套对象、字符串或 traffic 之后的字段中）解析必然失败，
+        此时向前再试一个 }，仍失败则在缓冲区内逐个解析完整的元素，每个块最多回退一次。
+        """
+        self.peek()
+        end = len(self.buf)
+        for _ in range(2):
+            end = self.buf.rfind("}", self.pos, end)
+            if end < 0:
+                return []
+            try:
+                values: List[Any] = json.loads("[" + self.buf[self.pos : end + 1] + "]")
+            except json.JSONDecodeError:
+                continue
+            self.pos = end + 1
+            return values
+        return self._decode_elements()
+
+    def _decode_elements(self) -> List[Any]:
+        """逐个解析缓冲区内的完整元素，停在数组结尾的 ] 或缓冲区中最后一个完整元素之后"""
+        values: List[Any] = []
+        start = self.pos
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, start)
+            except json.JSONDecodeError:
+                return values
+            # 数字可能被块边界截断，留给 value() 读入下一块后解析
+            if end >= len(self.buf):
+                return values
+            values.append(value)
+            self.pos = end
+            separator = _WHITESPACE.match(self.buf, end).end()  # type: ignore[union-attr]
+            if separator >= len(self.buf) or self.buf[separator] != ",":
+                return values
+            start = _WHITESPACE.match(self.buf, separator + 1).end()  # type: ignore[union-attr]
+
+
+def _scan_traffic_json(path: PathLike) -> Iterator[Tuple[str, Any]]:
+    """逐个产生顶层字段 (名称, 值)；traffic 数组中的每个乘客产生为 ("entry", 乘客)"""
+    with open(path, "r", encoding="utf-8") as f:
+        scanner = _ChunkScanner(f, path)
+        scanner.take("{")
+        if scanner.peek() == "}":
+            return
+        while True:
+            key = scanner.value()
+            if not isinstance(key, str):
+                raise scanner._error("expected an object key")
+            scanner.take(":")
+            if key == "traffic":
+                scanner.take("[")
+                if scanner.peek() == "]":
+                    scanner.pos += 1
+                else:
+                    while True:
+                        for entry in scanner.batch() or [scanner.value()]:
+                            yield "entry", entry
+                        if scanner.take(",]") == "]":
+                            break
+            else:
+                yield key, scanner.value()
+            if scanner.take(",}") == "}":
+                return
+
+
+def read_traffic_building(path: PathLike) -> Dict[str, Any]:
+    """只读取 building 块（building 在 traffic 之前时不解析任何乘客）"""
+    for key, value in _scan_traffic_json(path):
+        if key == "building":
+            building: Dict[str, Any] = value
+            return building
+    raise ValueError(f"{path}: no building block")
+
+
+def iter_traffic_entries(path: PathLike) -> Iterator[Dict[str, Any]]:
+    """
+    按tick顺序逐条产生乘客，内存占用与文件大小无关
+
+    文件必须已按tick排序（TrafficJsonWriter 写出的文件总是有序的），
+    否则在遇到第一条乱序记录时抛出 ValueError；未排序的文件使用 load_traffic_columns。
+    """
+    last_tick = None
+    for key, value in _scan_traffic_json(path):
+        if key != "entry":
+            continue
+        tick = value["tick"]
+        if last_tick is not None and tick < last_tick:
+            raise ValueError(f"{path}: traffic is not sorted by tick (tick {tick} after {last_tick})")
+        last_tick = tick
+        yield value
+
+
+def load_traffic_columns(path: PathLike) -> Tuple[Dict[str, Any], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    逐条解析JSON流量文件，返回 (building, ticks, origins, destinations)，各列按tick稳定排序
+
+    每个乘客只占用三列中的24字节，不保留解析出的字典。
+    """
+    building: Optional[Dict[str, Any]] = None
+    ticks, origins, destinations = array("q"), array("q"), array("q")
+    for key, value in _scan_traffic_json(path):
+        if key == "entry":
+            ticks.append(value["tick"])
+            origins.append(value["origin"])
+            destinations.append(value["destination"])
+        elif key == "building":
+            building = value
+    if building is None:
+        raise ValueError(f"{path}: no building block")
+    tick_column = np.frombuffer(ticks, dtype=np.int64)
+    origin_column = np.frombuffer(origins, dtype=np.int64)
+    destination_column = np.frombuffer(destinations, dtype=np.int64)
+    if np.any(tick_column[1:] < tick_column[:-1]):
+        order = np.argsort(tick_column, kind="stable")
+        return building, tick_column[order], origin_column[order], destination_column[order]
+    return building, tick_column, origin_column, destination_column
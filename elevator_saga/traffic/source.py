@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Traffic sources
+模拟器的乘客到达来源：按tick顺序提供到达的乘客，模拟器每个tick调用一次 take_until
+
+- ArrayTrafficSource：按tick排序的三列数据加上游标，JSON和二进制流量文件都转换为这种形式
+- JsonTrafficSource / BinaryTrafficSource：从流量文件创建（二进制文件为内存映射，不读入内存）
+- GeneratorTrafficSource：用 TRAFFIC_SCENARIOS 中的生成器逐周期生成流量，可以无限运行，
+  任一时刻只保留当前周期的乘客，内存占用与运行时长无关
+- inline_traffic_source：从请求中的内联建筑配置和流量（列式数组、条目列表或生成器参数）创建，不读写文件
+"""
+import inspect
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from elevator_saga.traffic.binary import BINARY_TRAFFIC_SUFFIX, load_binary_traffic
+from elevator_saga.traffic.generators import TRAFFIC_SCENARIOS, resolve_scenario_params
+from elevator_saga.traffic.jsonstream import load_traffic_columns
+
+# 一批到达的乘客：(id列表, 起点列表, 终点列表)
+ArrivalBatch = Tuple[Sequence[int], List[int], List[int]]
+
+_NO_ARRIVALS: ArrivalBatch = ((), [], [])
+
+
+class TrafficSource(ABC):
+    """
+    流量来源基类，子类必须实现 take_until
+
+    building 与流量文件的 building 块相同（floors / elevators / elevator_capacity / duration），
+    duration 为 None 表示没有结束时间。
+    """
+
+    building: Dict[str, Any]
+
+    @property
+    def duration(self) -> Optional[int]:
+        """运行的总tick数，None 表示无限"""
+        duration = self.building.get("duration")
+        return None if duration is None else int(duration)
+
+    @property
+    def pending(self) -> Optional[int]:
+        """尚未到达的乘客数，无法预知时为 None"""
+        return None
+
+    @abstractmethod
+    def take_until(self, tick: int) -> ArrivalBatch:
+        """取出所有 tick <= 给定tick 且尚未取出的乘客，按tick顺序"""
+
+
+class ArrayTrafficSource(TrafficSource):
+    """
+    按tick排序的列加游标：每次只切出本tick到达的一段，不为每个乘客预先创建对象
+
+    列被直接引用而不复制，可以是 np.memmap。ids 为 None 时从 first_id 开始连续编号。
+    """
+
+    def __init__(
+        self,
+        building: Dict[str, Any],
+        ticks: np.ndarray,
+        origins: np.ndarray,
+        destinations: np.ndarray,
+        ids: Optional[np.ndarray] = None,
+        first_id: int = 1,
+    ):
+        self.building = building
+        self.ticks = ticks
+        self.origins = origins
+        self.destinations = destinations
+        self.ids = ids
+        self.first_id = first_id
+        self.cursor = 0
+
+    @classmethod
+    def empty(cls, building: Optional[Dict[str, Any]] = None) -> "ArrayTrafficSource":
+        columns = np.empty(0, dtype=np.int64)
+        return cls(building or {"duration": 0}, columns, columns, columns)
+
+    @classmethod
+    def from_traffic_data(cls, file_data: Dict[str, Any]) -> "ArrayTrafficSource":
+        """从流量文件格式的数据（{"building": ..., "traffic": [...]}）创建，条目按tick稳定排序"""
+        traffic: List[Dict[str, Any]] = file_data["traffic"]
+        count = len(traffic)
+        ticks = np.fromiter((entry["tick"] for entry in traffic), dtype=np.int64, count=count)
+        order = np.argsort(ticks, kind="stable")
+        return cls(
+            file_data["building"],
+            ticks[order],
+            np.fromiter((entry["origin"] for entry in traffic), dtype=np.int64, count=count)[order],
+            np.fromiter((entry["destination"] for entry in traffic), dtype=np.int64, count=count)[order],
+        )
+
+    def __len__(self) -> int:
+        return len(self.ticks)
+
+    @property
+    def pending(self) -> Optional[int]:
+        return len(self.ticks) - self.cursor
+
+    def take_until(self, tick: int) -> ArrivalBatch:
+        start = self.cursor
+        end = int(np.searchsorted(self.ticks, tick, side="right"))
+        if end <= start:
+            return _NO_ARRIVALS
+        self.cursor = end
+        if self.ids is not None:
+            ids: Sequence[int] = self.ids[start:end].tolist()
+        else:
+            ids = range(self.first_id + start, self.first_id + end)
+        return ids, self.origins[start:end].tolist(), self.destinations[start:end].tolist()
+
+
+class JsonTrafficSource(ArrayTrafficSource):
+    """JSON流量文件，逐条解析为列，不保留整个文档"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        super().__init__(*load_traffic_columns(self.path))
+
+
+class BinaryTrafficSource(ArrayTrafficSource):
+    """二进制流量文件（.elvt），各列为只读内存映射"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        traffic = load_binary_traffic(self.path)
+        super().__init__(traffic.building, traffic.ticks, traffic.origins, traffic.destinations)
+
+
+def open_traffic_source(path: Union[str, Path]) -> ArrayTrafficSource:
+    """按扩展名打开流量文件"""
+    if Path(path).suffix == BINARY_TRAFFIC_SUFFIX:
+        return BinaryTrafficSource(path)
+    return JsonTrafficSource(path)
+
+
+class GeneratorTrafficSource(TrafficSource):
+    """
+    由场景生成器逐周期产生的流量
+
+    每个周期长 duration 个tick（场景参数），第k个周期以 seed + k 调用生成器，
+    到达tick整体偏移 k * duration。只有当前周期的乘客在内存中，适合长时间的浸泡测试。
+
+    Args:
+        scenario: TRAFFIC_SCENARIOS 中的场景名称
+        scale: 建筑规模，None 时按 floors/elevators 推断（与 generate_traffic_file 相同）
+        seed: 第一个周期的随机种子
+        max_ticks: 总运行tick数，None 表示无限
+        vectorized: 使用 traffic.vectorized 中的NumPy生成器（泊松到达，适合高流量）
+        **params: 覆盖场景参数，如 floors、elevators、duration、max_people
+    """
+
+    def __init__(
+        self,
+        scenario: str,
+        scale: Optional[str] = None,
+        seed: int = 42,
+        max_ticks: Optional[int] = None,
+        vectorized: bool = False,
+        **params: Any,
+    ):
+        scale, resolved = resolve_scenario_params(scenario, scale, **params)
+        config: Dict[str, Any] = TRAFFIC_SCENARIOS[scenario]
+        self.scenario = scenario
+        self.seed = seed
+        self.period = int(resolved["duration"])
+        if self.period <= 0:
+            raise ValueError("scenario duration must be positive")
+        self.building = {
+            "floors": resolved["floors"],
+            "elevators": resolved["elevators"],
+            "elevator_capacity": resolved["elevator_capacity"],
+            "scenario": scenario,
+            "scale": scale,
+            "description": f"{config['description']} ({scale}规模，周期 {self.period} ticks)",
+            "duration": max_ticks,
+        }
+        if vectorized:
+            from elevator_saga.traffic.vectorized import VECTORIZED_GENERATORS
+
+            self._generator: Callable[..., Any] = VECTORIZED_GENERATORS[scenario]
+        else:
+            self._generator = config["generator"]
+        self.vectorized = vectorized
+        accepted = inspect.signature(self._generator).parameters
+        # 每个周期传给生成器的场景参数（不含 seed）
+        self.params = {k: v for k, v in resolved.items() if k in accepted and k != "seed"}
+        self.periods_generated = 0
+        self._next_id = 1
+        self._chunk = ArrayTrafficSource.empty()
+
+    def _generate_period(self, index: int) -> ArrayTrafficSource:
+        """生成第 index 个周期的乘客"""
+        traffic = self._generator(seed=self.seed + index, **self.params)
+        offset = index * self.period
+        if self.vectorized:
+            ticks, origins, destinations = traffic["tick"], traffic["origin"], traffic["destination"]
+        else:
+            chunk = ArrayTrafficSource.from_traffic_data({"building": self.building, "traffic": traffic})
+            ticks, origins, destinations = chunk.ticks, chunk.origins, chunk.destinations
+        source = ArrayTrafficSource(self.building, ticks + offset, origins, destinations, first_id=self._next_id)
+        self._next_id += len(source)
+        self.periods_generated = index + 1
+        return source
+
+    def generate_first_period(self) -> ArrayTrafficSource:
+        """立即生成第一个周期（默认在第一次 take_until 时生成），参数无效时在这里而不是步进时抛出异常"""
+        if not self.periods_generated:
+            self._chunk = self._generate_period(0)
+        return self._chunk
+
+    @property
+    def pending(self) -> Optional[int]:
+        if self.duration is not None and self.periods_generated * self.period >= self.duration:
+            return self._chunk.pending
+        return None
+
+    def take_until(self, tick: int) -> ArrivalBatch:
+        if self.duration is not None:
+            tick = min(tick, self.duration)
+        ids, origins, destinations = self._chunk.take_until(tick)
+        # 当前周期取完且已进入下一个周期：生成下一个周期（tick跳过多个周期时逐个生成）
+        while not self._chunk.pending and tick >= self.periods_generated * self.period:
+            if self.duration is not None and self.periods_generated * self.period > self.duration:
+                break
+            self._chunk = self._generate_period(self.periods_generated)
+            more_ids, more_origins, more_destinations = self._chunk.take_until(tick)
+            if more_origins:
+                if origins:
+                    ids = list(ids) + list(more_ids)
+                    origins = origins + more_origins
+                    destinations = destinations + more_destinations
+                else:
+                    ids, origins, destinations = more_ids, more_origins, more_destinations
+        return ids, origins, destinations
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "scenario": self.scenario,
+            "seed": self.seed,
+            "period": self.period,
+            "periods_generated": self.periods_generated,
+            "passengers_generated": self._next_id - 1,
+            "vectorized": self.vectorized,
+        }
+
+
+# 建筑配置中必须为正整数的字段
+BUILDING_FIELDS = ("floors", "elevators", "elevator_capacity")
+
+# 内联列式流量的列名，与二进制流量文件的列相同
+TRAFFIC_COLUMNS = ("tick", "origin", "destination")
+
+# 内联流量的上限（一个请求不能让服务器分配任意大的模拟），高于最大的 mega 规模
+INLINE_MAX_FLOORS = 200
+INLINE_MAX_ELEVATORS = 64
+# 列式数组和条目列表的乘客数、生成器的 max_people 和每个周期生成的乘客数
+INLINE_MAX_PASSENGERS = 100_000
+# 生成器参数的 max_ticks 上限，内联的运行不能没有结束时间
+INLINE_MAX_TICKS = 10_000_000
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_building(building: Dict[str, Any]) -> None:
+    for key in BUILDING_FIELDS:
+        if not _is_int(building.get(key)) or building[key] <= 0:
+            raise ValueError(f"building.{key} must be a positive integer")
+    if building["floors"] < 2:
+        raise ValueError("building.floors must be at least 2")
+    if building["floors"] > INLINE_MAX_FLOORS:
+        raise ValueError(f"building.floors must be at most {INLINE_MAX_FLOORS}")
+    if building["elevators"] > INLINE_MAX_ELEVATORS:
+        raise ValueError(f"building.elevators must be at most {INLINE_MAX_ELEVATORS}")
+    duration = building.get("duration")
+    if duration is not None and (not _is_int(duration) or duration < 0):
+        raise ValueError("building.duration must be a non-negative integer or null")
+
+
+def _int_column(name: str, values: Any) -> np.ndarray:
+    try:
+        column = np.asarray(values)
+    except ValueError as e:
+        raise ValueError(f"traffic {name} must be a list of integers") from e
+    if column.ndim != 1 or (column.size and column.dtype.kind not in "iu"):
+        raise ValueError(f"traffic {name} must be a list of integers")
+    return column.astype(np.int64)
+
+
+def _check_columns(source: ArrayTrafficSource) -> None:
+    floors = source.building["floors"]
+    if source.ticks.size > INLINE_MAX_PASSENGERS:
+        raise ValueError(f"inline traffic must have at most {INLINE_MAX_PASSENGERS} passengers")
+    if source.ticks.size == 0:
+        return
+    if source.ticks[0] < 0:
+        raise ValueError("ticks must be non-negative")
+    for name, column in (("origin", source.origins), ("destination", source.destinations)):
+        if column.min() < 0 or column.max() >= floors:
+            raise ValueError(f"every {name} must be a floor between 0 and {floors - 1}")
+    if np.any(source.origins == source.destinations):
+        raise ValueError("origin and destination must differ for every passenger")
+
+
+def _check_generator_params(params: Dict[str, Any]) -> None:
+    """生成前检查场景参数的类型和上限（生成器本身不检查，错误参数会在生成时失败或生成过多乘客）"""
+    max_people = params.get("max_people")
+    if max_people is not None and (not _is_int(max_people) or not 0 <= max_people <= INLINE_MAX_PASSENGERS):
+        raise ValueError(f"max_people must be an integer between 0 and {INLINE_MAX_PASSENGERS}")
+    for key, value in params.items():
+        if key in ("duration", "max_people") or key in BUILDING_FIELDS:
+            continue
+        if not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"generator parameter {key} must be a non-negative number")
+
+
+def inline_traffic_source(building: Optional[Dict[str, Any]], traffic: Any) -> TrafficSource:
+    """
+    从内联数据创建流量来源，不读写文件；数据无效时抛出 ValueError
+
+    traffic 可以是：
+    - 列式数组 {"tick": [...], "origin": [...], "destination": [...]}（与 .elvt 的列相同），需要 building
+    - 条目列表 [{"tick", "origin", "destination"}, ...]（与流量文件的 traffic 数组相同），需要 building
+    - 生成器参数 {"scenario": ..., "scale"/"seed"/"max_ticks"/"vectorized"/场景参数...}，即 GeneratorTrafficSource 的参数；
+      building 中的字段作为场景参数覆盖，未给出 max_ticks 时只运行一个周期，max_ticks 不能为 null（无限）；
+      第一个周期在这里生成并检查，参数无效时不会等到步进时才失败
+
+    数组和列表会按tick稳定排序；building 没有 duration 时取最后一个到达tick加一。
+    楼层数、电梯数和乘客数有上限（INLINE_MAX_*）。
+    """
+    if isinstance(traffic, dict) and "scenario" in traffic:
+        spec = {**traffic, **(building or {})}
+        if "scenario" in (building or {}):
+            raise ValueError("building must not override the generator scenario")
+        max_ticks = spec.get("max_ticks", 0)
+        if "max_ticks" in spec and (not _is_int(max_ticks) or not 0 < max_ticks <= INLINE_MAX_TICKS):
+            raise ValueError(f"max_ticks must be an integer between 1 and {INLINE_MAX_TICKS}")
+        try:
+            generator = GeneratorTrafficSource(**spec)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"invalid generator parameters: {e!r}") from e
+        if "max_ticks" not in spec:
+            generator.building["duration"] = generator.period
+        _check_building(generator.building)
+        _check_generator_params(generator.params)
+        try:
+            first_period = generator.generate_first_period()
+        except (ArithmeticError, LookupError, TypeError, ValueError) as e:
+            raise ValueError(f"invalid generator parameters: {e!r}") from e
+        _check_columns(first_period)
+        return generator
+
+    if not isinstance(building, dict):
+        raise ValueError("inline traffic requires a building object")
+    building = dict(building)
+    _check_building(building)
+    if isinstance(traffic, dict):
+        missing = [name for name in TRAFFIC_COLUMNS if name not in traffic]
+        if missing:
+            raise ValueError(f"traffic columns missing: {', '.join(missing)}")
+        columns = [traffic[name] for name in TRAFFIC_COLUMNS]
+    elif isinstance(traffic, list):
+        try:
+            columns = [[entry[name] for entry in traffic] for name in TRAFFIC_COLUMNS]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"every traffic entry needs tick, origin and destination ({e!r})") from e
+    else:
+        raise ValueError("traffic must be a column object, a list of entries or a generator spec")
+    ticks, origins, destinations = (_int_column(name, values) for name, values in zip(TRAFFIC_COLUMNS, columns))
+    if not ticks.shape == origins.shape == destinations.shape:
+        raise ValueError("tick, origin and destination must have the same length")
+    order = np.argsort(ticks, kind="stable")
+    if building.get("duration") is None:
+        building["duration"] = int(ticks.max()) + 1 if ticks.size else 0
+    source = ArrayTrafficSource(building, ticks[order], origins[order], destinations[order])
+    _check_columns(source)
+    return source
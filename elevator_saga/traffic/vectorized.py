@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Vectorized traffic generators
+基于 NumPy 的流量生成器，与 generators.py 中的各个场景一一对应，适合生成百万级乘客
+
+与逐tick循环的生成器相比：
+- 每个tick的到达人数按泊松分布抽取，强度不再被限制在每tick最多一人
+- 起点和终点整批抽样，终点从排除起点后的楼层中均匀抽取，起点和终点不会相同
+- 返回结构化数组（字段 id/origin/destination/tick，按tick排序），可用 traffic_array_to_list 转为流量文件格式
+
+compat=True 时使用与原生成器相同的分布：每tick按当前强度做一次伯努利试验（最多一人），
+强度按原规则根据 max_people 缩放并限制在1以内。随机数来源不同，因此结果与原生成器分布一致但不逐条相同。
+"""
+import inspect
+import math
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from elevator_saga.traffic.generators import (
+    OFFICE_DAY_HOURS,
+    OFFICE_DAY_PROFILE,
+    calculate_intensity_for_scale,
+    office_day_floors,
+)
+
+# 流量结构化数组的字段，顺序与流量文件中的条目一致
+TRAFFIC_DTYPE = np.dtype([("id", np.int64), ("origin", np.int32), ("destination", np.int32), ("tick", np.int64)])
+
+FloorArrays = Tuple[np.ndarray, np.ndarray]
+
+
+def _scaled_rate(intensity: float, floors: int, target_people: int, duration: int, compat: bool) -> float:
+    """
+    根据目标人数计算每tick的基础到达强度
+
+    兼容模式沿用 calculate_intensity_for_scale（上限为1）；泊松模式取相同的比例但不设上限
+    """
+    if compat:
+        return calculate_intensity_for_scale(intensity, floors, target_people, duration)
+    if intensity * duration <= 0:
+        return intensity
+    return target_people / duration
+
+
+def _arrival_ticks(rng: np.random.Generator, rates: np.ndarray, compat: bool, offset: int = 0) -> np.ndarray:
+    """按每tick强度抽取到达时刻，返回升序的tick数组（同一tick可重复出现）"""
+    if compat:
+        ticks = np.flatnonzero(rng.random(rates.size) < rates)
+    else:
+        ticks = np.repeat(np.arange(rates.size), rng.poisson(np.maximum(rates, 0.0)))
+    return ticks.astype(np.int64) + offset
+
+
+def _uniform(rng: np.random.Generator, low: Any, high: Any, size: int) -> np.ndarray:
+    """在闭区间 [low, high] 内均匀抽取楼层，low/high 可以是数组"""
+    return rng.integers(low, np.asarray(high) + 1, size=size)
+
+
+def _destinations_excluding(rng: np.random.Generator, origins: np.ndarray, low: int, high: int) -> np.ndarray:
+    """在 [low, high] 中排除各自起点后均匀抽取终点（起点必须在区间内）"""
+    destinations = rng.integers(low, high, size=origins.size)
+    destinations += destinations >= origins
+    return destinations
+
+
+def _random_pairs(rng: np.random.Generator, size: int, low: int, high: int) -> FloorArrays:
+    """在 [low, high] 楼层间随机移动：起点均匀，终点为其余楼层之一"""
+    origins = _uniform(rng, low, high, size)
+    return origins, _destinations_excluding(rng, origins, low, high)
+
+
+def _pack(ticks: np.ndarray, origins: np.ndarray, destinations: np.ndarray, max_people: int) -> np.ndarray:
+    """组装结构化数组：按tick稳定排序，保留最早的 max_people 人，id 从1开始连续编号"""
+    order = np.argsort(ticks, kind="stable")[:max_people]
+    traffic = np.empty(order.size, dtype=TRAFFIC_DTYPE)
+    traffic["id"] = np.arange(1, order.size + 1)
+    traffic["origin"] = origins[order]
+    traffic["destination"] = destinations[order]
+    traffic["tick"] = ticks[order]
+    return traffic
+
+
+def _concat(parts: List[Tuple[np.ndarray, np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    ticks, origins, destinations = zip(*parts)
+    return np.concatenate(ticks), np.concatenate(origins), np.concatenate(destinations)
+
+
+def _up_peak_floors(
+    rng: np.random.Generator, size: int, floors: int, lobby_ratio: float, other_low: int
+) -> FloorArrays:
+    """上行高峰的楼层：按 lobby_ratio 从大厅上楼，其余从 [other_low, floors-2] 向更高楼层移动"""
+    lobby = rng.random(size) < lobby_ratio
+    if floors > 2:
+        other_origins = _uniform(rng, other_low, floors - 2, size)
+        other_destinations = _uniform(rng, other_origins + 1, floors - 1, size)
+    else:
+        other_origins = np.zeros(size, dtype=np.int64)
+        other_destinations = np.full(size, floors - 1, dtype=np.int64)
+    origins = np.where(lobby, 0, other_origins)
+    destinations = np.where(lobby, _uniform(rng, 1, floors - 1, size), other_destinations)
+    return origins, destinations
+
+
+def _down_peak_floors(rng: np.random.Generator, size: int, floors: int, lobby_ratio: float) -> FloorArrays:
+    """下行高峰的楼层：按 lobby_ratio 下到大厅，其余从 [2, floors-1] 向更低楼层（不含大厅）移动"""
+    lobby = rng.random(size) < lobby_ratio
+    if floors > 2:
+        other_origins = _uniform(rng, 2, floors - 1, size)
+        other_destinations = _uniform(rng, 1, other_origins - 1, size)
+    else:
+        other_origins = np.full(size, floors - 1, dtype=np.int64)
+        other_destinations = np.zeros(size, dtype=np.int64)
+    origins = np.where(lobby, _uniform(rng, 1, floors - 1, size), other_origins)
+    destinations = np.where(lobby, 0, other_destinations)
+    return origins, destinations
+
+
+def _restaurant_floors(rng: np.random.Generator, size: int, floors: int) -> FloorArrays:
+    """午餐流量的楼层：1-2楼为餐厅，3楼以上为办公室，去餐厅和回办公室各占一半"""
+    to_restaurant = rng.random(size) < 0.5
+    offices = _uniform(rng, 3, floors - 1, size)
+    restaurants = _uniform(rng, 1, 2, size)
+    return np.where(to_restaurant, offices, restaurants), np.where(to_restaurant, restaurants, offices)
+
+
+def generate_up_peak_traffic_array(
+    floors: int = 10,
+    duration: int = 300,
+    intensity: float = 0.6,
+    max_people: int = 100,
+    seed: int = 42,
+    compat: bool = False,
+) -> np.ndarray:
+    """生成上行高峰流量 - 主要从底层到高层"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(duration)
+    rate = _scaled_rate(intensity, floors, max_people, duration, compat)
+    ticks = _arrival_ticks(rng, rate * (1.0 + 0.5 * np.sin(t * math.pi / duration)), compat)
+    origins, destinations = _up_peak_floors(rng, ticks.size, floors, 0.95 if floors <= 5 else 0.9, 1)
+    return _pack(ticks, origins, destinations, max_people)
+
+
+def generate_down_peak_traffic_array(
+    floors: int = 10,
+    duration: int = 300,
+    intensity: float = 0.6,
+    max_people: int = 100,
+    seed: int = 42,
+    compat: bool = False,
+) -> np.ndarray:
+    """生成下行高峰流量 - 主要从高层到底层"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(duration)
+    rate = _scaled_rate(intensity, floors, max_people, duration, compat)
+    ticks = _arrival_ticks(rng, rate * (1.0 + 0.5 * np.sin((t + duration / 2) * math.pi / duration)), compat)
+    origins, destinations = _down_peak_floors(rng, ticks.size, floors, 0.95 if floors <= 5 else 0.9)
+    return _pack(ticks, origins, destinations, max_people)
+
+
+def generate_inter_floor_traffic_array(
+    floors: int = 10,
+    duration: int = 400,
+    intensity: float = 0.4,
+    max_people: int = 80,
+    seed: int = 42,
+    compat: bool = False,
+) -> np.ndarray:
+    """生成楼层间流量 - 主要楼层间移动，超小建筑（3层及以下）包含大厅"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(duration)
+    base = intensity * 1.2 if floors <= 5 else intensity
+    rate = _scaled_rate(base, floors, max_people, duration, compat)
+    ticks = _arrival_ticks(rng, rate * (1.0 + 0.2 * np.sin(t * 2 * math.pi / duration)), compat)
+    origins, destinations = _random_pairs(rng, ticks.size, 0 if floors <= 3 else 1, floors - 1)
+    return _pack(ticks, origins, destinations, max_people)
+
+
+def generate_lunch_rush_traffic_array(
+    floors: int = 10,
+    duration: int = 200,
+    intensity: float = 0.7,
+    max_people: int = 60,
+    seed: int = 42,
+    compat: bool = False,
+) -> np.ndarray:
+    """生成午餐时间流量 - 高斯形状的双向流量，小建筑（5层及以下）为楼层间随机流量"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(duration)
+    distance_from_peak = np.abs(t - duration // 2) / max(1, duration // 4)
+    shape = np.exp(-distance_from_peak * distance_from_peak)
+    if floors <= 5:
+        rate = _scaled_rate(intensity * 0.6, floors, max_people, duration, compat)
+        ticks = _arrival_ticks(rng, rate * np.maximum(0.3, shape), compat)
+        origins, destinations = _random_pairs(rng, ticks.size, 0, floors - 1)
+    else:
+        rate = _scaled_rate(intensity, floors, max_people, duration, compat)
+        ticks = _arrival_ticks(rng, rate * np.maximum(0.2, shape), compat)
+        origins, destinations = _restaurant_floors(rng, ticks.size, floors)
+    return _pack(ticks, origins, destinations, max_people)
+
+
+def generate_random_traffic_array(
+    floors: int = 10,
+    duration: int = 500,
+    intensity: float = 0.3,
+    max_people: int = 80,
+    seed: int = 42,
+    compat: bool = False,
+) -> np.ndarray:
+    """生成随机流量 - 均匀分布"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(duration)
+    rate = _scaled_rate(intensity, floors, max_people, duration, compat)
+    ticks = _arrival_ticks(rng, rate * (1.0 + 0.1 * np.sin(t * 4 * math.pi / duration)), compat)
+    origins, destinations = _random_pairs(rng, ticks.size, 0, floors - 1)
+    return _pack(ticks, origins, destinations, max_people)
+
+
+def generate_fire_evacuation_traffic_array(
+    floors: int = 10, duration: int = 150, max_people: int = 120, seed: int = 42, compat: bool = False
+) -> np.ndarray:
+    """生成火警疏散流量 - 前1/3为少量正常流量，之后各楼层人员在10个tick内疏散到大厅"""
+    rng = np.random.default_rng(seed)
+    alarm_tick = duration // 3
+
+    normal_ticks = _arrival_ticks(rng, np.full(alarm_tick, 0.15), compat)
+    normal_origins, normal_destinations = _random_pairs(rng, normal_ticks.size, 0, floors - 1)
+
+    if floors <= 5:
+        low, high = 2, 4
+    elif floors <= 9:
+        low, high = 3, 6
+    else:
+        low, high = 4, 8
+    evac_origins = np.repeat(np.arange(1, floors), _uniform(rng, low, high, floors - 1))
+    evac_ticks = alarm_tick + _uniform(rng, 0, min(10, duration - alarm_tick - 1), evac_origins.size)
+    in_time = evac_ticks < duration
+    evac_origins, evac_ticks = evac_origins[in_time], evac_ticks[in_time]
+
+    ticks, origins, destinations = _concat(
+        [
+            (normal_ticks, normal_origins, normal_destinations),
+            (evac_ticks, evac_origins, np.zeros(evac_origins.size, dtype=np.int64)),
+        ]
+    )
+    return _pack(ticks, origins, destinations, max_people)
+
+
+def generate_mixed_scenario_traffic_array(
+    floors: int = 10, duration: int = 600, max_people: int = 150, seed: int = 42, compat: bool = False
+) -> np.ndarray:
+    """生成混合场景流量 - 依次为上行高峰、正常流量、午餐流量、下行高峰四个阶段"""
+    rng = np.random.default_rng(seed)
+    target_per_phase = max_people // 4
+    phase1_end = duration // 4
+    phase2_end = duration // 2
+    phase3_end = phase2_end + duration // 6
+
+    def phase_ticks(base: float, start: int, end: int) -> np.ndarray:
+        rate = _scaled_rate(base, floors, target_per_phase, end - start, compat)
+        return _arrival_ticks(rng, np.full(end - start, rate), compat, offset=start)
+
+    # 第一阶段：上行高峰
+    ticks1 = phase_ticks(0.7, 0, phase1_end)
+    origins1, destinations1 = _up_peak_floors(rng, ticks1.size, floors, 0.9 if floors > 5 else 0.95, 0)
+
+    # 第二阶段：正常流量
+    ticks2 = phase_ticks(0.3, phase1_end, phase2_end)
+    origins2, destinations2 = _random_pairs(rng, ticks2.size, 0, floors - 1)
+
+    # 第三阶段：午餐流量，仅大型建筑有60%的餐厅流量
+    ticks3 = phase_ticks(0.6, phase2_end, phase3_end)
+    origins3, destinations3 = _random_pairs(rng, ticks3.size, 0, floors - 1)
+    if floors > 5:
+        restaurant = rng.random(ticks3.size) < 0.6
+        restaurant_origins, restaurant_destinations = _restaurant_floors(rng, ticks3.size, floors)
+        origins3 = np.where(restaurant, restaurant_origins, origins3)
+        destinations3 = np.where(restaurant, restaurant_destinations, destinations3)
+
+    # 第四阶段：下行高峰
+    ticks4 = phase_ticks(0.6, phase3_end, duration)
+    origins4, destinations4 = _down_peak_floors(rng, ticks4.size, floors, 0.85 if floors > 5 else 0.9)
+
+    ticks, origins, destinations = _concat(
+        [
+            (ticks1, origins1, destinations1),
+            (ticks2, origins2, destinations2),
+            (ticks3, origins3, destinations3),
+            (ticks4, origins4, destinations4),
+        ]
+    )
+    return _pack(ticks, origins, destinations, max_people)
+
+
+def generate_high_density_traffic_array(
+    floors: int = 10,
+    duration: int = 300,
+    intensity: float = 1.2,
+    max_people: int = 200,
+    seed: int = 42,
+    compat: bool = False,
+) -> np.ndarray:
+    """
+    生成高密度流量 - 压力测试
+
+    兼容模式与原生成器相同：每tick人数为 min(intensity, 1.5*max_people/duration) 加30%高斯扰动后取整；
+    泊松模式以 1.5*max_people/duration 为均值，不受 intensity 限制。两种模式都在达到 max_people 后截止。
+    """
+    rng = np.random.default_rng(seed)
+    target_people_per_tick = max_people / duration
+    if compat:
+        safe_intensity = min(intensity, target_people_per_tick * 1.5)
+        samples = rng.normal(safe_intensity, safe_intensity * 0.3, size=duration)
+        counts = np.maximum(0, samples).astype(np.int64)
+        ticks = np.repeat(np.arange(duration, dtype=np.int64), counts)
+    else:
+        ticks = _arrival_ticks(rng, np.full(duration, target_people_per_tick * 1.5), compat)
+    ticks = ticks[:max_people]
+    origins, destinations = _random_pairs(rng, ticks.size, 0, floors - 1)
+    return _pack(ticks, origins, destinations, max_people)
+
+
+def generate_small_building_traffic_array(
+    floors: int = 4,
+    duration: int = 180,
+    intensity: float = 0.4,
+    max_people: int = 25,
+    seed: int = 42,
+    compat: bool = False,
+) -> np.ndarray:
+    """生成小建筑专用流量 - 80%为大厅上下楼，其余为楼层间移动"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(duration)
+    rate = _scaled_rate(intensity, floors, max_people, duration, compat)
+    ticks = _arrival_ticks(rng, rate * (1.0 + 0.3 * np.sin(t * 2 * math.pi / duration)), compat)
+    size = ticks.size
+
+    lobby = rng.random(size) < 0.8
+    upward = rng.random(size) < 0.5
+    lobby_floors = _uniform(rng, 1, floors - 1, size)
+    origins, destinations = _random_pairs(rng, size, 1, floors - 1)
+    origins = np.where(lobby, np.where(upward, 0, lobby_floors), origins)
+    destinations = np.where(lobby, np.where(upward, lobby_floors, 0), destinations)
+    return _pack(ticks, origins, destinations, max_people)
+
+
+def generate_medical_building_traffic_array(
+    floors: int = 8,
+    duration: int = 240,
+    intensity: float = 0.5,
+    max_people: int = 80,
+    seed: int = 42,
+    compat: bool = False,
+) -> np.ndarray:
+    """生成医疗建筑流量 - 85%涉及大厅，非大厅楼层按门诊/病房/手术室的权重选择"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(duration)
+    rate = _scaled_rate(intensity, floors, max_people, duration, compat)
+    ticks = _arrival_ticks(rng, rate * (1.0 + 0.4 * np.sin((t + duration * 0.2) * math.pi / duration)), compat)
+    size = ticks.size
+
+    # 1-2楼急诊门诊权重2，普通病房1，顶层手术室/ICU 0.3
+    upper = np.arange(1, floors)
+    weights = np.where(upper <= 2, 2.0, np.where(upper <= floors - 2, 1.0, 0.3))
+    weighted_floors = rng.choice(upper, size=size, p=weights / weights.sum())
+
+    lobby = rng.random(size) < 0.85
+    from_lobby = rng.random(size) < 0.6
+    origins, destinations = _random_pairs(rng, size, 0, floors - 1)
+    origins = np.where(lobby, np.where(from_lobby, 0, weighted_floors), origins)
+    destinations = np.where(lobby, np.where(from_lobby, weighted_floors, 0), destinations)
+    return _pack(ticks, origins, destinations, max_people)
+
+
+def generate_meeting_event_traffic_array(
+    floors: int = 6,
+    duration: int = 150,
+    intensity: float = 0.8,
+    max_people: int = 50,
+    seed: int = 42,
+    compat: bool = False,
+) -> np.ndarray:
+    """生成会议事件流量 - 前1/3集中前往会议楼层，后1/3集中离开，中间为低流量"""
+    rng = np.random.default_rng(seed)
+    meeting_floor = floors // 2 if floors > 2 else 1
+    arrival_end = duration // 3
+    departure_start = duration * 2 // 3
+
+    # 与原生成器相同，强度直接使用 intensity，不按 max_people 缩放
+    t = np.arange(duration)
+    rates = np.full(duration, intensity * 0.1)
+    rates[:arrival_end] = intensity * (1.0 + np.sin(t[:arrival_end] / arrival_end * math.pi))
+    departure_progress = (t[departure_start:] - departure_start) / (duration - departure_start)
+    rates[departure_start:] = intensity * (1.0 + np.sin(departure_progress * math.pi))
+    ticks = _arrival_ticks(rng, rates, compat)
+    size = ticks.size
+
+    # 到达和离开阶段90%为大厅与会议楼层之间的移动，其余为随机移动
+    arriving = ticks < arrival_end
+    meeting = (ticks < arrival_end) | (ticks >= departure_start)
+    meeting &= rng.random(size) < 0.9
+    origins, destinations = _random_pairs(rng, size, 0, floors - 1)
+    origins = np.where(meeting, np.where(arriving, 0, meeting_floor), origins)
+    destinations = np.where(meeting, np.where(arriving, meeting_floor, 0), destinations)
+    return _pack(ticks, origins, destinations, max_people)
+
+
+def generate_progressive_test_traffic_array(
+    floors: int = 8, duration: int = 400, max_people: int = 100, seed: int = 42, compat: bool = False
+) -> np.ndarray:
+    """生成渐进式测试流量 - 四个阶段的强度从0.2逐渐增加到0.95"""
+    rng = np.random.default_rng(seed)
+    stage_duration = duration // 4
+    rates = np.zeros(min(4 * stage_duration, duration))
+    for stage in range(4):
+        stage_start = stage * stage_duration
+        stage_end = min((stage + 1) * stage_duration, duration)
+        stage_rate = _scaled_rate(0.2 + stage * 0.25, floors, max_people // 4, stage_duration, compat)
+        local_progress = np.arange(stage_end - stage_start) / stage_duration
+        rates[stage_start:stage_end] = stage_rate * (1.0 + 0.3 * np.sin(local_progress * 2 * math.pi))
+    ticks = _arrival_ticks(rng, rates, compat)
+    origins, destinations = _random_pairs(rng, ticks.size, 0, floors - 1)
+    return _pack(ticks, origins, destinations, max_people)
+
+
+def generate_office_day_traffic_array(
+    floors: int = 60, duration: int = 46800, max_people: int = 20000, seed: int = 42, compat: bool = False
+) -> np.ndarray:
+    """
+    生成全天办公流量 - 按 OFFICE_DAY_PROFILE 的比例整批抽取时段、到达时刻和楼层
+
+    原生成器本来就按人抽样（不受每tick一人的限制），compat 不改变分布，只为与其他场景的签名一致
+    """
+    rng = np.random.default_rng(seed)
+    restaurant_floors, office_floors = office_day_floors(floors)
+    start_hour, end_hour = OFFICE_DAY_HOURS
+    shares = np.array([share for _, _, _, share in OFFICE_DAY_PROFILE])
+    kinds = rng.choice(len(OFFICE_DAY_PROFILE), size=max_people, p=shares / shares.sum())
+
+    hours = np.empty(max_people)
+    for index, (kind, center, spread, _) in enumerate(OFFICE_DAY_PROFILE):
+        selected = np.flatnonzero(kinds == index)
+        if kind == "interfloor":
+            hours[selected] = rng.uniform(center, spread, selected.size)
+            continue
+        # 超出一天范围的时刻重新抽取
+        while selected.size:
+            hours[selected] = rng.normal(center, spread, selected.size)
+            selected = selected[(hours[selected] < start_hour) | (hours[selected] >= end_hour)]
+    ticks = np.minimum(duration - 1, ((hours - start_hour) * (duration / (end_hour - start_hour))).astype(np.int64))
+
+    names = [kind for kind, _, _, _ in OFFICE_DAY_PROFILE]
+    offices = rng.choice(office_floors, size=max_people)
+    # 午餐的另一端：一半为大厅，一半为餐厅
+    lunch_ends = np.where(rng.random(max_people) < 0.5, rng.choice(restaurant_floors, size=max_people), 0)
+    if len(office_floors) > 1:
+        others = rng.choice(len(office_floors) - 1, size=max_people)
+        others += others >= np.searchsorted(office_floors, offices)
+        interfloor = np.asarray(office_floors)[others]
+    else:
+        interfloor = np.zeros(max_people, dtype=np.int64)
+    origins = np.select(
+        [kinds == names.index("up_peak"), kinds == names.index("lunch_back")], [0, lunch_ends], default=offices
+    )
+    destinations = np.select(
+        [kinds == names.index("up_peak"), kinds == names.index("down_peak"), kinds == names.index("lunch_out")],
+        [offices, 0, lunch_ends],
+        default=np.where(kinds == names.index("lunch_back"), offices, interfloor),
+    )
+    return _pack(ticks, origins, destinations, max_people)
+
+
+# 场景名称与 TRAFFIC_SCENARIOS 一致
+VECTORIZED_GENERATORS: Dict[str, Callable[..., np.ndarray]] = {
+    "up_peak": generate_up_peak_traffic_array,
+    "down_peak": generate_down_peak_traffic_array,
+    "inter_floor": generate_inter_floor_traffic_array,
+    "lunch_rush": generate_lunch_rush_traffic_array,
+    "random": generate_random_traffic_array,
+    "fire_evacuation": generate_fire_evacuation_traffic_array,
+    "mixed_scenario": generate_mixed_scenario_traffic_array,
+    "high_density": generate_high_density_traffic_array,
+    "small_building": generate_small_building_traffic_array,
+    "medical": generate_medical_building_traffic_array,
+    "meeting_event": generate_meeting_event_traffic_array,
+    "progressive_test": generate_progressive_test_traffic_array,
+    "office_day": generate_office_day_traffic_array,
+}
+
+
+def generate_traffic_array(scenario: str, **params: Any) -> np.ndarray:
+    """按场景名称生成流量数组，只传递生成器需要的参数（与 generate_traffic_file 相同）"""
+    if scenario not in VECTORIZED_GENERATORS:
+        raise ValueError(f"Unknown scenario: {scenario}. Available: {list(VECTORIZED_GENERATORS.keys())}")
+    generator_func = VECTORIZED_GENERATORS[scenario]
+    signature = inspect.signature(generator_func)
+    return generator_func(**{k: v for k, v in params.items() if k in signature.parameters})
+
+
+def traffic_array_to_list(traffic: np.ndarray) -> List[Dict[str, Any]]:
+    """将流量数组转换为流量文件中的条目列表"""
+    return [
+        {"id": passenger_id, "origin": origin, "destination": destination, "tick": tick}
+        for passenger_id, origin, destination, tick in traffic.tolist()
+    ]
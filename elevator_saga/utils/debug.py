@@ -2,24 +2,180 @@
 """
 Debug utilities for Elevator Saga
 调试工具模块
+
+基于标准库 logging 的分级日志：
+- 消息延迟构造：debug_log("tick %d", tick) 只有在级别启用时才格式化
+- 按模块设置级别：configure_logging(module_levels={"elevator_saga.server": "DEBUG"})
+- 默认级别为INFO，客户端调试输出需要 configure_logging("DEBUG") 或 set_debug_mode(True) 开启
+- 写出由后台线程完成（QueueHandler + QueueListener），启用的日志不会阻塞调用方；
+  fork 出的子进程（如进程池worker）没有该线程，改为同步写出
 """
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from typing import IO, Any, Dict, Optional, Union
+
+ROOT_LOGGER_NAME = "elevator_saga"
+CLIENT_LOGGER_NAME = "elevator_saga.client"
+SERVER_LOGGER_NAME = "elevator_saga.server"
+
+_client_logger = logging.getLogger(CLIENT_LOGGER_NAME)
+_root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+# 挂在 elevator_saga logger 上的handler：通常是 QueueHandler，fork 后的子进程中是 _writer 本身
+_root_handler: Optional[logging.Handler] = None
+_writer: Optional["_BatchingStreamHandler"] = None
+_setup_lock = threading.Lock()
+
+
+class _PrefixFormatter(logging.Formatter):
+    """输出 [DEBUG] / [SERVER-DEBUG] 风格的前缀，与原有输出保持一致"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        prefix = "SERVER-" if record.name.startswith(SERVER_LOGGER_NAME) else ""
+        return f"[{prefix}{record.levelname}] {record.getMessage()}"
+
+
+class _BatchingStreamHandler(logging.StreamHandler):
+    """
+    在后台线程中写出日志，队列中还有待写记录时不刷新，
+    连续写出的日志合并为一次flush
+    """
+
+    def __init__(self, pending: "queue.SimpleQueue[Any]", stream: Optional[IO[str]] = None):
+        logging.Handler.__init__(self)
+        self._pending = pending
+        self._stream = stream
+
+    @property
+    def stream(self) -> IO[str]:
+        # 未指定时每次取当前的 sys.stdout，兼容测试框架替换标准输出
+        return self._stream if self._stream is not None else sys.stdout
+
+    @stream.setter
+    def stream(self, value: Optional[IO[str]]) -> None:
+        self._stream = value
+
+    def flush(self) -> None:
+        if self._pending.empty():
+            self.force_flush()
+
+    def force_flush(self) -> None:
+        logging.StreamHandler.flush(self)
 
-# Global debug flag
-_debug_enabled: bool = True
+
+def _ensure_writer(stream: Optional[IO[str]] = None) -> None:
+    """为 elevator_saga 日志安装异步写出线程（只安装一次，stream 不为空时替换输出流）"""
+    global _listener, _root_handler, _writer
+    with _setup_lock:
+        if _root_handler is not None:
+            if stream is not None and _writer is not None:
+                _writer.stream = stream
+            return
+        pending: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        _writer = _BatchingStreamHandler(pending, stream)
+        _writer.setFormatter(_PrefixFormatter())
+        _listener = logging.handlers.QueueListener(pending, _writer, respect_handler_level=False)
+        _listener.start()
+        _root_handler = logging.handlers.QueueHandler(pending)
+        _root_logger.addHandler(_root_handler)
+        _root_logger.propagate = False
+
+
+def _write_synchronously_after_fork() -> None:
+    """
+    fork 出的子进程中写出线程不存在，队列中的记录不会被写出：
+    改为在调用线程中直接写出，子进程以 os._exit 结束时也不会丢失日志
+    """
+    global _listener, _root_handler, _setup_lock
+    _setup_lock = threading.Lock()
+    if _root_handler is None or _writer is None:
+        return
+    _root_logger.removeHandler(_root_handler)
+    _listener = None
+    # 空队列：每条记录写出后立即flush
+    _writer._pending = queue.SimpleQueue()
+    _root_handler = _writer
+    _root_logger.addHandler(_writer)
+
+
+def shutdown_logging() -> None:
+    """停止后台写出线程并写出所有剩余日志"""
+    global _listener, _root_handler
+    with _setup_lock:
+        listener, _listener = _listener, None
+        if _root_handler is not None:
+            _root_logger.removeHandler(_root_handler)
+            _root_handler = None
+            _root_logger.propagate = True
+    if listener is not None:
+        listener.stop()
+    if _writer is not None:
+        _writer.force_flush()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """获取 elevator_saga 命名空间下的logger，输出经由异步写出线程"""
+    _ensure_writer()
+    if name != ROOT_LOGGER_NAME and not name.startswith(ROOT_LOGGER_NAME + "."):
+        name = f"{ROOT_LOGGER_NAME}.{name}"
+    return logging.getLogger(name)
+
+
+def configure_logging(
+    level: Union[int, str, None] = None,
+    module_levels: Optional[Dict[str, Union[int, str]]] = None,
+    stream: Optional[IO[str]] = None,
+) -> None:
+    """
+    配置日志级别和输出
+
+    Args:
+        level: elevator_saga 整体日志级别，例如 "INFO"
+        module_levels: 按模块覆盖级别，例如 {"elevator_saga.server.simulator": "DEBUG"}
+        stream: 输出流，默认为 sys.stdout
+    """
+    _ensure_writer(stream)
+    if level is not None:
+        _root_logger.setLevel(_to_level(level))
+    for name, module_level in (module_levels or {}).items():
+        get_logger(name).setLevel(_to_level(module_level))
+
+
+def _to_level(level: Union[int, str]) -> int:
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(level.upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level: {level}")
+    return value
 
 
 def set_debug_mode(enabled: bool) -> None:
     """启用或禁用调试模式"""
-    global _debug_enabled
-    _debug_enabled = enabled
+    _client_logger.setLevel(logging.DEBUG if enabled else logging.INFO)
 
 
-def debug_log(message: str) -> None:
-    """输出调试信息（如果启用了调试模式）"""
-    if _debug_enabled:
-        print(f"[DEBUG] {message}", flush=True)
+def debug_log(message: str, *args: Any) -> None:
+    """输出调试信息（如果启用了调试模式），args 按 % 格式延迟拼接"""
+    if _client_logger.isEnabledFor(logging.DEBUG):
+        if _root_handler is None:
+            _ensure_writer()
+        _client_logger.debug(message, *args)
 
 
 def is_debug_enabled() -> bool:
     """检查是否启用了调试模式"""
-    return _debug_enabled
+    return _client_logger.isEnabledFor(logging.DEBUG)
+
+
+# 默认：elevator_saga 输出INFO及以上；客户端不单独设置级别，由 configure_logging 决定
+_root_logger.setLevel(logging.INFO)
+atexit.register(shutdown_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_write_synchronously_after_fork)
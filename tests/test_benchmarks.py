@@ -0,0 +1,61 @@
+"""
+Tests for the benchmark tools
+"""
+
+
+def test_checkpoint_windowed_evaluation_matches_serial_run(tmp_path):
+    """从检查点热启动的分窗评估与串行运行得到相同指标"""
+    from elevator_saga.benchmarks.windowed import evaluate_windowed, plan_windows, run_serial
+    from elevator_saga.server.simulator import DEFAULT_TRAFFIC_DIR
+
+    assert [window.end for window in plan_windows(250, 100, warmup=20, tail=30)] == [130, 230, 250]
+    path = f"{DEFAULT_TRAFFIC_DIR}/up_peak.json"
+    serial, _ = run_serial(path, "bus", checkpoint_dir=tmp_path, checkpoint_every=50)
+    windowed = evaluate_windowed(
+        path, "bus", 50, tail=1000, warm_start="checkpoint", checkpoint_dir=tmp_path, workers=1
+    )
+    assert windowed.metrics == serial
+
+
+def test_simulator_benchmark_runs_a_tiny_case():
+    """模拟器基准在极小规模上运行一次，结果包含各项指标"""
+    from elevator_saga.benchmarks.simulator import BenchmarkCase, compare, run_case
+
+    case = BenchmarkCase("tiny", floors=4, elevators=1, capacity=4, passengers=6, duration=80)
+    result = run_case(case, "bus", seed=1, repeats=1, state_repeats=1)
+    assert result["case"]["name"] == "tiny"
+    assert (result["policy"], result["seed"], result["ticks"], result["passengers"]) == ("bus", 1, 80, 6)
+    assert result["events"] > 0
+    assert 0 <= result["completed_passengers"] <= 6
+    assert result["step"]["total_ms"] > 0 and result["step"]["ticks_per_s"] > 0
+    assert result["get_state"]["payload_bytes"] > 0
+    assert result["calculate_metrics"]["ms"] >= 0
+    assert result["memory"]["retained_bytes"] > 0
+    report = {"version": 1, "results": [result]}
+    _, regressions = compare(report, report, threshold=0.1)
+    assert regressions == 0
+
+
+def test_load_test_records_and_replays_a_trace_with_one_client(tmp_path):
+    """压测工具对本地服务器录制请求序列，并用一个客户端回放，结果包含吞吐、延迟和服务端CPU"""
+    from elevator_saga.benchmarks.http_backends import free_port, start_server
+    from elevator_saga.benchmarks.load_test import load_trace, record_trace, run_load_test
+
+    port = free_port()
+    process = start_server("stdlib", port)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        trace_path = str(tmp_path / "bus.trace.json")
+        count = record_trace(base_url, trace_path, duration=0.5)
+        trace = load_trace(trace_path)
+        assert count == len(trace) > 0
+        result = run_load_test(base_url, "trace", clients=1, duration=0.5, trace=trace)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    assert result["requests"] > 0
+    assert result["errors"] == 0 and result["error_rate"] == 0.0
+    assert result["rps"] > 0 and result["steps_per_s"] > 0
+    assert result["latency"]["p50_ms"] <= result["latency"]["p99_ms"] <= result["latency"]["max_ms"]
+    assert "POST /api/step" in result["routes"]
+    assert result["server"] is not None and result["server"]["cpu_seconds"] >= 0
@@ -0,0 +1,278 @@
+"""
+Tests for the client API and controllers
+"""
+
+import json
+
+import pytest
+
+from elevator_saga.client.base_controller import ElevatorController
+from elevator_saga.server.simulator import ElevatorSimulation, encode_json, resolve_route
+
+BUILDING = {"floors": 6, "elevators": 1, "elevator_capacity": 4, "duration": 60}
+TRAFFIC = [{"id": 1, "origin": 5, "destination": 0, "tick": 50}]
+
+
+def connect_in_process(api_client, sim):
+    """让API客户端直接调用模拟器的接口函数（请求和响应仍经过JSON编码），返回记录的 (路径, 请求体, 响应)"""
+    requests = []
+
+    def send(method, endpoint, data):
+        handler, args = resolve_route(method, endpoint)
+        payload, _ = handler(sim, data, *args)
+        response = json.loads(encode_json(payload))
+        requests.append((endpoint, data, response))
+        return response
+
+    api_client._send_get_request = lambda endpoint: send("GET", endpoint, {})
+    api_client._send_post_request = lambda endpoint, data: send("POST", endpoint, data)
+    return requests
+
+
+class QuietController(ElevatorController):
+    """所有回调都是空实现，测试中的子类只覆盖其中一个"""
+
+    step_until_event = True
+
+    def on_init(self, elevators, floors):
+        pass
+
+    def on_event_execute_start(self, tick, events, elevators, floors):
+        pass
+
+    def on_event_execute_end(self, tick, events, elevators, floors):
+        pass
+
+    def on_passenger_call(self, passenger, floor, direction):
+        pass
+
+    def on_elevator_idle(self, elevator):
+        pass
+
+    def on_elevator_stopped(self, elevator, floor):
+        pass
+
+    def on_passenger_board(self, elevator, passenger):
+        pass
+
+    def on_passenger_alight(self, elevator, passenger, floor):
+        pass
+
+    def on_elevator_passing_floor(self, elevator, floor, direction):
+        pass
+
+    def on_elevator_approaching(self, elevator, floor, direction):
+        pass
+
+
+def _steps(requests):
+    return [(data, response["tick"]) for endpoint, data, response in requests if endpoint == "/api/step"]
+
+
+def test_step_until_event_stops_at_the_only_handled_event():
+    """只实现 on_elevator_stopped 的控制器一次步进到电梯停靠为止，之后一次步进到最大tick"""
+    from elevator_saga.core.models import EventType
+
+    class StopController(QuietController):
+        def on_init(self, elevators, floors):
+            elevators[0].go_to_floor(3)
+
+        def on_elevator_stopped(self, elevator, floor):
+            self.stops.append((self.current_tick, floor.floor))
+
+    controller = StopController()
+    controller.stops = []
+    assert controller.resolve_handled_events() == {EventType.STOPPED_AT_FLOOR}
+    requests = connect_in_process(
+        controller.api_client, ElevatorSimulation.from_traffic_data({"building": BUILDING, "traffic": TRAFFIC})
+    )
+    controller.start()
+
+    steps = _steps(requests)
+    assert len(controller.stops) == 1
+    stop_tick, stop_floor = controller.stops[0]
+    assert stop_floor == 3 and 0 < stop_tick < 60
+    assert steps == [
+        ({"ticks": 60, "until_events": ["stopped_at_floor"]}, stop_tick),
+        ({"ticks": 60 - stop_tick, "until_events": ["stopped_at_floor"]}, 60),
+    ]
+
+
+def test_step_until_event_runs_to_max_tick_when_event_never_fires():
+    """关心的事件从未发生时，一次步进请求推进到流量的最大tick"""
+
+    class BoardController(QuietController):
+        def on_passenger_board(self, elevator, passenger):
+            raise AssertionError("nobody boards an elevator that never moves")
+
+    controller = BoardController()
+    requests = connect_in_process(
+        controller.api_client, ElevatorSimulation.from_traffic_data({"building": BUILDING, "traffic": TRAFFIC})
+    )
+    controller.start()
+    assert _steps(requests) == [({"ticks": 60, "until_events": ["passenger_board"]}, 60)]
+
+
+def test_clients_use_the_state_returned_by_reset_and_next_round(monkeypatch):
+    """客户端直接使用重置/切换流量响应中的状态和流量信息，不等待也不再轮询"""
+    import asyncio
+    import time
+
+    from elevator_saga.client.api_client import ElevatorAPIClient
+    from elevator_saga.client.async_api_client import AsyncElevatorAPIClient
+    from elevator_saga.server.simulator import DEFAULT_TRAFFIC_DIR
+
+    def no_sleep(seconds):
+        raise AssertionError("clients must not sleep after a reset")
+
+    monkeypatch.setattr(time, "sleep", no_sleep)
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+
+    client = ElevatorAPIClient("http://in-process")
+    requests = connect_in_process(client, ElevatorSimulation(DEFAULT_TRAFFIC_DIR))
+    for switch in (client.next_traffic_round, client.reset):
+        assert switch()
+        sent = len(requests)
+        assert client.get_state().tick == 0 and client.get_state().elevators
+        assert client.get_traffic_info() == requests[-1][2]["traffic"]
+        assert len(requests) == sent
+
+    # 异步客户端经由一个同步客户端的进程内连接发送请求
+    async_client = AsyncElevatorAPIClient("http://in-process")
+    transport = ElevatorAPIClient("http://in-process")
+    async_requests = connect_in_process(transport, ElevatorSimulation(DEFAULT_TRAFFIC_DIR))
+
+    async def request(method, endpoint, data=None):
+        if method == "POST":
+            return transport._send_post_request(endpoint, data)
+        return transport._send_get_request(endpoint)
+
+    async_client._request = request
+
+    async def switch_rounds():
+        for switch in (async_client.next_traffic_round, async_client.reset):
+            assert await switch()
+            assert async_client.round_state is not None and async_client.round_state.tick == 0
+            assert async_client.round_traffic_info == async_requests[-1][2]["traffic"]
+
+    asyncio.run(switch_rounds())
+    assert [endpoint for endpoint, _, _ in async_requests] == ["/api/traffic/next", "/api/reset"]
+
+
+def test_loop_profiler_buckets_by_power_of_two():
+    """阶段耗时按2的幂分桶，百分位取所在桶的上界且不超过最大值"""
+    from elevator_saga.client.profiler import LoopProfiler
+
+    profiler = LoopProfiler()
+    for elapsed_ns in (1500, 1000, 3000, 100000):
+        profiler.record("tick", elapsed_ns)
+    tick = profiler.to_dict()["phases"]["tick"]
+    assert tick["count"] == 4 and tick["total_ms"] == 0.1055
+    assert tick["min_us"] == 1.0 and tick["max_us"] == 100.0
+    assert tick["p50_us"] == 2.048 and tick["p99_us"] == 100.0
+    assert tick["histogram_us"] == {"1.024": 1, "2.048": 1, "4.096": 1, "131.072": 1}
+    profiler.reset()
+    assert profiler.to_dict()["phases"] == {}
+
+
+def test_controller_profile_records_each_loop_phase():
+    """开启profile的控制器记录每次步进、状态获取、解析、回调和整次循环的耗时"""
+
+    class StopController(QuietController):
+        def on_init(self, elevators, floors):
+            elevators[0].go_to_floor(3)
+
+        def on_elevator_stopped(self, elevator, floor):
+            self.stopped_at = floor.floor
+
+    controller = StopController(profile=True)
+    requests = connect_in_process(
+        controller.api_client, ElevatorSimulation.from_traffic_data({"building": BUILDING, "traffic": TRAFFIC})
+    )
+    controller.start()
+
+    phases = controller.get_profile()["phases"]
+    steps = len(_steps(requests))
+    assert steps == 2
+    assert phases["step"]["count"] == phases["tick"]["count"] == steps
+    assert phases["callback.on_event_execute_start"]["count"] == steps
+    assert phases["callback.on_elevator_stopped"]["count"] == 1
+    assert phases["get_state"]["count"] >= steps and phases["parse"]["count"] >= phases["get_state"]["count"]
+    assert phases["command"]["count"] == 1
+
+
+def test_tick_batch_exposes_state_as_read_only_arrays():
+    """TickBatch 的数组按电梯id和楼层号索引，与状态中的位置、载客和等待人数一致"""
+    import numpy as np
+
+    from elevator_saga.client.tick_batch import build_tick_batch
+    from elevator_saga.core.models import (
+        ElevatorState,
+        EventType,
+        FloorState,
+        Position,
+        SimulationEvent,
+        SimulationState,
+    )
+
+    elevators = [
+        ElevatorState(id=0, position=Position(2, 5, 3), passengers=[1, 2], max_capacity=4),
+        ElevatorState(id=1, position=Position(4, 1, -5), max_capacity=6),
+    ]
+    floors = [FloorState(floor=0, up_queue=[3, 4]), FloorState(floor=1), FloorState(floor=2, down_queue=[5])]
+    floors.append(FloorState(floor=3, up_queue=[6], down_queue=[7, 8]))
+    events = [
+        SimulationEvent(7, EventType.STOPPED_AT_FLOOR, {"elevator": 1, "floor": 4}),
+        SimulationEvent(7, EventType.PASSING_FLOOR, {"elevator": 0, "floor": 2, "direction": "up"}),
+        SimulationEvent(7, EventType.UP_BUTTON_PRESSED, {"floor": 0, "passenger": 4}),
+    ]
+    batch = build_tick_batch(7, events, SimulationState(tick=7, elevators=elevators, floors=floors))
+
+    assert batch.elevator_positions.tolist() == [2.3, 3.5]
+    assert batch.elevator_targets.tolist() == [5, 1]
+    assert batch.elevator_directions.tolist() == [1, -1]
+    assert batch.elevator_loads.tolist() == [2, 0]
+    assert batch.elevator_free_capacity.tolist() == [2, 6]
+    assert batch.waiting_up.tolist() == [2, 0, 0, 1] and batch.waiting_down.tolist() == [0, 0, 1, 2]
+    assert batch.hall_calls.tolist() == [[True, False], [False, False], [False, True], [True, True]]
+    assert batch.events[EventType.STOPPED_AT_FLOOR][["elevator", "floor"]].tolist() == [(1, 4)]
+    assert batch.events[EventType.PASSING_FLOOR]["direction"].tolist() == [1]
+    assert batch.events[EventType.UP_BUTTON_PRESSED]["passenger"].tolist() == [4]
+    assert batch.event_counts[EventType.IDLE] == 0 and batch.events[EventType.IDLE].size == 0
+    assert batch.elevator_loads.dtype == np.int32 and batch.elevator_positions.dtype == np.float64
+    with pytest.raises(ValueError):
+        batch.waiting_up[0] = 5
+
+
+def test_client_debug_output_is_off_until_configured():
+    """导入不再开启客户端调试输出；关闭时参数不被格式化，configure_logging("DEBUG") 后才输出"""
+    import subprocess
+    import sys
+
+    script = """
+import io
+from elevator_saga.utils.debug import configure_logging, debug_log, is_debug_enabled, shutdown_logging
+
+
+class Counted:
+    formatted = 0
+
+    def __str__(self):
+        Counted.formatted += 1
+        return "value"
+
+
+assert not is_debug_enabled()
+debug_log("Reset failed: %s", Counted())
+assert Counted.formatted == 0
+stream = io.StringIO()
+configure_logging("DEBUG", stream=stream)
+assert is_debug_enabled()
+debug_log("Reset failed: %s", Counted())
+shutdown_logging()
+assert Counted.formatted == 1
+print(stream.getvalue(), end="")
+"""
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == "[DEBUG] Reset failed: value\n"
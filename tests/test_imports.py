@@ -39,6 +39,13 @@ def test_import_client_api():
     assert ElevatorAPIClient is not None
 
 
+def test_import_async_client_api():
+    """Test importing asyncio client API"""
+    from elevator_saga.client.async_api_client import AsyncElevatorAPIClient
+
+    assert AsyncElevatorAPIClient is not None
+
+
 def test_import_proxy_models():
     """Test importing proxy models"""
     from elevator_saga.client.proxy_models import ProxyElevator, ProxyFloor, ProxyPassenger
@@ -55,6 +62,38 @@ def test_import_base_controller():
     assert ElevatorController is not None
 
 
+def test_import_async_controller():
+    """Test importing async controller"""
+    from elevator_saga.client.async_controller import AsyncElevatorController, run_controllers
+
+    assert AsyncElevatorController is not None
+    assert run_controllers is not None
+
+
+def test_import_tick_batch():
+    """Test importing tick batch helpers"""
+    from elevator_saga.client.tick_batch import TickBatch, build_tick_batch
+
+    assert TickBatch is not None
+    assert build_tick_batch is not None
+
+
+def test_import_profiler():
+    """Test importing loop profiler"""
+    from elevator_saga.client.profiler import LoopProfiler
+
+    assert LoopProfiler is not None
+
+
+def test_import_debug_utils():
+    """Test importing logging helpers"""
+    from elevator_saga.utils.debug import configure_logging, debug_log, get_logger
+
+    assert configure_logging is not None
+    assert debug_log is not None
+    assert get_logger("server").name == "elevator_saga.server"
+
+
 def test_import_simulator():
     """Test importing simulator"""
     from elevator_saga.server.simulator import ElevatorSimulation
@@ -62,6 +101,57 @@ def test_import_simulator():
     assert ElevatorSimulation is not None
 
 
+def test_import_http_backend():
+    """Test importing stdlib HTTP backend and route dispatcher"""
+    from elevator_saga.server.http_backend import make_server
+    from elevator_saga.server.simulator import dispatch_api
+
+    assert make_server is not None
+    assert dispatch_api is not None
+
+
+def test_import_sharded_server():
+    """Test importing sharded server and session routing"""
+    from elevator_saga.server.sharded import ShardRouter, shard_index
+
+    assert ShardRouter is not None
+    assert shard_index is not None
+
+
+def test_import_perf_metrics():
+    """Test importing server request metrics"""
+    from elevator_saga.server.perf import RequestMetrics, route_label
+
+    assert RequestMetrics is not None
+    assert route_label is not None
+
+
+def test_import_tick_profiler():
+    """Test importing tick phase profiler"""
+    from elevator_saga.server.tick_profiler import TICK_PHASES, TickPhaseProfiler
+
+    assert TickPhaseProfiler is not None
+    assert TICK_PHASES
+
+
+def test_import_profiling():
+    """Test importing on-demand profiling control"""
+    from elevator_saga.server.profiling import ProfilerControl
+
+    control = ProfilerControl()
+    assert control.active is False
+    assert control.status()["last_result"] is None
+
+
+def test_import_pacing():
+    """Test importing real-time pacing"""
+    from elevator_saga.core.models import EventType
+    from elevator_saga.server.pacing import DECISION_EVENTS, TickPacer
+
+    assert TickPacer is not None
+    assert EventType.IDLE not in DECISION_EVENTS
+
+
 def test_import_client_example():
     """Test importing client example"""
     from elevator_saga.client_examples.bus_example import ElevatorBusExampleController
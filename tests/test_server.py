@@ -0,0 +1,355 @@
+"""
+Tests for the simulation server
+"""
+
+import json
+
+
+def test_soak_run_releases_completed_passengers_and_events():
+    """无结束时间的运行中已完成乘客并入累计指标后移除，事件只保留上一次步进的"""
+    from elevator_saga.benchmarks.policies import POLICIES
+    from elevator_saga.server.simulator import ElevatorSimulation, calculate_passenger_metrics
+    from elevator_saga.traffic.source import GeneratorTrafficSource
+
+    soak = ElevatorSimulation(None)
+    soak.load_traffic_source(GeneratorTrafficSource("random", scale="small", seed=1))
+    bounded = ElevatorSimulation(None)
+    bounded.load_traffic_source(GeneratorTrafficSource("random", scale="small", seed=1, max_ticks=10**6))
+    for sim in (soak, bounded):
+        policy = POLICIES["bus"]()
+        for _ in range(3000):
+            policy.on_events(sim, sim.step(1))
+
+    assert soak.completed_stats is not None and soak.completed_stats.count > 0
+    assert len(soak.passengers) < 20 and len(bounded.passengers) > 500
+    assert len(soak.state.events) < 20
+    assert soak.get_state().metrics == calculate_passenger_metrics(list(bounded.passengers.values()))
+
+
+def test_inline_generator_spec_is_checked_at_reset():
+    """无效的生成器参数在重置时返回400，而不是之后每次步进出错"""
+    from elevator_saga.server.simulator import ElevatorSimulation, api_reset
+
+    sim = ElevatorSimulation(None)
+    for traffic in (
+        {"scenario": "random", "floors": 1},
+        {"scenario": "random", "intensity": "hi"},
+        {"scenario": "random", "floors": 500},
+        {"scenario": "random", "max_people": 10**7},
+    ):
+        payload, status = api_reset(sim, {"traffic": traffic})
+        assert status == 400, (traffic, payload)
+    payload, status = api_reset(sim, {"traffic": {"scenario": "random", "floors": 4, "seed": 3}})
+    assert status == 200 and payload["traffic"]["generator"]["periods_generated"] == 1
+    sim.step(payload["traffic"]["max_tick"])
+    assert sim.passengers
+
+
+def test_inline_generator_spec_rejects_unbounded_max_ticks():
+    """内联生成器参数的 max_ticks 为 null 或超过上限时返回400，不会创建没有结束时间的运行"""
+    from elevator_saga.server.simulator import ElevatorSimulation, api_reset
+    from elevator_saga.traffic.source import INLINE_MAX_TICKS
+
+    sim = ElevatorSimulation(None)
+    for max_ticks in (None, 0, INLINE_MAX_TICKS + 1, "1000"):
+        payload, status = api_reset(sim, {"traffic": {"scenario": "random", "max_ticks": max_ticks}})
+        assert status == 400 and "max_ticks" in payload["error"], (max_ticks, payload)
+    payload, status = api_reset(sim, {"traffic": {"scenario": "random", "max_ticks": 1000}})
+    assert status == 200 and payload["traffic"]["max_tick"] == 1000
+
+
+def test_perf_window_counts_every_request_with_bounded_samples():
+    """窗口请求数和rps按秒精确计数，不受分位数样本上限的影响"""
+    from elevator_saga.server.perf import RequestMetrics
+
+    metrics = RequestMetrics(samples_per_second=200)
+    for i in range(20000):
+        metrics.record("POST", "/api/step", 200, 10, 20, (i % 100) / 1000)
+    route = metrics.to_dict()["routes"]["POST /api/step"]
+    assert route["count"] == route["window"]["count"] == 20000
+    assert 35 <= route["window"]["p50_ms"] <= 65 and route["window"]["p99_ms"] >= 90
+    stats = metrics._routes[("POST", "/api/step")]
+    assert all(len(bucket.samples) <= 200 for bucket in stats.window)
+    assert 'quantile="0.5"' in metrics.to_prometheus()
+
+
+def test_perf_metrics_fold_routes_and_export_cumulative_prometheus(monkeypatch):
+    """路径参数归为同一路由；窗口过期后Prometheus的summary分位数清零，_sum 和 _count 仍为累计值"""
+    import types
+
+    from elevator_saga.server import perf
+    from elevator_saga.server.perf import RequestMetrics, route_label
+
+    clock = [1000.0]
+    monkeypatch.setattr(
+        perf,
+        "time",
+        types.SimpleNamespace(monotonic=lambda: clock[0], time=perf.time.time, process_time=perf.time.process_time),
+    )
+    metrics = RequestMetrics(window_seconds=10)
+    for elevator_id, status in ((3, 200), (5, 200), (7, 400)):
+        metrics.record("POST", route_label(f"/api/elevators/{elevator_id}/go_to_floor"), status, 16, 17, 0.002)
+
+    route = metrics.to_dict()["routes"]["POST /api/elevators/<int>/go_to_floor"]
+    assert route["count"] == route["window"]["count"] == 3
+    assert route["statuses"] == {"200": 2, "400": 1}
+    assert route["request_bytes"] == 48 and route["histogram_ms"]["2.5"] == 3
+
+    clock[0] += 60
+    assert metrics.to_dict()["routes"]["POST /api/elevators/<int>/go_to_floor"]["window"]["count"] == 0
+    text = metrics.to_prometheus()
+    labels = 'method="POST",route="/api/elevators/<int>/go_to_floor"'
+    assert f'elevator_saga_http_requests_total{{{labels},status="400"}} 1' in text
+    assert f"elevator_saga_http_request_duration_seconds_count{{{labels}}} 3" in text
+    assert f'elevator_saga_http_request_window_seconds{{{labels},quantile="0.5"}} 0.000000' in text
+    assert f"elevator_saga_http_request_window_seconds_sum{{{labels}}} 0.006000" in text
+    assert f"elevator_saga_http_request_window_seconds_count{{{labels}}} 3" in text
+    assert "process_cpu_seconds_total" in text
+
+
+def test_flask_requests_are_labelled_by_url_rule():
+    """Flask后端按路由规则归类请求，未匹配的路径归为同一类"""
+    from elevator_saga.server import simulator
+    from elevator_saga.server.perf import UNMATCHED_ROUTE, metrics
+
+    metrics.reset()
+    client = simulator.app.test_client()
+    headers = {"X-Session-Id": "perf-labels"}
+    client.post("/api/elevators/0/go_to_floor", json={"floor": 1}, headers=headers)
+    client.get("/api/no/such/route/1")
+    routes = metrics.to_dict()["routes"]
+    assert "POST /api/elevators/<int:elevator_id>/go_to_floor" in routes
+    assert f"GET {UNMATCHED_ROUTE}" in routes
+    simulator.close_session("perf-labels")
+
+
+def test_tick_phase_profiler_accumulates_each_phase():
+    """按阶段累计耗时、最大耗时和事件数，并按事件类型统计乘客流动"""
+    from elevator_saga.core.models import EventType, SimulationEvent
+    from elevator_saga.server.tick_profiler import TICK_PHASES, TickPhaseProfiler
+
+    profiler = TickPhaseProfiler()
+    board = SimulationEvent(1, EventType.PASSENGER_BOARD, {"elevator": 0, "floor": 0, "passenger": 1})
+    call = SimulationEvent(1, EventType.UP_BUTTON_PRESSED, {"floor": 0, "passenger": 2})
+    profiler.record_tick([0, 10, 30, 60, 100], [0, 0, 1, 1, 2], [call, board])
+    profiler.record_tick([0, 20, 30, 40, 50], [2, 2, 2, 2, 2], [call, board])
+    data = profiler.to_dict()
+    assert data["ticks"] == 2 and data["tick_total_ms"] == 150 / 1e6
+    assert [data["phases"][name]["max_us"] for name in TICK_PHASES] == [0.02, 0.02, 0.03, 0.04]
+    assert [data["phases"][name]["events"] for name in TICK_PHASES] == [0, 1, 0, 1]
+    assert data["passengers"] == {"arrived": 1, "boarded": 1, "alighted": 0}
+
+
+def test_tick_profiler_records_every_phase_of_a_real_run():
+    """开启tick计时的模拟器在整次运行中记录每个阶段，事件数和乘客数与实际发生的一致"""
+    from elevator_saga.benchmarks.policies import POLICIES
+    from elevator_saga.server.simulator import ElevatorSimulation
+    from elevator_saga.server.tick_profiler import TICK_PHASES
+
+    building = {"floors": 6, "elevators": 2, "elevator_capacity": 4, "duration": 300}
+    traffic = [{"id": i + 1, "origin": i % 6, "destination": (i + 3) % 6, "tick": 5 * i} for i in range(12)]
+    sim = ElevatorSimulation.from_traffic_data({"building": building, "traffic": traffic})
+    sim.enable_tick_profiling()
+    policy = POLICIES["bus"]()
+    emitted = 0
+    while sim.tick < 300:
+        events = sim.step(1)
+        emitted += len(events)
+        policy.on_events(sim, events)
+
+    profile = sim.last_run_tick_profile
+    assert profile is not None and profile["ticks"] == 300
+    for name in TICK_PHASES:
+        assert profile["phases"][name]["total_ms"] > 0, name
+    assert profile["phases"]["arrivals"]["events"] == 12
+    assert profile["phases"]["move"]["events"] > 0 and profile["phases"]["stops"]["events"] > 0
+    assert sum(phase["events"] for phase in profile["phases"].values()) == emitted
+    assert profile["passengers"] == {"arrived": 12, "boarded": 12, "alighted": 12}
+
+
+def test_pacing_is_rejected_in_sharded_workers():
+    """分片worker串行处理请求，不能为会话开启节奏模式"""
+    from elevator_saga.server import simulator
+
+    sim = simulator.ElevatorSimulation(None)
+    simulator.set_pacing_available(False)
+    try:
+        _, status = simulator.api_set_pacing(sim, {"ticks_per_second": 10})
+        assert status == 400 and sim.pacer is None
+        assert simulator.api_set_pacing(sim, {"ticks_per_second": None})[1] == 200
+    finally:
+        simulator.set_pacing_available(True)
+
+
+def test_profiler_runs_handler_without_holding_its_lock(tmp_path):
+    """采集中的请求不持有锁，并发请求照常执行但不计入"""
+    from elevator_saga.server.profiling import ProfilerControl
+    from elevator_saga.server.simulator import ElevatorSimulation
+
+    control = ProfilerControl(str(tmp_path))
+    sim = ElevatorSimulation(None)
+    nested = []
+
+    def handler(sim, data):
+        assert not control._lock.locked()
+        if not nested:
+            nested.append(control.run(lambda sim, data: ({"nested": True}, 200), sim, {}))
+        return {}, 200
+
+    control.start(requests=1)
+    assert control.run(handler, sim, {}) == ({}, 200)
+    assert nested == [({"nested": True}, 200)]
+    assert not control.active and control.last_result is not None and control.last_result["requests"] == 1
+
+
+def test_tracemalloc_keeps_only_baseline_and_previous_snapshot(tmp_path):
+    """tracemalloc 只保留基线和上一个快照，之后的快照同时与两者比较"""
+    from elevator_saga.server.profiling import ProfilerControl
+
+    control = ProfilerControl(str(tmp_path))
+    try:
+        results = [control.snapshot(tick, top=3) for tick in (0, 10, 20, 30)]
+    finally:
+        control.stop_tracemalloc()
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert "top_diffs_from_baseline" not in results[1] and results[3]["baseline_tick"] == 0
+    assert results[3]["compared_to_tick"] == 20
+    assert control._baseline is None and control._previous is None
+
+
+def test_go_to_floor_takes_effect_at_the_next_tick():
+    """接口提交的命令在下一个tick开始时才修改电梯状态，重置会丢弃未应用的命令"""
+    from elevator_saga.server.simulator import ElevatorSimulation, api_go_to_floor
+
+    building = {"floors": 6, "elevators": 1, "elevator_capacity": 4, "duration": 60}
+    sim = ElevatorSimulation.from_traffic_data({"building": building, "traffic": []})
+    elevator = sim.elevators[0]
+    assert api_go_to_floor(sim, {"floor": 3}, 0)[1] == 200
+    assert elevator.next_target_floor is None and elevator.target_floor == 0
+
+    sim.state.tick += 1
+    sim._process_tick()
+    assert elevator.target_floor == 3
+
+    sim.load_traffic_data({"building": building, "traffic": []})
+    api_go_to_floor(sim, {"floor": 4}, 0)
+    sim.reset()
+    sim.step(1)
+    assert sim.elevators[0].target_floor == 0 and sim.elevators[0].next_target_floor is None
+
+
+def test_reset_and_next_round_return_state_and_traffic():
+    """重置和切换流量的响应直接带上新一轮的初始状态和流量信息"""
+    from elevator_saga.server.simulator import close_session, dispatch_api, encode_json
+
+    session = "round-response"
+    try:
+        rounds = (
+            ("/api/traffic/next", {"full_reset": False}),
+            ("/api/reset", {"traffic": "up_peak"}),
+            ("/api/reset", {}),
+        )
+        for path, data in rounds:
+            result = dispatch_api("POST", path, data, session)
+            assert result is not None and result[1] == 200, (path, result)
+            payload = json.loads(encode_json(result[0]))
+            assert payload["success"] is True
+            assert payload["state"]["tick"] == 0 and payload["state"]["elevators"]
+            assert payload["traffic"]["max_tick"] > 0 or not data
+        assert payload["traffic"] == json.loads(encode_json(dispatch_api("GET", "/api/traffic/info", {}, session)[0]))
+    finally:
+        close_session(session)
+
+
+def test_sessions_share_the_read_only_traffic_corpus():
+    """同一流量目录的多个模拟共享只读的流量语料，不重复加载"""
+    from elevator_saga.server.simulator import DEFAULT_TRAFFIC_DIR, ElevatorSimulation
+
+    first = ElevatorSimulation(DEFAULT_TRAFFIC_DIR)
+    second = ElevatorSimulation(DEFAULT_TRAFFIC_DIR)
+    assert first.traffic_corpus is second.traffic_corpus
+    assert first.traffic_source.ticks is second.traffic_source.ticks
+    assert not first.traffic_source.ticks.flags.writeable
+
+
+def test_reset_accepts_inline_columns_and_generator_specs():
+    """重置接受内联的列式流量和生成器参数，越界楼层返回400"""
+    from elevator_saga.server.simulator import ElevatorSimulation, api_reset
+
+    sim = ElevatorSimulation(None)
+    building = {"floors": 5, "elevators": 2, "elevator_capacity": 4}
+    payload, status = api_reset(
+        sim, {"building": building, "traffic": {"tick": [3, 1], "origin": [0, 4], "destination": [4, 0]}}
+    )
+    assert status == 200 and payload["traffic"]["max_tick"] == 4
+    assert len(sim.floors) == 5 and sim.traffic_source.ticks.tolist() == [1, 3]
+    assert api_reset(sim, {"building": building, "traffic": {"tick": [1], "origin": [0], "destination": [5]}})[1] == 400
+    assert api_reset(sim, {"traffic": {"scenario": "random", "scale": "small", "seed": 1}})[1] == 200
+
+
+def test_shard_router_keeps_sessions_on_their_worker(capfd):
+    """分片前端把同一会话的请求发往同一个worker，会话之间状态独立；worker使用前端传入的日志级别"""
+    from elevator_saga.server.sharded import ShardRouter, shard_index
+    from elevator_saga.server.simulator import DEFAULT_TRAFFIC_DIR
+
+    assert shard_index("alice", 2) == shard_index("carol", 2) != shard_index("bob", 2)
+    router = ShardRouter(
+        2, DEFAULT_TRAFFIC_DIR, log_level="INFO", log_modules={"elevator_saga.server.sharded": "DEBUG"}
+    )
+
+    def call(method, path, session, data=None):
+        body, status = router(method, path, json.dumps(data).encode() if data else b"", session)
+        return json.loads(body), status
+
+    try:
+        payload, status = call("POST", "/api/step", "alice", {"ticks": 5})
+        assert status == 200 and payload["tick"] == 5
+        assert call("GET", "/api/state", "alice")[0]["tick"] == 5
+        assert call("GET", "/api/state", "carol")[0]["tick"] == 0
+        assert call("POST", "/api/step", "bob", {"ticks": 2})[1] == 200
+        assert call("GET", "/api/state", "bob")[0]["tick"] == 2
+        assert call("GET", "/api/state", "alice")[0]["tick"] == 5
+        assert call("GET", "/api/unknown", "bob")[1] == 404
+    finally:
+        router.close()
+    out = capfd.readouterr().out
+    assert "Simulation worker elevator-sim-worker-0 ready" in out
+    assert "Simulation worker elevator-sim-worker-1 ready" in out
+
+
+def test_stdlib_backend_serves_reset_and_state_over_http():
+    """标准库HTTP后端在本地端口上处理重置和状态请求，连接在请求之间保持"""
+    import http.client
+    import threading
+
+    from elevator_saga.core.models import SESSION_HEADER
+    from elevator_saga.server.http_backend import make_server
+    from elevator_saga.server.simulator import close_session, handle_raw_request
+
+    server = make_server("127.0.0.1", 0, handle_raw_request)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    headers = {"Content-Type": "application/json", SESSION_HEADER: "http-backend-test"}
+
+    def call(method, path, data=None):
+        connection.request(method, path, json.dumps(data) if data is not None else None, headers)
+        response = connection.getresponse()
+        return json.loads(response.read()), response.status
+
+    try:
+        building = {"floors": 4, "elevators": 2, "elevator_capacity": 4}
+        traffic = {"tick": [1, 2], "origin": [0, 3], "destination": [3, 0]}
+        payload, status = call("POST", "/api/reset", {"building": building, "traffic": traffic})
+        assert status == 200 and payload["success"] and payload["traffic"]["max_tick"] == 3
+        payload, status = call("POST", "/api/step", {"ticks": 2})
+        assert status == 200 and payload["tick"] == 2
+        state, status = call("GET", "/api/state")
+        assert status == 200 and state["tick"] == 2
+        assert len(state["elevators"]) == 2 and len(state["floors"]) == 4
+        assert call("GET", "/api/unknown")[1] == 404
+    finally:
+        connection.close()
+        server.shutdown()
+        server.server_close()
+        close_session("http-backend-test")
@@ -0,0 +1,217 @@
+"""
+Tests for traffic file readers, writers and sources
+"""
+
+import json
+
+import pytest
+
+
+def test_json_stream_reads_fields_after_traffic(tmp_path, monkeypatch):
+    """traffic 之后还有字段且文件大于一个读取块时，逐条解析仍为线性时间并得到全部乘客"""
+    from elevator_saga.traffic import jsonstream
+    from elevator_saga.traffic.jsonstream import load_traffic_columns, read_traffic_building
+
+    count = 50000
+    traffic = [{"id": i + 1, "origin": i % 7, "destination": (i + 3) % 7, "tick": i // 10} for i in range(count)]
+    building = {"floors": 7, "elevators": 2, "elevator_capacity": 8, "scenario": "random", "duration": count // 10}
+    path = tmp_path / "trailing.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traffic": traffic, "building": building, "meta": {"note": "}]"}}, f)
+    assert path.stat().st_size > 2 * jsonstream._CHUNK_SIZE
+
+    decoded = []
+    original_decode = jsonstream._ChunkScanner._decode_elements
+
+    def counting_decode(self):
+        values = original_decode(self)
+        decoded.append(len(values))
+        return values
+
+    monkeypatch.setattr(jsonstream._ChunkScanner, "_decode_elements", counting_decode)
+    loaded_building, ticks, origins, destinations = load_traffic_columns(path)
+
+    assert loaded_building == building
+    assert read_traffic_building(path) == building
+    assert ticks.tolist() == [entry["tick"] for entry in traffic]
+    assert origins.tolist() == [entry["origin"] for entry in traffic]
+    assert destinations.tolist() == [entry["destination"] for entry in traffic]
+    # 回退逐个解析每个块最多一次，而不是每个乘客一次
+    assert len(decoded) <= path.stat().st_size // jsonstream._CHUNK_SIZE + 1
+
+
+def test_vectorized_generator_returns_distinct_origin_and_destination():
+    """向量化生成器返回结构化数组，人数不超过 max_people，起点和终点不同"""
+    from elevator_saga.traffic.vectorized import TRAFFIC_DTYPE, generate_traffic_array
+
+    traffic = generate_traffic_array("random", floors=5, duration=100, max_people=50, seed=1)
+    assert traffic.dtype == TRAFFIC_DTYPE
+    assert 0 < len(traffic) <= 50
+    assert not (traffic["origin"] == traffic["destination"]).any()
+
+
+def test_binary_traffic_round_trip_sorts_by_tick(tmp_path):
+    """二进制流量文件写入后读回，建筑信息不变，乘客按tick排序"""
+    from elevator_saga.traffic.binary import load_binary_traffic, write_binary_traffic
+
+    building = {"floors": 3, "elevators": 1, "elevator_capacity": 4, "duration": 10}
+    path = tmp_path / "tiny.elvt"
+    write_binary_traffic(path, building, [5, 1], [0, 2], [2, 1])
+    traffic = load_binary_traffic(path)
+    assert traffic.building == building
+    assert traffic.ticks.tolist() == [1, 5]
+    assert traffic.origins.tolist() == [2, 0]
+
+
+def test_generator_source_stops_at_max_ticks():
+    """生成器流量源在 max_ticks 处结束，之后不再产生乘客"""
+    from elevator_saga.traffic.source import GeneratorTrafficSource
+
+    source = GeneratorTrafficSource("random", scale="small", seed=1, max_ticks=500)
+    assert source.duration == 500
+    ids, origins, destinations = source.take_until(500)
+    assert len(ids) == len(origins) == len(destinations) > 0
+    assert source.take_until(500)[1] == []
+
+
+def test_traffic_source_subclass_must_implement_take_until():
+    """没有实现 take_until 的流量来源在创建时就失败"""
+    from elevator_saga.traffic.source import TrafficSource
+
+    class NoArrivals(TrafficSource):
+        building = {"floors": 3, "elevators": 1, "elevator_capacity": 4, "duration": None}
+
+    with pytest.raises(TypeError):
+        NoArrivals()
+
+
+def test_traffic_grid_is_deterministic_and_cached(tmp_path):
+    """并行生成的流量网格种子确定，重复生成时复用已有文件"""
+    from elevator_saga.traffic.generators import generate_traffic_grid, scenario_seed
+
+    assert scenario_seed(42, "up_peak") == scenario_seed(42, "up_peak") != scenario_seed(42, "down_peak")
+    first = generate_traffic_grid(str(tmp_path), scales=["small"], seeds=[1], scenarios=["random"], workers=1)
+    assert first == generate_traffic_grid(str(tmp_path), scales=["small"], seeds=[1], scenarios=["random"])
+    assert list(first) == [tmp_path / "random.json"]
+
+
+def test_traffic_grid_raises_after_writing_the_manifest_when_a_file_fails(tmp_path, monkeypatch):
+    """网格中有文件生成失败时，写入缓存清单后抛出 TrafficGridError，成功的文件仍被缓存"""
+    from elevator_saga.traffic.generators import (
+        CACHE_MANIFEST,
+        TRAFFIC_SCENARIOS,
+        TrafficGridError,
+        generate_traffic_grid,
+    )
+
+    def broken(**kwargs):
+        raise RuntimeError("broken generator")
+
+    monkeypatch.setitem(TRAFFIC_SCENARIOS["random"], "generator", broken)
+    with pytest.raises(TrafficGridError) as excinfo:
+        generate_traffic_grid(str(tmp_path), scales=["small"], seeds=[1], scenarios=["random", "up_peak"], workers=1)
+    assert excinfo.value.failures == {tmp_path / "random.json": "RuntimeError: broken generator"}
+    assert list(excinfo.value.results) == [tmp_path / "up_peak.json"]
+    manifest = json.loads((tmp_path / CACHE_MANIFEST).read_text(encoding="utf-8"))
+    assert list(manifest) == ["up_peak.json"]
+
+
+def test_traffic_grid_workers_report_through_the_logger(tmp_path, capfd):
+    """进程池worker（fork）中生成文件的日志同样会写出"""
+    from elevator_saga.traffic.generators import generate_traffic_grid
+
+    generate_traffic_grid(str(tmp_path), scales=["small"], seeds=[1], scenarios=["random", "up_peak"], workers=2)
+    out = capfd.readouterr().out
+    assert f"[INFO] Generated 25 passengers for scenario 'random' (small) -> {tmp_path / 'random.json'}" in out
+    assert "scenario 'up_peak' (small)" in out
+
+
+def test_json_stream_writer_backfills_count_and_reader_sorts(tmp_path):
+    """流式JSON写入后回填乘客数，读取时按tick排序"""
+    from elevator_saga.traffic.jsonstream import iter_traffic_entries, load_traffic_columns, write_traffic_json
+
+    building = {"floors": 3, "elevators": 1, "elevator_capacity": 4, "expected_passengers": None, "duration": 10}
+    path = tmp_path / "tiny.json"
+    assert write_traffic_json(path, building, [5, 1], [0, 2], [2, 1]) == 2
+    assert [entry["tick"] for entry in iter_traffic_entries(path)] == [1, 5]
+    loaded, ticks, origins, _ = load_traffic_columns(path)
+    assert loaded["expected_passengers"] == 2
+    assert origins.tolist() == [2, 0]
+
+
+def test_analyzer_counts_od_and_minimum_car_trips():
+    """流量分析统计起止楼层矩阵和最少电梯趟数"""
+    from elevator_saga.traffic.analyze import analyze_columns, find_duplicates
+
+    building = {"floors": 6, "elevators": 2, "elevator_capacity": 4, "duration": 120}
+    ticks, origins, destinations = [0] * 10 + [60, 61], [0] * 10 + [5, 3], [5] * 10 + [0, 1]
+    analysis = analyze_columns(building, ticks, origins, destinations, window=60)
+    assert analysis.od[0, 5] == 10
+    assert analysis.summary["trips"]["min_car_trips"] == 4
+    assert analysis.summary["direction"]["peak_directional_ratio"] == 1.0
+    assert len(find_duplicates([analysis, analysis])) == 1
+
+
+def test_generate_traffic_file_does_not_hold_an_entry_list(tmp_path):
+    """生成流量文件时按列保存乘客，峰值内存远小于条目字典列表，文件内容与生成器的列表一致"""
+    import tracemalloc
+
+    from elevator_saga.traffic.generators import generate_random_traffic, generate_traffic_file
+    from elevator_saga.traffic.jsonstream import iter_traffic_entries
+
+    params = {"floors": 10, "duration": 20000, "max_people": 20000, "seed": 1}
+    path = tmp_path / "random.json"
+    tracemalloc.start()
+    try:
+        count = generate_traffic_file("random", str(path), scale="small", compact=True, **params)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # 每个乘客的条目字典本身就超过200字节
+    assert count > 15000
+    assert peak < 128 * count
+    expected = sorted(generate_random_traffic(**params), key=lambda entry: entry["tick"])
+    assert list(iter_traffic_entries(path)) == expected
+
+
+def test_office_day_traffic_has_morning_and_evening_peaks():
+    """全天办公流量按tick排序且在楼内，上行高峰和下行高峰出现在早晚对应的小时"""
+    import numpy as np
+
+    from elevator_saga.traffic.generators import generate_office_day_traffic
+
+    # 7:00-20:00 共13小时，每小时100个tick
+    traffic = generate_office_day_traffic(floors=30, duration=1300, max_people=4000, seed=3)
+    ticks = np.array([entry["tick"] for entry in traffic])
+    origins = np.array([entry["origin"] for entry in traffic])
+    destinations = np.array([entry["destination"] for entry in traffic])
+    assert len(traffic) == 4000 and [entry["id"] for entry in traffic] == list(range(1, 4001))
+    assert np.all(np.diff(ticks) >= 0) and ticks.min() >= 0 and ticks.max() < 1300
+    assert origins.min() >= 0 and destinations.min() >= 0 and max(origins.max(), destinations.max()) < 30
+    assert not np.any(origins == destinations)
+
+    hourly = np.bincount(ticks // 100, minlength=13)
+    # 8:45 的上行高峰在 8:00-9:00，17:36 的下行高峰在 17:00-18:00，都远高于 15:00-16:00
+    assert hourly[:5].argmax() == 1 and 8 + hourly[8:].argmax() == 10
+    assert hourly[1] > 2 * hourly[8] and hourly[10] > 2 * hourly[8]
+    morning, evening = ticks // 100 == 1, ticks // 100 == 10
+    assert np.mean(origins[morning] == 0) > 0.5
+    assert np.mean(destinations[evening] == 0) > 0.5
+
+
+def test_traffic_grid_uses_high_rise_scales_only_for_suitable_scenarios(tmp_path):
+    """xlarge 和 mega 规模只规划适合高层建筑的场景，参数取自对应的建筑规模"""
+    from elevator_saga.traffic.generators import BUILDING_SCALES, TRAFFIC_SCENARIOS, plan_traffic_grid
+
+    tasks = plan_traffic_grid(str(tmp_path), ["large", "xlarge", "mega"], [1])
+    by_scale = {scale: {task.scenario: task for task in tasks if task.scale == scale} for scale in BUILDING_SCALES}
+    assert set(by_scale["xlarge"]) == set(by_scale["mega"]) == {"office_day"}
+    assert set(by_scale["large"]) == {
+        name for name, config in TRAFFIC_SCENARIOS.items() if "large" in config["suitable_scales"]
+    }
+    assert "office_day" in by_scale["large"] and not by_scale["small"]
+    mega = by_scale["mega"]["office_day"]
+    assert mega.output_file == tmp_path / "mega" / "office_day.json"
+    assert mega.params["floors"] == 100 and mega.params["elevators"] == 40 and mega.params["max_people"] == 50000
+    assert by_scale["xlarge"]["office_day"].params["duration"] == BUILDING_SCALES["xlarge"]["duration_range"][0]